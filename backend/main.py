@@ -1,4 +1,4 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Header
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Header, BackgroundTasks
 from fastapi.responses import JSONResponse, StreamingResponse, Response
 import io
 import csv
@@ -13,12 +13,17 @@ try:
 except Exception:
     HAVE_REPORTLAB = False
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from datetime import datetime, timedelta
 import re
 import sys
 import os
+import asyncio
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 try:
     from bson import ObjectId
 except Exception:
@@ -28,16 +33,44 @@ except Exception:
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import modules.plm as plm
+import modules.ai_inference as ai_inference
 import modules.laboratorio as laboratorio
 import modules.gemelo_digital as gemelo
+import modules.series_temporales as series_temporales
 import database.init_db as db_init
 from database.config import DB_NAME
+from database import conexion
+from database.conexion import BaseDatosNoDisponible
+from database.repositorio import Repositorio
+from database.memoria import AlmacenMemoria, ClaveDuplicada
+from database.escritura_diferida import EscrituraDiferida
+from modules.biopython_utils import is_valid_protein, sequence_hash, validate_sequences
+from modules.caracteristicas import calcular as calcular_caracteristicas
+from modules.cargas import AlmacenCargas, ErrorCarga, TAM_PARTE_SUGERIDO
+from modules.ingesta_tabular import lotes_tabla, ErrorTabla, FORMATOS_TABLA
+from modules.almacen_fasta import AlmacenFasta, indexar_fasta
+from modules.ingesta_fasta import (
+    lotes_fasta, lotes_paralelos, abrir_descomprimido, detectar_compresion,
+    EXTENSIONES_COMPRESION, ERRORES_DESCOMPRESION
+)
 import os
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
+# Formato de almacenamiento de `datos_temporales`: filas (legado), columnas o f32
+FORMATO_SERIES = os.getenv("SERIES_TEMPORALES_FORMATO", "filas")
+if FORMATO_SERIES not in series_temporales.FORMATOS:
+    print(f"⚠️ SERIES_TEMPORALES_FORMATO inválido ({FORMATO_SERIES}), usando 'filas'")
+    FORMATO_SERIES = "filas"
+
+# Escritura diferida (en lotes) de experimentos y alertas en MongoDB
+ESCRITURA_DIFERIDA = os.getenv("ESCRITURA_DIFERIDA", "0").lower() in ("1", "true", "si", "sí")
+ESCRITURA_DIFERIDA_LOTE = int(os.getenv("ESCRITURA_DIFERIDA_LOTE", "500"))
+ESCRITURA_DIFERIDA_CAPACIDAD = int(os.getenv("ESCRITURA_DIFERIDA_CAPACIDAD", "10000"))
+ESCRITURA_DIFERIDA_REINTENTOS = int(os.getenv("ESCRITURA_DIFERIDA_REINTENTOS", "5"))
+
 # Importar generador de PDF (sin WeasyPrint para evitar errores en Windows)
 try:
     from modules.pdf_generator import pdf_generator
@@ -61,11 +94,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Inicializar estructuras en memoria por defecto
-secuencias_db = []
-experimentos_db = []
-alertas_db = []
-usuarios_db = []
+# Inicializar estructuras en memoria por defecto (indexadas y seguras entre hilos)
+secuencias_db = AlmacenMemoria(unicos=("idx", "hash_secuencia"))
+experimentos_db = AlmacenMemoria(indices=("tipo", "secuencia_idx", "hash_secuencia"))
+alertas_db = AlmacenMemoria()
+usuarios_db = AlmacenMemoria(unicos=("email",))
+
+# Resumen incremental de experimentos por tipo: tipo -> {cantidad, fecha_ultima}
+resumen_experimentos = {}
 
 # Inicializar base de datos (MongoDB) si está disponible
 db = db_init.init_db()
@@ -82,37 +118,121 @@ if db is not None:
         seed_mongodb_data(db)
     except Exception as e:
         print(f"⚠️ Error cargando datos de ejemplo en MongoDB: {e}")
+
+    # Asignar número secuencial a documentos heredados sin `idx`
+    db_init.asignar_indices_secuenciales(db)
+    db_init.normalizar_secuencia_idx(db)
+    db_init.asignar_hashes_secuencias(db)
+    db_init.asignar_caracteristicas(db)
 else:
     secuencias_col = None
     experimentos_col = None
     alertas_col = None
     usuarios_col = None
 
+def _contar_experimento(resumen, experimento):
+    """Actualiza el resumen por tipo con un experimento nuevo"""
+    tipo = experimento.get("tipo", "Desconocido")
+    entrada = resumen.setdefault(tipo, {"cantidad": 0, "fecha_ultima": ""})
+    entrada["cantidad"] += 1
+    entrada["fecha_ultima"] = max(entrada["fecha_ultima"], experimento.get("fecha") or "")
+
 # Inicializar datos de ejemplo en memoria siempre (para backup)
 try:
     from database.seed_data import initialize_demo_data
     initialize_demo_data(secuencias_db, experimentos_db)
+    for seq in secuencias_db:
+        secuencias_db.actualizar(seq['id'], {
+            'idx': seq['id'] if seq.get('idx') is None else seq['idx'],
+            'hash_secuencia': sequence_hash(seq.get('secuencia') or ''),
+            'caracteristicas': calcular_caracteristicas(seq.get('secuencia') or '')
+        })
+    for exp in experimentos_db:
+        _contar_experimento(resumen_experimentos, exp)
 except Exception as e:
     print(f"⚠️ Error cargando datos de ejemplo en memoria: {e}")
 
+# Capa de acceso asíncrona para los endpoints de consulta: usa el cliente
+# compartido (un único pool) ejecutando pymongo en el pool de hilos
+def _repositorio(nombre, memoria, secuencial=False):
+    return Repositorio(db[nombre] if db is not None else None, memoria, secuencial)
+
+def _escritura_diferida(collection):
+    if not ESCRITURA_DIFERIDA or collection is None:
+        return None
+    return EscrituraDiferida(collection, lote=ESCRITURA_DIFERIDA_LOTE, capacidad=ESCRITURA_DIFERIDA_CAPACIDAD,
+                             reintentos=ESCRITURA_DIFERIDA_REINTENTOS)
+
+experimentos_diferidos = _escritura_diferida(experimentos_col)
+alertas_diferidas = _escritura_diferida(alertas_col)
+
+@app.on_event("shutdown")
+def _vaciar_escrituras_diferidas():
+    for buffer in (experimentos_diferidos, alertas_diferidas):
+        if buffer is not None:
+            buffer.cerrar()
+
+secuencias_repo = _repositorio("secuencias", secuencias_db, secuencial=True)
+experimentos_repo = _repositorio("experimentos", experimentos_db)
+alertas_repo = _repositorio("alertas", alertas_db)
+
 # Sesiones se manejan en memoria (tokens temporales)
 sesiones_db = {}
 
 
-def _insert(collection, list_ref, record):
-    if collection is not None:
+def _activa(collection):
+    """True si `collection` existe y el circuito de MongoDB está cerrado.
+    Con el circuito abierto se usa el almacenamiento en memoria sin esperar timeouts.
+    """
+    return collection is not None and conexion.circuito.permite()
+
+
+def _no_disponible():
+    return HTTPException(
+        status_code=503, detail="MongoDB no disponible, reintentar en unos segundos",
+        headers={"Retry-After": str(int(conexion.circuito.espera))}
+    )
+
+
+@app.exception_handler(BaseDatosNoDisponible)
+async def _base_datos_no_disponible(request: Request, exc: BaseDatosNoDisponible):
+    error = _no_disponible()
+    return JSONResponse(status_code=error.status_code, content={"detail": error.detail}, headers=error.headers)
+
+
+def _escribible(collection):
+    """True si la escritura va a MongoDB, False si no hay base (modo memoria).
+
+    Con MongoDB configurado pero el circuito abierto responde 503 en lugar de
+    escribir en memoria: esos documentos tendrían ids/`idx` que chocan con los
+    de MongoDB y nada los reconciliaría al cerrarse el circuito.
+    """
+    if collection is None:
+        return False
+    if not conexion.circuito.permite():
+        raise _no_disponible()
+    return True
+
+
+def _insert(collection, list_ref, record, secuencial=False):
+    """Inserta un documento en MongoDB o, sin base de datos, en memoria.
+
+    Con `secuencial`, se asigna al registro un número `idx` estable y
+    monotónico para búsquedas posicionales.
+    """
+    if _escribible(collection):
+        if secuencial:
+            record['idx'] = db_init.siguiente_secuencial(collection.database, collection.name)
         res = collection.insert_one(record)
         # Convertir ObjectId a string para serialización JSON
         record['id'] = str(res.inserted_id)
         return record
     else:
-        record['id'] = len(list_ref)
-        list_ref.append(record)
-        return record
+        return list_ref.insertar(record, secuencial)
 
 
 def _find_all(collection, list_ref):
-    if collection is not None:
+    if _activa(collection):
         docs = list(collection.find({}))
         results = []
         for d in docs:
@@ -121,10 +241,136 @@ def _find_all(collection, list_ref):
             results.append(d)
         return results
     else:
-        return list_ref
+        return list(list_ref)
 
 
-def _create_simple_pdf_report(resultado, secuencia, idx_or_id, tipo_reporte):
+def _insert_diferido(collection, buffer, list_ref, record):
+    """Como `_insert`, pero encola en `buffer` (si la escritura diferida está activa)"""
+    if buffer is not None and _escribible(collection):
+        return buffer.encolar(record)
+    return _insert(collection, list_ref, record)
+
+
+def _insert_experimento(experimento):
+    """Inserta un experimento manteniendo el resumen por tipo en memoria"""
+    registro = _insert_diferido(experimentos_col, experimentos_diferidos, experimentos_db, experimento)
+    if experimentos_col is None:
+        _contar_experimento(resumen_experimentos, registro)
+    return registro
+
+
+def _experimentos_pendientes(**filtros):
+    """Experimentos aún en la cola de escritura diferida que cumplen `filtros`.
+    Se leen antes de consultar MongoDB: un documento confirmado entre ambas
+    lecturas aparece dos veces, pero nunca ninguna.
+    """
+    if experimentos_diferidos is None:
+        return []
+    return experimentos_diferidos.buscar(**filtros)
+
+
+def _mas_reciente(docs):
+    """Documento con la `fecha` más reciente, o None"""
+    docs = [d for d in docs if d is not None]
+    return max(docs, key=lambda d: d.get("fecha") or "") if docs else None
+
+
+def _analisis_previo(hash_sec, modelo):
+    """Experimento PLM más reciente para el mismo contenido y modelo, o None"""
+    filtro = {"tipo": "PLM", "hash_secuencia": hash_sec, "modelo": modelo}
+    if _activa(experimentos_col):
+        pendientes = _experimentos_pendientes(**filtro)
+        return _mas_reciente(pendientes + [experimentos_col.find_one(filtro, sort=[("fecha", -1)])])
+    return experimentos_db.mas_reciente(**filtro)
+
+
+# Tipos de resultado que alimentan los reportes
+TIPOS_RESULTADO = ("PLM", "Laboratorio", "GemeloDigital")
+
+
+def _ref_secuencia(seq_doc, idx_or_id):
+    """Valor canónico de `secuencia_idx`: el número `idx` (int) de la secuencia.
+    Se normaliza al escribir para que las búsquedas no prueben str e int.
+    """
+    idx = seq_doc.get('idx')
+    return idx if idx is not None else str(idx_or_id)
+
+
+def _ultimos_resultados(secuencia_idx, tipos=TIPOS_RESULTADO):
+    """Devuelve {tipo: resultado} con el experimento más reciente de cada tipo.
+
+    En MongoDB es una única agregación resuelta con el índice compuesto
+    (secuencia_idx, tipo, fecha desc); en memoria, con el índice por secuencia.
+    """
+    if _activa(experimentos_col):
+        pendientes = _experimentos_pendientes(secuencia_idx=secuencia_idx, tipo=list(tipos))
+        docs = list(experimentos_col.aggregate([
+            {"$match": {"secuencia_idx": secuencia_idx, "tipo": {"$in": list(tipos)}}},
+            {"$sort": {"secuencia_idx": 1, "tipo": 1, "fecha": -1}},
+            {"$group": {"_id": "$tipo", "resultado": {"$first": "$resultado"}, "fecha": {"$first": "$fecha"}}}
+        ]))
+        ultimos = {}
+        for d in docs + [dict(p, _id=p["tipo"]) for p in pendientes]:
+            ultimos[d["_id"]] = _mas_reciente([ultimos.get(d["_id"]), d])
+        return {tipo: d.get("resultado") for tipo, d in ultimos.items()}
+    resultados = {}
+    for tipo in tipos:
+        exp = experimentos_db.mas_reciente(secuencia_idx=secuencia_idx, tipo=tipo)
+        if exp is not None:
+            resultados[tipo] = exp.get("resultado")
+    return resultados
+
+
+async def _resumen_por_tipo():
+    """Cantidad y fecha más reciente de experimentos agrupados por tipo"""
+    if not experimentos_repo.en_memoria:
+        grupos = await experimentos_repo.agregar([
+            {"$group": {
+                "_id": {"$ifNull": ["$tipo", "Desconocido"]},
+                "cantidad": {"$sum": 1},
+                "fecha_ultima": {"$max": "$fecha"}
+            }}
+        ])
+        return {g["_id"]: {"cantidad": g["cantidad"], "fecha_ultima": g.get("fecha_ultima") or ""} for g in grupos}
+    return {tipo: dict(entrada) for tipo, entrada in resumen_experimentos.items()}
+
+
+def _contar(collection, list_ref):
+    """Total de documentos; en MongoDB usa los metadatos de la colección"""
+    if _activa(collection):
+        return collection.estimated_document_count()
+    return len(list_ref)
+
+
+# Paginación de listados
+LIMITE_PAGINA_DEFECTO = 100
+LIMITE_PAGINA_MAXIMO = 1000
+
+# Campos pesados que los listados excluyen salvo `completo=true`
+CAMPOS_PESADOS_SECUENCIAS = ("secuencia",)
+CAMPOS_PESADOS_EXPERIMENTOS = ("resultado.datos_temporales", "resultado.eventos_sistema", "resultado.secuencia")
+
+
+def _lineas_resultado(resultado):
+    """Líneas de texto del resultado para los reportes PDF.
+    `datos_temporales` se decodifica y se resume por variable (puntos, mín/máx, último)
+    en lugar de volcar la serie almacenada.
+    """
+    if not isinstance(resultado, dict):
+        return [str(resultado)[:100]]
+    lineas = []
+    for key, value in resultado.items():
+        if key == "datos_temporales" and value:
+            filas = series_temporales.a_filas(value)
+            lineas.append(f"{key}: {len(filas)} puntos")
+            for variable, r in series_temporales.resumen(filas).items():
+                lineas.append(f"  {variable}: mín {r['min']:.4g}, máx {r['max']:.4g}, último {r['ultimo']:.4g}")
+        else:
+            lineas.append(f"{str(key)}: {str(value)[:80]}")
+    return lineas
+
+
+def _create_simple_pdf_report(resultado, secuencia, idx_or_id, tipo_reporte, caracteristicas=None):
     """Crear PDF simple usando solo canvas de ReportLab"""
     try:
         buffer = io.BytesIO()
@@ -144,20 +390,23 @@ def _create_simple_pdf_report(resultado, secuencia, idx_or_id, tipo_reporte):
         if secuencia:
             p.drawString(50, y_position, f"Secuencia: {str(secuencia)[:50]}...")
             y_position -= 30
+        if caracteristicas:
+            p.drawString(50, y_position, (
+                f"PM: {caracteristicas['peso_molecular']:.2f} Da   pI: {caracteristicas['punto_isoelectrico']:.2f}   "
+                f"GRAVY: {caracteristicas['gravy']:.3f}   Carga neta (pH 7): {caracteristicas['carga_neta']:+.2f}"
+            ))
+            y_position -= 30
         
         # Resultados
         p.drawString(50, y_position, "Resultados del análisis:")
         y_position -= 30
         
-        if isinstance(resultado, dict):
-            for key, value in resultado.items():
-                if y_position < 50:  # Nueva página si es necesario
-                    p.showPage()
-                    y_position = height - 50
-                p.drawString(70, y_position, f"{str(key)}: {str(value)[:80]}")
-                y_position -= 20
-        else:
-            p.drawString(70, y_position, str(resultado)[:100])
+        for linea in _lineas_resultado(resultado):
+            if y_position < 50:  # Nueva página si es necesario
+                p.showPage()
+                y_position = height - 50
+            p.drawString(70, y_position, linea)
+            y_position -= 20
         
         p.save()
         buffer.seek(0)
@@ -286,7 +535,7 @@ def _create_simple_pdf_gemelo(resultado_gemelo, secuencia=None, resultado_plm=No
         
         # Datos temporales (resumen)
         if isinstance(resultado_gemelo, dict) and 'datos_temporales' in resultado_gemelo:
-            datos = resultado_gemelo['datos_temporales']
+            datos = series_temporales.a_filas(resultado_gemelo['datos_temporales'])
             if datos and len(datos) > 0:
                 if y_pos < 200:
                     p.showPage()
@@ -337,20 +586,39 @@ def _create_simple_pdf_gemelo(resultado_gemelo, secuencia=None, resultado_plm=No
         return buffer.getvalue()
 
 
+# Residuos de secuencias de referencia guardadas en FASTA indexados en disco
+almacen_referencias = AlmacenFasta()
+
+
+def _residuos(seq_doc):
+    """Residuos de la secuencia: del documento o, si es de referencia, leídos
+    bajo demanda del FASTA indexado (`almacen`).
+    """
+    if seq_doc.get("secuencia") is None and seq_doc.get("almacen"):
+        return almacen_referencias.leer(seq_doc["almacen"])
+    return seq_doc.get("secuencia")
+
+
+def _caracteristicas(seq_doc, secuencia):
+    """Vector precalculado al cargar la secuencia; se calcula aquí solo para
+    documentos anteriores a `caracteristicas`.
+    """
+    return seq_doc.get("caracteristicas") or calcular_caracteristicas(secuencia or "")
+
+
 def _get_by_index(collection, list_ref, idx):
-    if collection is not None:
-        # Obtener el documento por orden de inserción (skip/limit)
-        doc = list(collection.find({}).skip(idx).limit(1))
-        if not doc:
+    """Obtiene un documento por su número secuencial `idx`.
+    En MongoDB y en memoria usa el índice único sobre `idx`.
+    """
+    if _activa(collection):
+        d = collection.find_one({'idx': idx})
+        if not d:
             return None
-        d = doc[0]
         d['id'] = str(d.get('_id'))
         d.pop('_id', None)
         return d
     else:
-        if idx < 0 or idx >= len(list_ref):
-            return None
-        return list_ref[idx]
+        return list_ref.buscar_unico('idx', idx)
 
 
 def _get_by_idx_or_id(collection, list_ref, idx_or_id):
@@ -363,10 +631,13 @@ def _get_by_idx_or_id(collection, list_ref, idx_or_id):
     # Intentar interpretar como índice entero
     try:
         idx = int(idx_or_id)
+    except (TypeError, ValueError):
+        idx = None
+    if idx is not None:
         return _get_by_index(collection, list_ref, idx)
-    except Exception:
+    else:
         # No es entero: buscar por id
-        if collection is not None:
+        if _activa(collection):
             # Intentar ObjectId si está disponible
             try:
                 if ObjectId:
@@ -390,18 +661,13 @@ def _get_by_idx_or_id(collection, list_ref, idx_or_id):
                     return doc
                 return None
         else:
-            # Buscar en lista en memoria por coincidencia de id
-            for item in list_ref:
-                if str(item.get('id')) == str(idx_or_id):
-                    return item
-            return None
+            # Buscar en memoria por clave primaria
+            return list_ref.obtener(idx_or_id)
 
 # Validadores
 def validar_secuencia(secuencia: str) -> bool:
     """Valida que la secuencia contenga solo caracteres de aminoácidos válidos"""
-    secuencia = secuencia.strip().upper()
-    aminoacidos_validos = set('ACDEFGHIKLMNPQRSTVWY*')
-    return all(c in aminoacidos_validos for c in secuencia)
+    return is_valid_protein(secuencia)
 
 def validar_nombre(nombre: str) -> bool:
     """Valida que el nombre sea válido"""
@@ -414,10 +680,15 @@ def read_root():
 @app.get("/health")
 def health_check():
     """Endpoint de diagnóstico del sistema"""
+    conectado = usuarios_col is not None and conexion.circuito.estado == conexion.circuito.CERRADO
     return {
         "status": "OK",
-        "mongodb_connected": usuarios_col is not None,
-        "database_name": DB_NAME if usuarios_col else "memoria",
+        "mongodb_connected": conectado,
+        "mongodb_circuito": conexion.circuito.estado,
+        "modelos_plm": ai_inference.registry.stats(),
+        "lotes_plm": ai_inference.scheduler.stats(),
+        "cache_embeddings": plm.cache_embeddings.estado(),
+        "database_name": DB_NAME if conectado else "memoria",
         "usuarios_en_memoria": len(usuarios_db)
     }
 
@@ -432,33 +703,13 @@ def generar_reporte_plm(idx_or_id: str = Form(...), formato: str = Form(default=
         if seq_doc is None:
             raise HTTPException(status_code=404, detail="Secuencia no encontrada")
         
-        secuencia = seq_doc.get("secuencia")
+        secuencia = _residuos(seq_doc)
         
         # Buscar resultado PLM más reciente para esta secuencia
         resultado_plm = None
         try:
-            if experimentos_col is not None:
-                # Intentar búsqueda con string primero
-                plm_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "PLM"}, 
-                    sort=[("fecha", -1)]
-                )
-                
-                # Si no encuentra, intentar con int
-                if not plm_result:
-                    try:
-                        plm_result = experimentos_col.find_one(
-                            {"secuencia_idx": int(idx_or_id), "tipo": "PLM"}, 
-                            sort=[("fecha", -1)]
-                        )
-                    except ValueError:
-                        # Si idx_or_id no es convertible a int, continuar
-                        pass
-                
-                if plm_result:
-                    resultado_plm = plm_result.get("resultado")
-            else:
-                print("[DEBUG] experimentos_col es None")
+            resultados = _ultimos_resultados(_ref_secuencia(seq_doc, idx_or_id), ("PLM",))
+            resultado_plm = resultados.get("PLM")
         except Exception as e:
             print(f"Error buscando resultado PLM: {e}")
         
@@ -466,7 +717,9 @@ def generar_reporte_plm(idx_or_id: str = Form(...), formato: str = Form(default=
             raise HTTPException(status_code=404, detail="No se encontró análisis PLM para esta secuencia")
         
         # Usar siempre PDF simple para evitar problemas
-        pdf_content = _create_simple_pdf_report(resultado_plm, secuencia, idx_or_id, "PLM")
+        pdf_content = _create_simple_pdf_report(
+            resultado_plm, secuencia, idx_or_id, "PLM", _caracteristicas(seq_doc, secuencia)
+        )
         
         # Retornar PDF
         fecha_str = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -492,46 +745,15 @@ def generar_reporte_laboratorio(idx_or_id: str = Form(...)):
         if seq_doc is None:
             raise HTTPException(status_code=404, detail="Secuencia no encontrada")
         
-        secuencia = seq_doc.get("secuencia")
+        secuencia = _residuos(seq_doc)
         
-        # Buscar resultado de laboratorio más reciente
+        # Buscar resultado de laboratorio y PLM más recientes en una sola consulta
         resultado_lab = None
         resultado_plm = None
         try:
-            if experimentos_col is not None:
-                # Buscar Laboratorio
-                lab_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "Laboratorio"}, 
-                    sort=[("fecha", -1)]
-                )
-                if not lab_result:
-                    try:
-                        lab_result = experimentos_col.find_one(
-                            {"secuencia_idx": int(idx_or_id), "tipo": "Laboratorio"}, 
-                            sort=[("fecha", -1)]
-                        )
-                    except ValueError:
-                        pass
-                
-                if lab_result:
-                    resultado_lab = lab_result.get("resultado")
-                
-                # Buscar PLM relacionado
-                plm_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "PLM"}, 
-                    sort=[("fecha", -1)]
-                )
-                if not plm_result:
-                    try:
-                        plm_result = experimentos_col.find_one(
-                            {"secuencia_idx": int(idx_or_id), "tipo": "PLM"}, 
-                            sort=[("fecha", -1)]
-                        )
-                    except ValueError:
-                        pass
-                
-                if plm_result:
-                    resultado_plm = plm_result.get("resultado")
+            resultados = _ultimos_resultados(_ref_secuencia(seq_doc, idx_or_id), ("Laboratorio", "PLM"))
+            resultado_lab = resultados.get("Laboratorio")
+            resultado_plm = resultados.get("PLM")
         except Exception as e:
             print(f"Error buscando resultados: {e}")
         
@@ -541,7 +763,7 @@ def generar_reporte_laboratorio(idx_or_id: str = Form(...)):
         # Generar PDF simple
         pdf_content = _create_simple_pdf_report(
             {"laboratorio": resultado_lab, "plm": resultado_plm},
-            secuencia, idx_or_id, "Laboratorio"
+            secuencia, idx_or_id, "Laboratorio", _caracteristicas(seq_doc, secuencia)
         )
         
         # Retornar PDF
@@ -568,28 +790,15 @@ def generar_reporte_gemelo(idx_or_id: str = Form(...)):
         if seq_doc is None:
             raise HTTPException(status_code=404, detail="Secuencia no encontrada")
         
-        secuencia = seq_doc.get("secuencia")
+        secuencia = _residuos(seq_doc)
         
-        # Buscar resultado de gemelo digital más reciente
+        # Buscar resultado de gemelo digital y PLM más recientes en una sola consulta
         resultado_gemelo = None
         resultado_plm = None
         try:
-            if experimentos_col is not None:
-                # Gemelo Digital
-                gemelo_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "GemeloDigital"}, 
-                    sort=[("fecha", -1)]
-                )
-                if gemelo_result:
-                    resultado_gemelo = gemelo_result.get("resultado")
-                
-                # PLM relacionado
-                plm_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "PLM"}, 
-                    sort=[("fecha", -1)]
-                )
-                if plm_result:
-                    resultado_plm = plm_result.get("resultado")
+            resultados = _ultimos_resultados(_ref_secuencia(seq_doc, idx_or_id), ("GemeloDigital", "PLM"))
+            resultado_gemelo = resultados.get("GemeloDigital")
+            resultado_plm = resultados.get("PLM")
         except Exception as e:
             print(f"Error buscando resultados: {e}")
         
@@ -631,38 +840,18 @@ def generar_reporte_completo(idx_or_id: str = Form(...)):
         if seq_doc is None:
             raise HTTPException(status_code=404, detail="Secuencia no encontrada")
         
-        secuencia = seq_doc.get("secuencia")
+        secuencia = _residuos(seq_doc)
         
-        # Buscar todos los resultados disponibles
+        # Buscar todos los resultados disponibles en una sola consulta
         resultado_plm = None
         resultado_lab = None
         resultado_gemelo = None
         
         try:
-            if experimentos_col is not None:
-                # PLM
-                plm_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "PLM"}, 
-                    sort=[("fecha", -1)]
-                )
-                if plm_result:
-                    resultado_plm = plm_result.get("resultado")
-                
-                # Laboratorio
-                lab_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "Laboratorio"}, 
-                    sort=[("fecha", -1)]
-                )
-                if lab_result:
-                    resultado_lab = lab_result.get("resultado")
-                
-                # Gemelo Digital
-                gemelo_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "GemeloDigital"}, 
-                    sort=[("fecha", -1)]
-                )
-                if gemelo_result:
-                    resultado_gemelo = gemelo_result.get("resultado")
+            resultados = _ultimos_resultados(_ref_secuencia(seq_doc, idx_or_id))
+            resultado_plm = resultados.get("PLM")
+            resultado_lab = resultados.get("Laboratorio")
+            resultado_gemelo = resultados.get("GemeloDigital")
         except Exception as e:
             print(f"Error buscando resultados: {e}")
         
@@ -672,7 +861,8 @@ def generar_reporte_completo(idx_or_id: str = Form(...)):
         # Generar PDF completo con fallback
         try:
             pdf_content = pdf_generator.create_comprehensive_report(
-                resultado_plm, resultado_lab, resultado_gemelo, secuencia
+                resultado_plm, resultado_lab, resultado_gemelo, secuencia,
+                _caracteristicas(seq_doc, secuencia)
             )
         except Exception as pdf_error:
             print(f"Error con pdf_generator, usando fallback simple: {pdf_error}")
@@ -817,17 +1007,14 @@ def login(email: str = Form(...), password: str = Form(...)):
 
         # Buscar o crear usuario en base de datos
         usuario = None
-        if usuarios_col is not None:
+        if _activa(usuarios_col):
             u = usuarios_col.find_one({"email": email})
             if u:
                 u['id'] = str(u.get('_id'))
                 u.pop('_id', None)
                 usuario = u
         else:
-            for u in usuarios_db:
-                if u["email"] == email:
-                    usuario = u
-                    break
+            usuario = usuarios_db.buscar_unico("email", email)
 
         if not usuario:
             # Crear usuario con datos de demo
@@ -845,6 +1032,7 @@ def login(email: str = Form(...), password: str = Form(...)):
         sesiones_db[token] = {
             "usuario_id": usuario.get('id'),
             "email": email,
+            "rol": usuario.get('rol'),
             "fecha_login": datetime.now().isoformat()
         }
 
@@ -894,6 +1082,308 @@ def session_validate(token: Optional[str] = None, authorization: Optional[str] =
         raise
 
 
+# Ingesta de archivos FASTA con varios registros
+LOTE_INGESTA_FASTA = 1000
+MAX_RECHAZOS_DETALLE = 100
+# Tamaño máximo (descomprimido) de un archivo con una única secuencia sin encabezado
+MAX_BYTES_SECUENCIA = int(os.getenv("MAX_BYTES_SECUENCIA", str(1024 * 1024)))
+
+
+def _es_fasta(archivo) -> bool:
+    """True si el contenido (archivo binario) empieza con un encabezado FASTA"""
+    inicio = archivo.read(4096)
+    archivo.seek(0)
+    return inicio.lstrip().startswith(b">")
+
+
+def _lineas_archivo(archivo):
+    """Líneas de un archivo subido, decodificadas de a una (sin leerlo completo)"""
+    archivo.seek(0)
+    n = 0
+    try:
+        for n, linea in enumerate(archivo, 1):
+            try:
+                yield linea.decode("utf-8")
+            except UnicodeDecodeError:
+                raise HTTPException(status_code=400, detail=f"Archivo no es UTF-8 válido (línea {n})")
+    except ERRORES_DESCOMPRESION as e:
+        raise HTTPException(status_code=400, detail=f"Archivo comprimido dañado (línea {n + 1}): {str(e)}")
+
+
+def _formato_archivo(filename: Optional[str]) -> str:
+    """Extensión del archivo, ignorando un sufijo de compresión (.gz, .bz2, .xz)"""
+    if not filename:
+        return 'txt'
+    partes = filename.lower().split('.')
+    if len(partes) > 2 and partes[-1] in EXTENSIONES_COMPRESION:
+        partes.pop()
+    return partes[-1]
+
+
+async def _ingerir_lotes(lotes, progreso=None):
+    """Inserta con `insert_many` los lotes (registros, rechazos) de un FASTA o
+    una tabla. Los lotes se generan en el pool de hilos, de a uno por vez.
+    Con `progreso` (dict), actualiza sus contadores tras cada lote.
+    """
+    aceptadas = duplicadas = rechazadas = 0
+    rechazos = []
+    primero = None
+    try:
+        async for registros, rechazos_lote in iterate_in_threadpool(lotes):
+            insertados, repetidos = await secuencias_repo.insertar_muchos(registros)
+            aceptadas += len(insertados)
+            duplicadas += repetidos
+            rechazadas += len(rechazos_lote)
+            if progreso is not None:
+                progreso.update(aceptadas=aceptadas, duplicadas=duplicadas, rechazadas=rechazadas)
+            rechazos.extend(rechazos_lote[:MAX_RECHAZOS_DETALLE - len(rechazos)])
+            if primero is None and insertados:
+                primero = insertados[0]
+    except (ErrorTabla, ValueError) as e:
+        # Tabla sin columna de secuencia o mal formada
+        raise HTTPException(status_code=400, detail=f"{str(e)} ({aceptadas} secuencias ya cargadas)")
+    except BaseDatosNoDisponible:
+        error = _no_disponible()
+        error.detail += f" ({aceptadas} secuencias ya cargadas)"
+        raise error
+
+    if aceptadas + duplicadas + rechazadas == 0:
+        raise HTTPException(status_code=400, detail="No se recibió secuencia")
+    return {
+        "mensaje": f"{aceptadas} secuencias cargadas, {duplicadas} ya registradas, {rechazadas} rechazadas",
+        "registro": primero,
+        "aceptadas": aceptadas,
+        "duplicadas": duplicadas,
+        "rechazadas": rechazadas,
+        "rechazos": rechazos
+    }
+
+
+# Directorio del servidor desde el que se permiten importaciones masivas
+IMPORTACION_DIR = Path(os.getenv("IMPORTACION_DIR", str(Path(__file__).parent.parent / "datos" / "importacion"))).resolve()
+
+
+def _verificar_admin(token: Optional[str], authorization: Optional[str]) -> dict:
+    """Sesión válida con rol admin (token por query param o header Bearer)"""
+    tok = token
+    if authorization and authorization.startswith("Bearer "):
+        tok = authorization.split(" ", 1)[1]
+    sesion = verificar_token(tok)
+    if sesion.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="Requiere rol de administrador")
+    return sesion
+
+
+# 1b. Importación masiva de un FASTA del servidor (admin), en segundo plano
+MAX_IMPORTACIONES = 100
+importaciones = OrderedDict()
+
+
+async def _procesar_importacion(importacion_id, archivo, fuente, procesos, referencia):
+    """Tarea en segundo plano: ingiere el FASTA y deja el resultado en la importación"""
+    importacion = importaciones[importacion_id]
+    importacion["estado"] = "procesando"
+    try:
+        if referencia:
+            lotes = indexar_fasta(str(archivo), archivo.stem, fuente, LOTE_INGESTA_FASTA)
+        else:
+            lotes = lotes_paralelos(str(archivo), archivo.stem, fuente, "fasta", procesos, LOTE_INGESTA_FASTA)
+        importacion["resultado"] = await _ingerir_lotes(lotes, progreso=importacion)
+        importacion["estado"] = "completado"
+    except HTTPException as e:
+        importacion["estado"] = "error"
+        importacion["error"] = e.detail
+    except Exception as e:
+        importacion["estado"] = "error"
+        importacion["error"] = f"Error en importación masiva: {str(e)}"
+    importacion["fecha_fin"] = datetime.now().isoformat()
+
+
+@app.post("/admin/importar_fasta/", status_code=202)
+def importar_fasta_masivo(
+    background_tasks: BackgroundTasks,
+    ruta: str = Form(...),
+    fuente: Optional[str] = Form(default=None),
+    procesos: Optional[int] = Form(default=None),
+    referencia: bool = Form(default=False),
+    token: Optional[str] = None,
+    authorization: Optional[str] = Header(None)
+):
+    """Importa en segundo plano un FASTA grande ubicado en IMPORTACION_DIR.
+    El archivo se divide en rangos por registro y se parsea en paralelo
+    en un pool de procesos (ver modules/ingesta_fasta.py).
+    Con `referencia`, los residuos quedan en el archivo y los documentos
+    guardan solo su posición en él (ver modules/almacen_fasta.py).
+    Devuelve el id de la importación; el progreso se consulta con
+    GET /admin/importar_fasta/{importacion_id}.
+    """
+    _verificar_admin(token, authorization)
+    archivo = (IMPORTACION_DIR / ruta).resolve()
+    if IMPORTACION_DIR not in archivo.parents or not archivo.is_file():
+        raise HTTPException(status_code=404, detail="Archivo no encontrado en el directorio de importación")
+    if referencia:
+        with open(archivo, "rb") as f:
+            if detectar_compresion(f) is not None:
+                raise HTTPException(status_code=400, detail="Un FASTA de referencia debe estar sin comprimir")
+
+    importacion_id = uuid.uuid4().hex
+    importaciones[importacion_id] = {
+        "importacion_id": importacion_id,
+        "estado": "en_cola",
+        "archivo": ruta,
+        "referencia": referencia,
+        "aceptadas": 0,
+        "duplicadas": 0,
+        "rechazadas": 0,
+        "resultado": None,
+        "fecha_creacion": datetime.now().isoformat(),
+        "fecha_fin": None
+    }
+    # Se conservan las últimas importaciones (descartando primero las terminadas)
+    while len(importaciones) > MAX_IMPORTACIONES:
+        vieja = next((i for i, v in importaciones.items() if v["fecha_fin"]), None)
+        if vieja is None:
+            break
+        importaciones.pop(vieja)
+    background_tasks.add_task(_procesar_importacion, importacion_id, archivo, fuente, procesos, referencia)
+    return {"importacion_id": importacion_id, "estado": "en_cola"}
+
+
+@app.get("/admin/importar_fasta/{importacion_id}")
+def consultar_importacion(importacion_id: str, token: Optional[str] = None, authorization: Optional[str] = Header(None)):
+    """Estado y contadores de una importación masiva"""
+    _verificar_admin(token, authorization)
+    importacion = importaciones.get(importacion_id)
+    if importacion is None:
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    return importacion
+
+
+# 1c. Cargas por partes reanudables (sesión -> PUT de partes -> completar)
+CARGAS_DIR = os.getenv("CARGAS_DIR", str(Path(__file__).parent.parent / "datos" / "cargas"))
+cargas = AlmacenCargas(CARGAS_DIR)
+# Las sesiones sin actividad en este tiempo se eliminan (salvo ingestas en curso)
+CARGAS_TTL_S = float(os.getenv("CARGAS_TTL_HORAS", "24")) * 3600
+_tareas_cargas = set()
+
+
+def _carga(carga_id: str) -> dict:
+    try:
+        return cargas.estado(carga_id)
+    except ErrorCarga as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+async def _procesar_carga(carga_id: str, ruta: Path, nombre: str, fuente: Optional[str], formato: str):
+    """Tarea en segundo plano: parsea e inserta el archivo ensamblado"""
+    cargas.actualizar(carga_id, estado="procesando")
+    try:
+        with open(ruta, "rb") as f:
+            flujo = f if formato == "parquet" else abrir_descomprimido(f)
+            if formato in FORMATOS_TABLA:
+                lotes = lotes_tabla(flujo, formato, nombre, fuente, LOTE_INGESTA_FASTA)
+            elif await run_in_threadpool(_es_fasta, flujo):
+                lotes = lotes_fasta(_lineas_archivo(flujo), nombre, fuente, formato, LOTE_INGESTA_FASTA)
+            else:
+                raise HTTPException(status_code=400, detail="La carga por partes admite archivos FASTA o tablas")
+            resultado = await _ingerir_lotes(lotes)
+        cargas.actualizar(carga_id, estado="completada", resultado=resultado, fecha_fin=datetime.now().isoformat())
+    except HTTPException as e:
+        cargas.actualizar(carga_id, estado="error", error=e.detail, fecha_fin=datetime.now().isoformat())
+    except Exception as e:
+        cargas.actualizar(carga_id, estado="error", error=str(e), fecha_fin=datetime.now().isoformat())
+    finally:
+        ruta.unlink(missing_ok=True)
+
+
+def _lanzar(coro):
+    # El event loop solo guarda referencias débiles a sus tareas
+    tarea = asyncio.create_task(coro)
+    _tareas_cargas.add(tarea)
+    tarea.add_done_callback(_tareas_cargas.discard)
+
+
+async def _limpiar_cargas():
+    """Elimina periódicamente las sesiones de carga inactivas"""
+    while True:
+        try:
+            eliminadas = await run_in_threadpool(cargas.limpiar, CARGAS_TTL_S)
+            if eliminadas:
+                print(f"ℹ️ {eliminadas} cargas por partes inactivas eliminadas")
+        except Exception as e:
+            print(f"⚠️ Error limpiando cargas por partes: {e}")
+        await asyncio.sleep(min(CARGAS_TTL_S, 3600))
+
+
+@app.on_event("startup")
+async def _retomar_cargas():
+    """Retoma las ingestas que un reinicio dejó a medias y programa la limpieza"""
+    for sesion in await run_in_threadpool(cargas.recuperar):
+        carga_id = sesion["carga_id"]
+        print(f"ℹ️ Retomando la ingesta de la carga {carga_id}")
+        _lanzar(_procesar_carga(
+            carga_id, cargas.directorio / carga_id / "archivo", sesion["nombre"], sesion.get("fuente"), sesion["formato"]
+        ))
+    _lanzar(_limpiar_cargas())
+
+
+@app.post("/cargas/")
+def crear_carga(nombre: str = Form(...), archivo: str = Form(...), fuente: Optional[str] = Form(default=None)):
+    """Abre una sesión de carga por partes para el archivo `archivo` (nombre con extensión)"""
+    if not validar_nombre(nombre):
+        raise HTTPException(status_code=400, detail="Nombre inválido")
+    formato = _formato_archivo(archivo)
+    if formato not in ('fasta', 'txt') + FORMATOS_TABLA:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {formato}")
+    sesion = cargas.crear(nombre=nombre, fuente=fuente, archivo=archivo, formato=formato)
+    return {**sesion, "tam_parte_sugerido": TAM_PARTE_SUGERIDO}
+
+
+@app.put("/cargas/{carga_id}/partes/{numero}")
+async def subir_parte(carga_id: str, numero: int, request: Request, x_checksum_sha256: Optional[str] = Header(None)):
+    """Recibe la parte `numero` (cuerpo binario) y verifica el header
+    X-Checksum-SHA256, obligatorio. Reenviar una parte la reemplaza.
+    """
+    try:
+        tam = await cargas.guardar_parte(carga_id, numero, request.stream(), x_checksum_sha256)
+    except ErrorCarga as e:
+        codigo = 404 if "no encontrada" in str(e) else 400
+        raise HTTPException(status_code=codigo, detail=str(e))
+    return {"carga_id": carga_id, "numero": numero, "bytes": tam}
+
+
+@app.get("/cargas/{carga_id}")
+def consultar_carga(carga_id: str):
+    """Estado de la carga y partes recibidas (para reanudar tras un corte)"""
+    return _carga(carga_id)
+
+
+@app.post("/cargas/{carga_id}/completar", status_code=202)
+def completar_carga(carga_id: str, background_tasks: BackgroundTasks, total_partes: int = Form(...)):
+    """Ensambla las partes y lanza la ingesta en segundo plano; el progreso
+    se consulta con GET /cargas/{carga_id}.
+    """
+    _carga(carga_id)
+    # Solo una llamada concurrente gana la transición y encola la ingesta
+    try:
+        sesion = cargas.transicion(carga_id, "abierta", "ensamblando")
+    except ErrorCarga as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        ruta = cargas.ensamblar(carga_id, total_partes)
+    except ErrorCarga as e:
+        cargas.actualizar(carga_id, estado="abierta")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        cargas.actualizar(carga_id, estado="abierta")
+        raise
+    cargas.actualizar(carga_id, estado="en_cola")
+    background_tasks.add_task(
+        _procesar_carga, carga_id, ruta, sesion["nombre"], sesion.get("fuente"), sesion["formato"]
+    )
+    return {"carga_id": carga_id, "estado": "en_cola"}
+
+
 # 1. Cargar secuencia proteica
 @app.post("/cargar_secuencia/")
 async def cargar_secuencia(request: Request):
@@ -901,6 +1391,9 @@ async def cargar_secuencia(request: Request):
 
     Lee el formulario directamente desde `Request` para aceptar
     tanto `application/x-www-form-urlencoded` como `multipart/form-data`.
+    El contenido FASTA (con uno o más registros `>`) y las tablas CSV/TSV/Parquet
+    (columnas nombre, secuencia, organismo, tags) se ingieren en bloques y la
+    respuesta informa cuántos registros se aceptaron y rechazaron.
     """
     try:
         form = await request.form()
@@ -920,12 +1413,30 @@ async def cargar_secuencia(request: Request):
         if archivo is not None:
             # archivo puede ser un UploadFile (cuando multipart) o algo más
             if hasattr(archivo, "file"):
-                contenido = await archivo.read()
+                formato = _formato_archivo(getattr(archivo, 'filename', None))
+                if formato not in ['fasta', 'csv', 'tsv', 'parquet', 'pdb', 'txt']:
+                    raise HTTPException(status_code=400, detail=f"Formato no soportado: {formato}")
+                if formato == 'parquet':
+                    # Parquet necesita acceso aleatorio: se lee del archivo temporal sin descomprimir
+                    return await _ingerir_lotes(lotes_tabla(archivo.file, formato, nombre, fuente, LOTE_INGESTA_FASTA))
+                # gzip/bz2/xz se detectan por los bytes mágicos y se descomprimen al leer
+                flujo = abrir_descomprimido(archivo.file)
+                if formato in FORMATOS_TABLA:
+                    return await _ingerir_lotes(lotes_tabla(flujo, formato, nombre, fuente, LOTE_INGESTA_FASTA))
+                if await run_in_threadpool(_es_fasta, flujo):
+                    return await _ingerir_lotes(lotes_fasta(_lineas_archivo(flujo), nombre, fuente, formato, LOTE_INGESTA_FASTA))
+                try:
+                    # Lectura acotada: un archivo comprimido pequeño puede expandirse sin límite
+                    contenido = await run_in_threadpool(flujo.read, MAX_BYTES_SECUENCIA + 1)
+                except ERRORES_DESCOMPRESION as e:
+                    raise HTTPException(status_code=400, detail=f"Archivo comprimido dañado: {str(e)}")
+                if len(contenido) > MAX_BYTES_SECUENCIA:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"La secuencia supera el máximo de {MAX_BYTES_SECUENCIA} bytes; para varios registros usar FASTA"
+                    )
                 try:
                     secuencia = contenido.decode("utf-8").strip()
-                    formato = archivo.filename.split('.')[-1].lower() if getattr(archivo, 'filename', None) else 'txt'
-                    if formato not in ['fasta', 'csv', 'pdb', 'txt']:
-                        raise HTTPException(status_code=400, detail=f"Formato no soportado: {formato}")
                 except UnicodeDecodeError:
                     raise HTTPException(status_code=400, detail="Archivo no es UTF-8 válido")
             else:
@@ -934,14 +1445,28 @@ async def cargar_secuencia(request: Request):
 
         if secuencia_texto and not secuencia:
             secuencia = str(secuencia_texto).strip()
+            if secuencia.startswith(">"):
+                return await _ingerir_lotes(lotes_fasta(secuencia.splitlines(), nombre, fuente, formato or "fasta", LOTE_INGESTA_FASTA))
             formato = formato or "txt"
 
         if not secuencia:
             raise HTTPException(status_code=400, detail="No se recibió secuencia")
 
-        # Validar secuencia
-        if not validar_secuencia(secuencia):
-            raise HTTPException(status_code=400, detail="Secuencia contiene caracteres inválidos")
+        # Validar y normalizar (mayúsculas, sin espacios ni saltos de línea)
+        secuencia, posiciones = validate_sequences([secuencia])[0]
+        if posiciones:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Secuencia contiene caracteres inválidos en las posiciones {', '.join(str(p + 1) for p in posiciones)}"
+            )
+        if not secuencia:
+            raise HTTPException(status_code=400, detail="No se recibió secuencia")
+
+        # Deduplicar por contenido: una secuencia ya cargada resuelve al registro existente
+        hash_sec = sequence_hash(secuencia)
+        existente = await secuencias_repo.buscar_unico("hash_secuencia", hash_sec)
+        if existente is not None:
+            return {"mensaje": "Secuencia ya registrada", "registro": existente, "duplicada": True}
 
         registro = {
             "nombre": nombre,
@@ -949,9 +1474,18 @@ async def cargar_secuencia(request: Request):
             "secuencia": secuencia,
             "formato": formato,
             "fecha_carga": datetime.now().isoformat(),
-            "longitud": len(secuencia)
+            "longitud": len(secuencia),
+            "hash_secuencia": hash_sec,
+            "caracteristicas": calcular_caracteristicas(secuencia)
         }
-        registro = _insert(secuencias_col, secuencias_db, registro)
+        try:
+            registro = await secuencias_repo.insertar(registro)
+        except BaseDatosNoDisponible:
+            raise _no_disponible()
+        except ClaveDuplicada:
+            # Carga concurrente de la misma secuencia
+            existente = await secuencias_repo.buscar_unico("hash_secuencia", hash_sec)
+            return {"mensaje": "Secuencia ya registrada", "registro": existente, "duplicada": True}
         return {"mensaje": "Secuencia cargada correctamente", "registro": registro}
 
     except HTTPException:
@@ -960,39 +1494,87 @@ async def cargar_secuencia(request: Request):
         raise HTTPException(status_code=500, detail=f"Error al procesar: {str(e)}")
 
 # 2. Listar secuencias
+async def _pagina(repo, limit, cursor, excluir=(), descendente=False, diferidos=None):
+    """Página de `repo` con el límite acotado; cursor inválido -> 400.
+    Con `diferidos`, incluye los documentos del rango que aún están en la cola;
+    la cola se lee antes que la base, como en `_experimentos_pendientes`.
+    """
+    limit = max(1, min(int(limit), LIMITE_PAGINA_MAXIMO))
+    superponer = diferidos is not None and descendente and not repo.en_memoria
+    pendientes = diferidos.pendientes() if superponer else None
+    try:
+        docs, siguiente = await repo.buscar_pagina(limit, cursor, excluir, descendente)
+        if superponer:
+            docs, siguiente = diferidos.superponer(docs, siguiente, limit, cursor, excluir, pendientes)
+        return docs, siguiente
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/secuencias/")
-def listar_secuencias():
-    return {"secuencias": _find_all(secuencias_col, secuencias_db)}
+async def listar_secuencias(limit: int = LIMITE_PAGINA_DEFECTO, cursor: Optional[str] = None, completo: bool = False):
+    """Lista secuencias paginadas; sin `completo` se omiten los residuos"""
+    secuencias, siguiente = await _pagina(
+        secuencias_repo, limit, cursor,
+        excluir=() if completo else CAMPOS_PESADOS_SECUENCIAS
+    )
+    return {"secuencias": secuencias, "siguiente_cursor": siguiente}
 
 # 3. Consultar secuencia específica
 @app.get("/secuencia/{idx}")
-def consultar_secuencia(idx: int):
-    doc = _get_by_index(secuencias_col, secuencias_db, idx)
+async def consultar_secuencia(idx: int):
+    doc = await secuencias_repo.buscar_por_idx(idx)
     if doc is None:
         return JSONResponse(status_code=404, content={"error": "Secuencia no encontrada"})
+    if doc.get("secuencia") is None and doc.get("almacen"):
+        doc = {**doc, "secuencia": await run_in_threadpool(_residuos, doc)}
     return doc
 
 # 4. Ejecutar análisis PLM
 @app.post("/analizar_plm/")
 def analizar_plm(idx_or_id: str = Form(...), modelo: str = Form(default="esm2")):
-    """Ejecuta análisis PLM en una secuencia con modelo específico"""
+    """Ejecuta análisis PLM en una secuencia con modelo específico.
+
+    Si ya hay un análisis del mismo contenido (`hash_secuencia`) con el mismo
+    modelo, no se vuelve a ejecutar el modelo:
+    - de esta misma secuencia: se devuelve tal cual, sin registrar nada;
+    - de otra secuencia con los mismos residuos (p. ej. una `duplicada_de`):
+      se copia el resultado en un experimento nuevo de esta secuencia, para
+      que sus reportes y simulaciones lo encuentren.
+    La respuesta indica `reutilizado` y la secuencia de origen (`reutilizado_de`).
+    """
     try:
         seq_doc = _get_by_idx_or_id(secuencias_col, secuencias_db, idx_or_id)
         if seq_doc is None:
             raise HTTPException(status_code=404, detail="Secuencia no encontrada")
 
-        secuencia = seq_doc.get("secuencia")
-        resultado = plm.analizar_proteina(secuencia, modelo)
+        secuencia = _residuos(seq_doc)
+        secuencia_idx = _ref_secuencia(seq_doc, idx_or_id)
+        hash_sec = seq_doc.get("hash_secuencia") or sequence_hash(secuencia or "")
+
+        previo = _analisis_previo(hash_sec, modelo)
+        if previo is not None:
+            reutilizado = {
+                "mensaje": "Análisis PLM reutilizado", "resultado": previo.get("resultado"),
+                "reutilizado": True, "reutilizado_de": previo.get("secuencia_idx")
+            }
+            if previo.get("secuencia_idx") == secuencia_idx:
+                return reutilizado
+
+        resultado = previo.get("resultado") if previo is not None else plm.analizar_proteina(secuencia, modelo)
 
         # Guarda resultado en experimentos
         experimento = {
             "tipo": "PLM",
-            "secuencia_idx": idx_or_id,
+            "secuencia_idx": secuencia_idx,
+            "hash_secuencia": hash_sec,
+            "modelo": modelo,
             "resultado": resultado,
             "fecha": datetime.now().isoformat(),
             "estado": "completado"
         }
-        _insert(experimentos_col, experimentos_db, experimento)
+        _insert_experimento(experimento)
+        if previo is not None:
+            return reutilizado
         return {"mensaje": "Análisis PLM ejecutado", "resultado": resultado}
         
     except HTTPException:
@@ -1000,6 +1582,266 @@ def analizar_plm(idx_or_id: str = Form(...), modelo: str = Form(default="esm2"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en análisis: {str(e)}")
 
+# 4b. Análisis PLM por lotes (muchas secuencias x muchos modelos)
+PLM_LOTE_SECUENCIAS = int(os.getenv("PLM_LOTE_SECUENCIAS", "256"))
+MAX_TRABAJOS_PLM = 100
+MAX_ERRORES_DETALLE = 20
+
+# Las llamadas concurrentes a `plm.analizar_proteina` se agrupan en lotes de
+# inferencia (ver ai_inference.scheduler): un trabajador por lugar del lote
+pool_plm = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PLM_LOTE_TRABAJADORES", str(ai_inference.scheduler.max_batch))),
+    thread_name_prefix="plm-lote"
+)
+trabajos_plm = OrderedDict()
+
+
+def _filtro_dataset(fuente, organismo, tag):
+    filtro = {}
+    if fuente:
+        filtro["fuente"] = fuente
+    if organismo:
+        filtro["organismo"] = organismo
+    if tag:
+        filtro["tags"] = tag
+    return filtro
+
+
+def _normalizar_id(valor):
+    """`idx` numérico en forma canónica ("01" -> "1"); otros ids sin cambios"""
+    try:
+        return str(int(valor))
+    except ValueError:
+        return valor
+
+
+def _consulta_ids(ids):
+    """Consulta MongoDB para una lista de `idx` numéricos o `_id` de documento;
+    None si ningún valor puede coincidir"""
+    indices, oids = [], []
+    for valor in ids:
+        try:
+            indices.append(int(valor))
+        except ValueError:
+            if ObjectId and ObjectId.is_valid(valor):
+                oids.append(ObjectId(valor))
+    condiciones = [{"idx": {"$in": indices}}] if indices else []
+    if oids:
+        condiciones.append({"_id": {"$in": oids}})
+    return {"$or": condiciones} if condiciones else None
+
+
+def _secuencias_lote(ids, filtro, limite):
+    """Genera las secuencias del trabajo en bloques de PLM_LOTE_SECUENCIAS,
+    con una consulta por bloque de ids (o un único cursor para el filtro)"""
+    if _activa(secuencias_col):
+        if ids:
+            consultas = (_consulta_ids(ids[i:i + PLM_LOTE_SECUENCIAS]) for i in range(0, len(ids), PLM_LOTE_SECUENCIAS))
+            consultas = (c for c in consultas if c is not None)
+        else:
+            consultas = [filtro]
+        docs = (d for consulta in consultas for d in secuencias_col.find(consulta, batch_size=PLM_LOTE_SECUENCIAS))
+    elif ids:
+        docs = (_get_by_idx_or_id(None, secuencias_db, valor) for valor in ids)
+        docs = (d for d in docs if d is not None)
+    else:
+        docs = (d for d in secuencias_db if all(
+            v in (d.get(c) or []) if c == "tags" else d.get(c) == v for c, v in filtro.items()
+        ))
+    bloque = []
+    vistos = set()
+    for d in docs:
+        if limite and len(vistos) >= limite:
+            break
+        if '_id' in d:
+            d['id'] = str(d.pop('_id'))
+        # Un mismo documento pedido por idx y por id se analiza una vez
+        if d['id'] in vistos:
+            continue
+        vistos.add(d['id'])
+        bloque.append(d)
+        if len(bloque) >= PLM_LOTE_SECUENCIAS:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _analisis_previos(hashes, modelo):
+    """{hash_secuencia: experimento PLM más reciente} para un bloque, en una consulta"""
+    if _activa(experimentos_col):
+        previos = {}
+        pendientes = _experimentos_pendientes(tipo="PLM", modelo=modelo, hash_secuencia=set(hashes))
+        cursor = experimentos_col.find(
+            {"tipo": "PLM", "modelo": modelo, "hash_secuencia": {"$in": list(hashes)}},
+            {"hash_secuencia": 1, "secuencia_idx": 1, "resultado": 1, "fecha": 1}
+        ).sort("fecha", -1)
+        for d in list(cursor) + pendientes:
+            previos[d["hash_secuencia"]] = _mas_reciente([previos.get(d["hash_secuencia"]), d])
+        return previos
+    previos = {}
+    for hash_sec in set(hashes):
+        previo = experimentos_db.mas_reciente(tipo="PLM", hash_secuencia=hash_sec, modelo=modelo)
+        if previo is not None:
+            previos[hash_sec] = previo
+    return previos
+
+
+def _contar_total(ids, filtro, limite, modelos):
+    if ids:
+        total = len(ids)
+    elif _activa(secuencias_col):
+        total = secuencias_col.count_documents(filtro)
+    else:
+        total = sum(len(bloque) for bloque in _secuencias_lote(None, filtro, None))
+    return (min(total, limite) if limite else total) * len(modelos)
+
+
+async def _analizar_bloque(trabajo, docs, modelo):
+    """Analiza un bloque de secuencias con un modelo e inserta los resultados
+    con un único `insert_many`"""
+    loop = asyncio.get_running_loop()
+    filas = []
+    for doc in docs:
+        secuencia = _residuos(doc)
+        filas.append((doc, secuencia, doc.get("hash_secuencia") or sequence_hash(secuencia or "")))
+    previos = await run_in_threadpool(_analisis_previos, [f[2] for f in filas], modelo)
+
+    # (secuencia_idx, hash, resultado previo, calcular): con `calcular` el
+    # resultado sale de la siguiente tarea, en el mismo orden
+    pendientes, tareas = [], []
+    for doc, secuencia, hash_sec in filas:
+        previo = previos.get(hash_sec)
+        secuencia_idx = _ref_secuencia(doc, doc.get("id"))
+        if previo is not None and previo.get("resultado") is not None:
+            trabajo["reutilizados"] += 1
+            # Mismo contenido ya analizado para otra secuencia: se copia el resultado
+            if previo.get("secuencia_idx") != secuencia_idx:
+                pendientes.append((secuencia_idx, hash_sec, previo["resultado"], False))
+        elif not secuencia:
+            trabajo["errores"] += 1
+            if len(trabajo["errores_detalle"]) < MAX_ERRORES_DETALLE:
+                trabajo["errores_detalle"].append({"secuencia_idx": secuencia_idx, "modelo": modelo, "error": "Secuencia vacía"})
+        else:
+            pendientes.append((secuencia_idx, hash_sec, None, True))
+            tareas.append(loop.run_in_executor(pool_plm, plm.analizar_proteina, secuencia, modelo))
+
+    calculados = iter(await asyncio.gather(*tareas, return_exceptions=True))
+    experimentos = []
+    fecha = datetime.now().isoformat()
+    for secuencia_idx, hash_sec, resultado, calcular in pendientes:
+        if calcular:
+            resultado = next(calculados)
+        if isinstance(resultado, Exception):
+            trabajo["errores"] += 1
+            if len(trabajo["errores_detalle"]) < MAX_ERRORES_DETALLE:
+                trabajo["errores_detalle"].append({"secuencia_idx": secuencia_idx, "modelo": modelo, "error": str(resultado)})
+            continue
+        experimentos.append({
+            "tipo": "PLM",
+            "secuencia_idx": secuencia_idx,
+            "hash_secuencia": hash_sec,
+            "modelo": modelo,
+            "resultado": resultado,
+            "fecha": fecha,
+            "estado": "completado",
+            "trabajo_id": trabajo["trabajo_id"]
+        })
+    insertados, _ = await experimentos_repo.insertar_muchos(experimentos)
+    if experimentos_repo.en_memoria:
+        for experimento in insertados:
+            _contar_experimento(resumen_experimentos, experimento)
+    trabajo["analizados"] += len(insertados)
+    trabajo["procesados"] += len(filas)
+
+
+async def _procesar_lote_plm(trabajo_id, ids, filtro, limite, modelos):
+    """Tarea en segundo plano: recorre las secuencias en bloques y analiza
+    cada bloque con todos los modelos"""
+    trabajo = trabajos_plm[trabajo_id]
+    trabajo["estado"] = "procesando"
+    try:
+        trabajo["total"] = await run_in_threadpool(_contar_total, ids, filtro, limite, modelos)
+        async for docs in iterate_in_threadpool(_secuencias_lote(ids, filtro, limite)):
+            for modelo in modelos:
+                await _analizar_bloque(trabajo, docs, modelo)
+        if ids:
+            trabajo["no_encontradas"] = trabajo["total"] // len(modelos) - trabajo["procesados"] // len(modelos)
+        trabajo["estado"] = "completado"
+    except Exception as e:
+        trabajo["estado"] = "error"
+        trabajo["error"] = str(e)
+    trabajo["fecha_fin"] = datetime.now().isoformat()
+
+
+@app.post("/analizar_plm/lote/", status_code=202)
+def analizar_plm_lote(
+    background_tasks: BackgroundTasks,
+    ids: Optional[str] = Form(default=None),
+    fuente: Optional[str] = Form(default=None),
+    organismo: Optional[str] = Form(default=None),
+    tag: Optional[str] = Form(default=None),
+    modelos: str = Form(default="esm2"),
+    limite: Optional[int] = Form(default=None)
+):
+    """Análisis PLM de muchas secuencias con uno o más modelos en segundo plano.
+
+    Las secuencias se eligen por `ids` (idx o ids de documento separados por
+    comas) o por filtro de dataset (`fuente`, `organismo`, `tag`). Devuelve el
+    id del trabajo; el progreso se consulta con GET /analizar_plm/lote/{trabajo_id}.
+    Los análisis previos del mismo contenido y modelo se reutilizan.
+    """
+    # Sin repetidos: el total del trabajo cuenta cada secuencia una vez
+    lista_ids = list(dict.fromkeys(_normalizar_id(v) for v in re.split(r"[\s,;]+", ids or "") if v))
+    filtro = _filtro_dataset(fuente, organismo, tag)
+    if not lista_ids and not filtro:
+        raise HTTPException(status_code=400, detail="Indicar ids o un filtro de dataset (fuente, organismo, tag)")
+    lista_modelos = list(dict.fromkeys(m.strip().lower() for m in modelos.split(",") if m.strip()))
+    invalidos = [m for m in lista_modelos if m not in plm.MODELOS]
+    if not lista_modelos or invalidos:
+        raise HTTPException(status_code=400, detail=f"Modelos no soportados: {invalidos or modelos}")
+    if limite is not None and limite <= 0:
+        raise HTTPException(status_code=400, detail="El límite debe ser positivo")
+
+    trabajo_id = uuid.uuid4().hex
+    trabajos_plm[trabajo_id] = {
+        "trabajo_id": trabajo_id,
+        "estado": "en_cola",
+        "modelos": lista_modelos,
+        "total": None,
+        "procesados": 0,
+        "analizados": 0,
+        "reutilizados": 0,
+        "errores": 0,
+        "errores_detalle": [],
+        "no_encontradas": 0,
+        "fecha_creacion": datetime.now().isoformat(),
+        "fecha_fin": None
+    }
+    # Se conservan los últimos trabajos (descartando primero los terminados)
+    while len(trabajos_plm) > MAX_TRABAJOS_PLM:
+        viejo = next((t for t, v in trabajos_plm.items() if v["fecha_fin"]), None)
+        if viejo is None:
+            break
+        trabajos_plm.pop(viejo)
+    background_tasks.add_task(_procesar_lote_plm, trabajo_id, lista_ids, filtro, limite, lista_modelos)
+    return {"trabajo_id": trabajo_id, "estado": "en_cola"}
+
+
+@app.get("/analizar_plm/lote/{trabajo_id}")
+def consultar_lote_plm(trabajo_id: str):
+    """Progreso de un trabajo de análisis por lotes"""
+    trabajo = trabajos_plm.get(trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    total = trabajo["total"]
+    if trabajo["estado"] == "completado" or not total:
+        progreso = 1.0 if trabajo["fecha_fin"] else 0.0
+    else:
+        progreso = round(min(trabajo["procesados"] / total, 1.0), 4)
+    return {**trabajo, "progreso": progreso}
+
+
 # 5. Simulación de laboratorio virtual
 @app.post("/simular_laboratorio/")
 def simular_laboratorio(idx_or_id: str = Form(...)):
@@ -1009,31 +1851,28 @@ def simular_laboratorio(idx_or_id: str = Form(...)):
         if seq_doc is None:
             raise HTTPException(status_code=404, detail="Secuencia no encontrada")
 
-        secuencia = seq_doc.get("secuencia")
+        secuencia = _residuos(seq_doc)
         
         # Buscar resultado PLM reciente para esta secuencia
+        secuencia_idx = _ref_secuencia(seq_doc, idx_or_id)
         resultado_plm = None
         try:
-            if experimentos_col:
-                plm_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "PLM"}, 
-                    sort=[("fecha", -1)]
-                )
-                if plm_result:
-                    resultado_plm = plm_result.get("resultado")
-        except:
-            pass
-        
-        resultado = laboratorio.simular_experimento({"duracion": 10}, secuencia, resultado_plm)
+            resultado_plm = _ultimos_resultados(secuencia_idx, ("PLM",)).get("PLM")
+        except Exception as e:
+            print(f"Error buscando resultado PLM: {e}")
+        
+        resultado = laboratorio.simular_experimento(
+            {"duracion": 10}, secuencia, resultado_plm, _caracteristicas(seq_doc, secuencia)
+        )
 
         experimento = {
             "tipo": "Laboratorio",
-            "secuencia_idx": idx_or_id,
-            "resultado": resultado,
+            "secuencia_idx": secuencia_idx,
+            "resultado": series_temporales.codificar_resultado(resultado, FORMATO_SERIES),
             "fecha": datetime.now().isoformat(),
             "estado": "completado"
         }
-        _insert(experimentos_col, experimentos_db, experimento)
+        _insert_experimento(experimento)
         return {"mensaje": "Simulación de laboratorio ejecutada", "resultado": resultado}
         
     except HTTPException:
@@ -1050,31 +1889,29 @@ def simular_gemelo(idx_or_id: str = Form(...)):
         if seq_doc is None:
             raise HTTPException(status_code=404, detail="Secuencia no encontrada")
 
-        secuencia = seq_doc.get("secuencia")
+        secuencia = _residuos(seq_doc)
         
         # Buscar resultado PLM reciente para esta secuencia
+        secuencia_idx = _ref_secuencia(seq_doc, idx_or_id)
         resultado_plm = None
         try:
-            if experimentos_col:
-                plm_result = experimentos_col.find_one(
-                    {"secuencia_idx": idx_or_id, "tipo": "PLM"}, 
-                    sort=[("fecha", -1)]
-                )
-                if plm_result:
-                    resultado_plm = plm_result.get("resultado")
-        except:
-            pass
-        
-        resultado = gemelo.simular_biorreactor(1, [0, 48], {"k": 0.1, "temperatura": 37, "ph": 7.2, "oxigeno": 40}, secuencia, resultado_plm)
+            resultado_plm = _ultimos_resultados(secuencia_idx, ("PLM",)).get("PLM")
+        except Exception as e:
+            print(f"Error buscando resultado PLM: {e}")
+        
+        resultado = gemelo.simular_biorreactor(
+            1, [0, 48], {"k": 0.1, "temperatura": 37, "ph": 7.2, "oxigeno": 40}, secuencia, resultado_plm,
+            _caracteristicas(seq_doc, secuencia)
+        )
 
         experimento = {
             "tipo": "GemeloDigital",
-            "secuencia_idx": idx_or_id,
-            "resultado": resultado if isinstance(resultado, (dict, list)) else str(resultado),
+            "secuencia_idx": secuencia_idx,
+            "resultado": series_temporales.codificar_resultado(resultado, FORMATO_SERIES) if isinstance(resultado, (dict, list)) else str(resultado),
             "fecha": datetime.now().isoformat(),
             "estado": "completado"
         }
-        _insert(experimentos_col, experimentos_db, experimento)
+        _insert_experimento(experimento)
         return {"mensaje": "Simulación de gemelo digital ejecutada", "resultado": resultado}
         
     except HTTPException:
@@ -1084,8 +1921,19 @@ def simular_gemelo(idx_or_id: str = Form(...)):
 
 # 7. Listar experimentos
 @app.get("/experimentos/")
-def listar_experimentos():
-    return {"experimentos": _find_all(experimentos_col, experimentos_db)}
+async def listar_experimentos(limit: int = LIMITE_PAGINA_DEFECTO, cursor: Optional[str] = None, completo: bool = False, series: Optional[str] = None):
+    """Lista experimentos paginados, más recientes primero.
+    Sin `completo` se omiten las series temporales del resultado; con
+    `completo`, `series` elige su forma ("filas" o "columnas").
+    """
+    experimentos, siguiente = await _pagina(
+        experimentos_repo, limit, cursor,
+        excluir=() if completo else CAMPOS_PESADOS_EXPERIMENTOS,
+        descendente=True, diferidos=experimentos_diferidos
+    )
+    if completo:
+        experimentos = [_con_series(exp, series) for exp in experimentos]
+    return {"experimentos": experimentos, "siguiente_cursor": siguiente}
 
 # 8. Crear alerta
 @app.post("/alerta/")
@@ -1108,7 +1956,7 @@ def crear_alerta(
             "fecha": datetime.now().isoformat(),
             "resuelta": False
         }
-        alerta = _insert(alertas_col, alertas_db, alerta)
+        alerta = _insert_diferido(alertas_col, alertas_diferidas, alertas_db, alerta)
         # Asegurar que todos los valores son serializables
         for key, value in alerta.items():
             if hasattr(value, 'binary'):
@@ -1125,23 +1973,20 @@ def crear_alerta(
 def resolver_alerta(alerta_id: str):
     """Marca una alerta como resuelta"""
     try:
+        cambios = {"resuelta": True, "fecha_resolucion": datetime.now().isoformat()}
         # Buscar y actualizar alerta
-        if alertas_col is not None:
+        if _escribible(alertas_col):
             from bson import ObjectId
-            result = alertas_col.update_one(
-                {"_id": ObjectId(alerta_id)},
-                {"$set": {"resuelta": True, "fecha_resolucion": datetime.now().isoformat()}}
-            )
+            # Una alerta recién creada puede seguir en la cola de escritura diferida
+            if alertas_diferidas is not None and alertas_diferidas.actualizar(alerta_id, cambios):
+                return {"mensaje": "Alerta marcada como resuelta"}
+            result = alertas_col.update_one({"_id": ObjectId(alerta_id)}, {"$set": cambios})
             if result.matched_count == 0:
                 raise HTTPException(status_code=404, detail="Alerta no encontrada")
         else:
-            # Buscar en memoria
-            for alerta in alertas_db:
-                if str(alerta.get('id')) == alerta_id:
-                    alerta['resuelta'] = True
-                    alerta['fecha_resolucion'] = datetime.now().isoformat()
-                    break
-            else:
+            # Buscar en memoria por clave primaria
+            alerta = alertas_db.actualizar(alerta_id, cambios)
+            if alerta is None:
                 raise HTTPException(status_code=404, detail="Alerta no encontrada")
         
         return {"mensaje": "Alerta marcada como resuelta"}
@@ -1195,7 +2040,7 @@ def crear_alerta_sistema(tipo_evento: str = Form(...), descripcion: str = Form(.
             "automatica": True
         }
         
-        alerta = _insert(alertas_col, alertas_db, alerta)
+        alerta = _insert_diferido(alertas_col, alertas_diferidas, alertas_db, alerta)
         return {"mensaje": "Alerta del sistema creada", "alerta": alerta}
         
     except Exception as e:
@@ -1203,9 +2048,13 @@ def crear_alerta_sistema(tipo_evento: str = Form(...), descripcion: str = Form(.
 
 # 9. Listar alertas
 @app.get("/alertas/")
-def listar_alertas():
-    """Lista todas las alertas del sistema, incluyendo alertas automáticas de estado"""
-    alertas_existentes = _find_all(alertas_col, alertas_db)
+async def listar_alertas(limit: int = LIMITE_PAGINA_DEFECTO, cursor: Optional[str] = None):
+    """Lista las alertas del sistema paginadas, más recientes primero.
+    La primera página incluye además las alertas automáticas de estado.
+    """
+    alertas_existentes, siguiente = await _pagina(alertas_repo, limit, cursor, descendente=True, diferidos=alertas_diferidas)
+    if cursor:
+        return {"alertas": alertas_existentes, "siguiente_cursor": siguiente}
     
     # Agregar alertas automáticas de estado del sistema
     alertas_sistema = [
@@ -1250,46 +2099,90 @@ def listar_alertas():
     # Combinar alertas existentes con alertas de sistema
     todas_alertas = alertas_existentes + alertas_sistema
     
-    return {"alertas": todas_alertas}
+    return {"alertas": todas_alertas, "siguiente_cursor": siguiente}
 
 # 10. Generar reporte comparativo
 @app.get("/reportes/comparativos/")
-def generar_reportes_comparativos():
+async def generar_reportes_comparativos():
     """Genera reportes comparativos entre diferentes análisis y simulaciones"""
     try:
-        experimentos = _find_all(experimentos_col, experimentos_db)
-        secuencias = _find_all(secuencias_col, secuencias_db)
-        
-        # Agrupar experimentos por tipo
-        reportes_por_tipo = {}
-        for exp in experimentos:
-            tipo = exp.get("tipo", "Desconocido")
-            if tipo not in reportes_por_tipo:
-                reportes_por_tipo[tipo] = []
-            reportes_por_tipo[tipo].append(exp)
+        resumen = await _resumen_por_tipo()
+        total_experimentos = await experimentos_repo.contar()
+        total_secuencias = await secuencias_repo.contar()
         
         # Crear resumen de reportes
         reportes_generados = []
-        for tipo, exps in reportes_por_tipo.items():
-            fecha_ultima = max([exp.get("fecha", "") for exp in exps]) if exps else ""
+        for tipo, entrada in resumen.items():
             reportes_generados.append({
                 "tipo": tipo,
-                "cantidad": len(exps),
-                "fecha_ultima": fecha_ultima,
+                "cantidad": entrada["cantidad"],
+                "fecha_ultima": entrada["fecha_ultima"],
                 "estado": "Disponible",
-                "descripcion": f"Análisis de {tipo} con {len(exps)} resultados"
+                "descripcion": f"Análisis de {tipo} con {entrada['cantidad']} resultados"
             })
         
         return {
             "reportes": reportes_generados,
-            "total_experimentos": len(experimentos),
-            "total_secuencias": len(secuencias),
+            "total_experimentos": total_experimentos,
+            "total_secuencias": total_secuencias,
             "mensaje": f"Se han generado {len(reportes_generados)} tipos de reportes"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando reportes: {str(e)}")
 
 
+def _contar_tipo(tipo=None):
+    """Cantidad de experimentos, opcionalmente de un solo tipo"""
+    if not tipo:
+        return _contar(experimentos_col, experimentos_db)
+    if _activa(experimentos_col):
+        return experimentos_col.count_documents({"tipo": tipo})
+    return resumen_experimentos.get(tipo, {}).get("cantidad", 0)
+
+
+def _iter_experimentos_enriquecidos(tipo=None, lote=1000):
+    """Recorre los experimentos (filtrados por `tipo`) agregando `secuencia_nombre`.
+
+    Los nombres se resuelven por lotes: una consulta `$in` por cada `lote`
+    experimentos, con un dict como caché, en lugar de una consulta por fila.
+    """
+    nombres = {}
+
+    def resolver(pendientes):
+        faltantes = {ref for ref in pendientes if ref is not None and ref not in nombres}
+        if not faltantes:
+            return
+        if _activa(secuencias_col):
+            for seq in secuencias_col.find({"idx": {"$in": list(faltantes)}}, {"idx": 1, "nombre": 1}):
+                nombres[seq["idx"]] = seq.get("nombre", "")
+        else:
+            for ref in faltantes:
+                seq = secuencias_db.buscar_unico('idx', ref)
+                if seq is not None:
+                    nombres[ref] = seq.get("nombre", "")
+
+    def enriquecer(bloque):
+        resolver([exp.get('secuencia_idx') for exp in bloque])
+        for exp in bloque:
+            yield {**exp, 'secuencia_nombre': nombres.get(exp.get('secuencia_idx'), '')}
+
+    if _activa(experimentos_col):
+        cursor = experimentos_col.find({"tipo": tipo} if tipo else {}).batch_size(lote)
+        bloque = []
+        for d in cursor:
+            d['id'] = str(d.get('_id'))
+            d.pop('_id', None)
+            bloque.append(d)
+            if len(bloque) >= lote:
+                yield from enriquecer(bloque)
+                bloque = []
+        yield from enriquecer(bloque)
+    else:
+        experimentos = experimentos_db.buscar(tipo=tipo) if tipo else list(experimentos_db)
+        for i in range(0, len(experimentos), lote):
+            yield from enriquecer(experimentos[i:i + lote])
+
+
 # 10b. Descargar reporte comparativo como CSV
 @app.get("/reportes/comparativos/download")
 def download_reporte_comparativo(tipo: Optional[str] = None, format: Optional[str] = 'csv', token: Optional[str] = None, authorization: Optional[str] = Header(None)):
@@ -1306,24 +2199,7 @@ def download_reporte_comparativo(tipo: Optional[str] = None, format: Optional[st
     verificar_token(tok)
 
     try:
-        experimentos = _find_all(experimentos_col, experimentos_db)
-
-        # Filtrar por tipo si aplica
-        if tipo:
-            experimentos = [e for e in experimentos if e.get('tipo') == tipo]
-
-        # Enriquecer con nombre de secuencia si es posible
-        enriched = []
-        for exp in experimentos:
-            seq_idx = exp.get('secuencia_idx')
-            seq_nombre = ''
-            try:
-                seq_doc = _get_by_index(secuencias_col, secuencias_db, int(seq_idx)) if seq_idx is not None else None
-                if seq_doc:
-                    seq_nombre = seq_doc.get('nombre', '')
-            except Exception:
-                seq_nombre = ''
-            enriched.append({**exp, 'secuencia_nombre': seq_nombre})
+        enriched = _iter_experimentos_enriquecidos(tipo)
 
         if format == 'pdf':
             if not HAVE_REPORTLAB:
@@ -1333,7 +2209,7 @@ def download_reporte_comparativo(tipo: Optional[str] = None, format: Optional[st
             p = canvas.Canvas(buffer)
             y = 800
             p.setFont('Helvetica', 10)
-            p.drawString(30, y, f'Reporte comparativo - tipo: {tipo or "todos"} - {len(enriched)} items')
+            p.drawString(30, y, f'Reporte comparativo - tipo: {tipo or "todos"} - {_contar_tipo(tipo)} items')
             y -= 20
             headers = ['id', 'tipo', 'secuencia_idx', 'secuencia_nombre', 'fecha', 'estado']
             p.drawString(30, y, ' | '.join(headers))
@@ -1353,25 +2229,29 @@ def download_reporte_comparativo(tipo: Optional[str] = None, format: Optional[st
                 'Content-Disposition': f'attachment; filename="{filename}"'
             })
 
-        # Default CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        # Cabeceras
-        writer.writerow(['id', 'tipo', 'secuencia_idx', 'secuencia_nombre', 'fecha', 'estado', 'resultado'])
-        for exp in enriched:
-            writer.writerow([
-                exp.get('id', ''),
-                exp.get('tipo', ''),
-                exp.get('secuencia_idx', ''),
-                exp.get('secuencia_nombre', ''),
-                exp.get('fecha', ''),
-                exp.get('estado', ''),
-                str(exp.get('resultado', ''))
-            ])
+        # Default CSV, generado fila a fila
+        def filas_csv():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            # Cabeceras
+            writer.writerow(['id', 'tipo', 'secuencia_idx', 'secuencia_nombre', 'fecha', 'estado', 'resultado'])
+            for exp in enriched:
+                writer.writerow([
+                    exp.get('id', ''),
+                    exp.get('tipo', ''),
+                    exp.get('secuencia_idx', ''),
+                    exp.get('secuencia_nombre', ''),
+                    exp.get('fecha', ''),
+                    exp.get('estado', ''),
+                    str(series_temporales.expandir_resultado(exp.get('resultado', '')))
+                ])
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+            yield output.getvalue()
 
-        output.seek(0)
         filename = f"reportes_{tipo or 'todos'}.csv"
-        return StreamingResponse(io.StringIO(output.getvalue()), media_type='text/csv', headers={
+        return StreamingResponse(filas_csv(), media_type='text/csv', headers={
             'Content-Disposition': f'attachment; filename="{filename}"'
         })
     except HTTPException:
@@ -1380,9 +2260,35 @@ def download_reporte_comparativo(tipo: Optional[str] = None, format: Optional[st
         raise HTTPException(status_code=500, detail=f"Error generando archivo: {str(e)}")
 
 
-# 12. Descargar informe de un experimento individual
+def _con_series(exp, forma=None):
+    """Experimento con `datos_temporales` en la forma pedida y apto para JSON"""
+    if forma not in (None, "filas", "columnas"):
+        raise HTTPException(status_code=400, detail=f"Forma de series no soportada: {forma}")
+    return {**exp, "resultado": series_temporales.expandir_resultado(exp.get("resultado"), forma)}
+
+
+async def _obtener_experimento(exp_id):
+    """Experimento por id (índice de `_id` / clave primaria) o 404.
+    La cola diferida se consulta antes que la base (ver `_experimentos_pendientes`).
+    """
+    exp = experimentos_diferidos.obtener(exp_id) if experimentos_diferidos is not None else None
+    if not exp:
+        exp = await experimentos_repo.buscar_por_id(exp_id)
+    if not exp:
+        raise HTTPException(status_code=404, detail='Experimento no encontrado')
+    return exp
+
+
+# 12. Consultar un experimento individual (con resultado completo)
+@app.get("/experimentos/{exp_id}")
+async def consultar_experimento(exp_id: str, series: Optional[str] = None):
+    """Experimento completo; `series` = "filas" (forma legada) o "columnas" """
+    return _con_series(await _obtener_experimento(exp_id), series)
+
+
+# 12b. Descargar informe de un experimento individual
 @app.get("/experimentos/{exp_id}/download")
-def download_experimento_report(exp_id: str, format: Optional[str] = 'txt', token: Optional[str] = None, authorization: Optional[str] = Header(None)):
+async def download_experimento_report(exp_id: str, format: Optional[str] = 'txt', token: Optional[str] = None, authorization: Optional[str] = Header(None)):
     """Descarga un informe simple para un experimento por su id.
     - format: 'txt' o 'pdf'
     - requiere token (query o Authorization header)
@@ -1394,10 +2300,7 @@ def download_experimento_report(exp_id: str, format: Optional[str] = 'txt', toke
     verificar_token(tok)
 
     try:
-        exps = _find_all(experimentos_col, experimentos_db)
-        exp = next((e for e in exps if str(e.get('id')) == str(exp_id) or str(e.get('id')) == exp_id), None)
-        if not exp:
-            raise HTTPException(status_code=404, detail='Experimento no encontrado')
+        exp = _con_series(await _obtener_experimento(exp_id))
 
         # Build simple textual report
         report_lines = []
@@ -1513,9 +2416,9 @@ def generar_informe_sistema(formato: str = "json"):
                 "estado": "Operativo"
             },
             "estadisticas": {
-                "total_secuencias": len(_find_all(secuencias_col, secuencias_db)),
-                "total_experimentos": len(_find_all(experimentos_col, experimentos_db)),
-                "total_alertas": len(_find_all(alertas_col, alertas_db))
+                "total_secuencias": _contar(secuencias_col, secuencias_db),
+                "total_experimentos": _contar(experimentos_col, experimentos_db),
+                "total_alertas": _contar(alertas_col, alertas_db)
             },
             "componentes": {
                 "base_datos": "MongoDB Atlas - Conectado",
@@ -0,0 +1,175 @@
+# database/conexion.py
+"""
+Cliente MongoDB compartido y circuit breaker.
+
+Toda la aplicación usa un único `MongoClient` (y su pool de conexiones)
+creado por `get_client()`, con tamaño de pool y timeouts configurables en
+`database.config`. El `circuito` se alimenta de los heartbeats del monitor
+de pymongo y del resultado de las operaciones: cuando se abre, `disponible()`
+devuelve False al instante, las lecturas pasan al modo en memoria sin esperar
+el timeout de selección de servidor y las escrituras se rechazan con
+`BaseDatosNoDisponible` (los ids de memoria chocarían con los de MongoDB).
+"""
+import threading
+import time
+from typing import Optional
+
+from database.config import (
+    DB_URI, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_TIMEOUT_MS,
+    MONGO_CIRCUITO_FALLOS, MONGO_CIRCUITO_ESPERA_S
+)
+
+try:
+    from pymongo import MongoClient
+    from pymongo import monitoring
+    HAVE_PYMONGO = True
+except Exception:
+    MongoClient = None
+    monitoring = None
+    HAVE_PYMONGO = False
+
+
+class BaseDatosNoDisponible(Exception):
+    """MongoDB está configurado pero el circuito está abierto"""
+
+
+class CircuitoMongo:
+    """Circuit breaker de tres estados (cerrado, abierto, semiabierto).
+
+    Args:
+        umbral: fallos consecutivos que abren el circuito
+        espera: segundos que el circuito permanece abierto antes de dejar
+            pasar una operación de prueba
+    """
+
+    CERRADO = "cerrado"
+    ABIERTO = "abierto"
+    SEMIABIERTO = "semiabierto"
+
+    def __init__(self, umbral: int = 3, espera: float = 10.0):
+        self.umbral = max(1, umbral)
+        self.espera = espera
+        self._lock = threading.Lock()
+        self._estado = self.CERRADO
+        self._fallos = 0
+        self._abierto_desde = 0.0
+
+    @property
+    def estado(self) -> str:
+        return self._estado
+
+    def permite(self) -> bool:
+        """True si se puede usar MongoDB. Sin bloqueo en el caso habitual"""
+        if self._estado == self.CERRADO:
+            return True
+        with self._lock:
+            if self._estado == self.ABIERTO and time.monotonic() - self._abierto_desde >= self.espera:
+                # Una única operación de prueba; el resto sigue en modo degradado
+                self._estado = self.SEMIABIERTO
+                return True
+            return self._estado == self.CERRADO
+
+    def registrar_exito(self):
+        if self._estado == self.CERRADO and not self._fallos:
+            return
+        with self._lock:
+            if self._estado != self.CERRADO:
+                print("✅ MongoDB disponible nuevamente, circuito cerrado")
+            self._estado = self.CERRADO
+            self._fallos = 0
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            if self._estado == self.SEMIABIERTO or self._fallos >= self.umbral:
+                self._abrir()
+
+    def abrir(self):
+        """Abre el circuito sin esperar al umbral (servidor confirmado caído)"""
+        with self._lock:
+            self._abrir()
+
+    def _abrir(self):
+        if self._estado != self.ABIERTO:
+            print(f"⚠️ MongoDB no disponible, circuito abierto ({self.espera:.0f}s): usando memoria")
+        self._estado = self.ABIERTO
+        self._abierto_desde = time.monotonic()
+
+
+circuito = CircuitoMongo(MONGO_CIRCUITO_FALLOS, MONGO_CIRCUITO_ESPERA_S)
+
+
+def disponible() -> bool:
+    """True si hay cliente y el circuito permite usar MongoDB"""
+    return _client is not None and circuito.permite()
+
+
+if HAVE_PYMONGO:
+    class _MonitorHeartbeat(monitoring.ServerHeartbeatListener):
+        """Traslada los heartbeats del monitor de pymongo al circuito"""
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            circuito.registrar_exito()
+
+        def failed(self, event):
+            circuito.abrir()
+
+    class _MonitorComandos(monitoring.CommandListener):
+        """Cuenta como fallo del circuito los comandos cortados por la red; un
+        comando exitoso (p. ej. la operación de prueba en semiabierto) lo cierra"""
+
+        ERRORES_RED = ("AutoReconnect", "NetworkTimeout", "ConnectionFailure")
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            circuito.registrar_exito()
+
+        def failed(self, event):
+            failure = event.failure if isinstance(event.failure, dict) else {}
+            if failure.get("errtype") in self.ERRORES_RED:
+                circuito.registrar_fallo()
+
+
+def opciones_cliente() -> dict:
+    """Opciones de pool y timeouts del cliente compartido"""
+    opciones = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": min(MONGO_MIN_POOL_SIZE, MONGO_MAX_POOL_SIZE),
+        "serverSelectionTimeoutMS": MONGO_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_TIMEOUT_MS,
+    }
+    if HAVE_PYMONGO:
+        opciones["event_listeners"] = [_MonitorHeartbeat(), _MonitorComandos()]
+    return opciones
+
+
+_client: Optional["MongoClient"] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> "MongoClient":
+    """Devuelve el `MongoClient` compartido, creándolo la primera vez"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(DB_URI, **opciones_cliente())
+    return _client
+
+
+def calentar(client) -> bool:
+    """Verifica la conexión con un ping; pymongo completa el pool hasta
+    `minPoolSize` en segundo plano. Abre el circuito si el servidor no responde.
+    """
+    try:
+        client.admin.command('ping')
+        circuito.registrar_exito()
+        return True
+    except Exception:
+        circuito.abrir()
+        raise
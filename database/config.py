@@ -11,6 +11,13 @@ load_dotenv(dotenv_path=env_path, override=True)
 DB_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME = os.getenv("DB_NAME", os.getenv("MONGO_DB", "tesis_db"))
 
+# Pool de conexiones y circuit breaker (ver database/conexion.py)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "2000"))
+MONGO_CIRCUITO_FALLOS = int(os.getenv("MONGO_CIRCUITO_FALLOS", "3"))
+MONGO_CIRCUITO_ESPERA_S = float(os.getenv("MONGO_CIRCUITO_ESPERA_S", "10"))
+
 # Logging
 print(f"[DB CONFIG] Connecting to MongoDB at: {DB_URI.split('@')[0] if '@' in DB_URI else DB_URI[:50]}...")
 print(f"[DB CONFIG] Using database: {DB_NAME}")
\ No newline at end of file
@@ -0,0 +1,237 @@
+# database/escritura_diferida.py
+"""
+Escritura diferida (write-behind) de documentos en MongoDB.
+
+`EscrituraDiferida` encola los documentos nuevos de una colección y un hilo
+en segundo plano los persiste en lotes con `insert_many`, de modo que las
+ráfagas de inserciones no pagan un viaje de ida y vuelta por documento.
+
+- El `_id` se asigna al encolar, así que el llamador ya conoce el `id`.
+- La cola es acotada: si está llena, `encolar` espera hasta `espera` segundos
+  y, si sigue llena, inserta el documento directamente (contrapresión).
+- Los documentos encolados siguen visibles vía `pendientes()`/`obtener()`/
+  `buscar()` hasta que se confirman en la base (lectura de las propias
+  escrituras). Quien combine ambas fuentes lee primero los pendientes y
+  después la base: un documento confirmado entre ambas lecturas aparece
+  dos veces, pero nunca ninguna.
+- `actualizar()` modifica un documento que sigue en la cola; un cambio que
+  llega mientras su lote se está insertando se aplica después con `$set`.
+- Un lote que falla se reintenta hasta `reintentos` veces con espera
+  exponencial; después se descarta y se cuenta en `descartados`.
+- `cerrar()` vacía la cola antes de detener el hilo.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from database.repositorio import documento_api, proyectar
+
+try:
+    from bson import ObjectId
+except Exception:
+    ObjectId = None
+
+
+class EscrituraDiferida:
+    """Cola de inserciones de una colección persistida en lotes.
+
+    Args:
+        coleccion: colección pymongo de destino
+        lote: máximo de documentos por `insert_many`
+        capacidad: tamaño máximo de la cola
+        intervalo: segundos que el hilo espera para juntar un lote
+        espera: segundos que `encolar` bloquea con la cola llena
+        reintentos: reintentos de un lote fallido antes de descartarlo
+    """
+
+    ESPERA_MAXIMA = 30.0
+
+    def __init__(self, coleccion, lote: int = 500, capacidad: int = 10000,
+                 intervalo: float = 0.2, espera: float = 1.0, reintentos: int = 5):
+        self.coleccion = coleccion
+        self.lote = max(1, lote)
+        self.intervalo = intervalo
+        self.espera = espera
+        self.reintentos = max(0, reintentos)
+        self.descartados = 0
+        self._cola: "queue.Queue[dict]" = queue.Queue(maxsize=max(1, capacidad))
+        self._pendientes: "OrderedDict[str, dict]" = OrderedDict()
+        # Cambios de `actualizar()` que el lote en curso puede no incluir
+        self._cambios: "dict[str, dict]" = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(
+            target=self._ciclo, name=f"escritura-{coleccion.name}", daemon=True
+        )
+        self._hilo.start()
+
+    # Productor
+
+    def encolar(self, record: dict) -> dict:
+        """Encola `record` para insertarlo y devuelve una copia con `id`"""
+        record.setdefault('_id', ObjectId())
+        clave = str(record['_id'])
+        with self._lock:
+            self._pendientes[clave] = record
+        try:
+            self._cola.put(record, timeout=self.espera)
+        except queue.Full:
+            # Contrapresión: el llamador paga la inserción
+            self.coleccion.insert_one(record)
+            with self._lock:
+                self._pendientes.pop(clave, None)
+        return documento_api(dict(record))
+
+    # Lectura de escrituras propias
+
+    def pendientes(self) -> List[dict]:
+        """Documentos encolados que aún no se confirmaron, en orden de llegada"""
+        with self._lock:
+            return list(self._pendientes.values())
+
+    def obtener(self, id_doc) -> Optional[dict]:
+        """Documento pendiente por id, o None"""
+        with self._lock:
+            doc = self._pendientes.get(str(id_doc))
+        return documento_api(dict(doc)) if doc is not None else None
+
+    def actualizar(self, id_doc, cambios: dict) -> bool:
+        """Aplica `cambios` a un documento pendiente; False si ya no está en la cola"""
+        clave = str(id_doc)
+        with self._lock:
+            doc = self._pendientes.get(clave)
+            if doc is None:
+                return False
+            # Copia nueva: el hilo puede estar serializando la anterior
+            self._pendientes[clave] = {**doc, **cambios}
+            self._cambios.setdefault(clave, {}).update(cambios)
+        return True
+
+    def buscar(self, **filtros) -> List[dict]:
+        """Pendientes cuyos campos igualan `filtros` (una lista o conjunto
+        equivale a `$in`), como documentos crudos con `_id`"""
+        def coincide(doc):
+            for campo, valor in filtros.items():
+                if isinstance(valor, (list, tuple, set, frozenset)):
+                    if doc.get(campo) not in valor:
+                        return False
+                elif doc.get(campo) != valor:
+                    return False
+            return True
+        return [dict(d) for d in self.pendientes() if coincide(d)]
+
+    def superponer(self, docs: List[dict], siguiente: Optional[str], limit: int,
+                   cursor: Optional[str] = None, excluir=(),
+                   pendientes: Optional[List[dict]] = None) -> Tuple[List[dict], Optional[str]]:
+        """Agrega a una página descendente por `_id` los pendientes de su rango.
+        `pendientes` es la instantánea tomada antes de consultar la base.
+        """
+        if pendientes is None:
+            pendientes = self.pendientes()
+        if not pendientes or ObjectId is None:
+            return docs, siguiente
+        techo = ObjectId(cursor) if cursor else None
+        piso = ObjectId(siguiente) if siguiente else None
+        vistos = {d.get('id') for d in docs}
+        extra = [
+            proyectar(documento_api(dict(d)), excluir) for d in pendientes
+            if str(d['_id']) not in vistos
+            and (techo is None or d['_id'] < techo)
+            and (piso is None or d['_id'] > piso)
+        ]
+        if not extra:
+            return docs, siguiente
+        combinados = sorted(docs + extra, key=lambda d: ObjectId(d['id']), reverse=True)
+        if len(combinados) > limit:
+            return combinados[:limit], combinados[limit - 1]['id']
+        return combinados, siguiente
+
+    # Consumidor
+
+    def _tomar_lote(self, bloquear: bool) -> List[dict]:
+        docs = []
+        try:
+            docs.append(self._cola.get(timeout=self.intervalo) if bloquear else self._cola.get_nowait())
+            while len(docs) < self.lote:
+                docs.append(self._cola.get_nowait())
+        except queue.Empty:
+            pass
+        return docs
+
+    def _persistir(self, docs: List[dict]) -> bool:
+        with self._lock:
+            # Versión vigente de cada documento; sus cambios quedan incluidos
+            docs[:] = [self._pendientes.get(str(d['_id']), d) for d in docs]
+            for d in docs:
+                self._cambios.pop(str(d['_id']), None)
+        try:
+            self.coleccion.insert_many(docs, ordered=False)
+        except Exception as e:
+            # Los ya existentes (reintento parcial) cuentan como persistidos
+            detalles = getattr(e, 'details', None) or {}
+            errores = detalles.get('writeErrors') or []
+            if not errores or any(err.get('code') != 11000 for err in errores):
+                print(f"⚠️ Error persistiendo {len(docs)} documentos en {self.coleccion.name}: {str(e)[:120]}")
+                return False
+        with self._lock:
+            tardios = []
+            for d in docs:
+                self._pendientes.pop(str(d['_id']), None)
+                cambios = self._cambios.pop(str(d['_id']), None)
+                if cambios:
+                    tardios.append((d['_id'], cambios))
+        for _id, cambios in tardios:
+            try:
+                self.coleccion.update_one({'_id': _id}, {'$set': cambios})
+            except Exception as e:
+                print(f"⚠️ Error actualizando {_id} en {self.coleccion.name}: {str(e)[:120]}")
+        return True
+
+    def _descartar(self, docs: List[dict]):
+        print(f"⚠️ Se descartan {len(docs)} documentos de {self.coleccion.name} tras {self.reintentos} reintentos")
+        with self._lock:
+            for d in docs:
+                self._pendientes.pop(str(d['_id']), None)
+                self._cambios.pop(str(d['_id']), None)
+            self.descartados += len(docs)
+
+    def _ciclo(self):
+        reintento: List[dict] = []
+        intentos = 0
+        while not self._detener.is_set():
+            docs = reintento or self._tomar_lote(bloquear=True)
+            if docs and not self._persistir(docs):
+                intentos += 1
+                if intentos > self.reintentos:
+                    self._descartar(docs)
+                    reintento, intentos = [], 0
+                    continue
+                reintento = docs
+                # Espera exponencial; `cerrar()` la interrumpe
+                self._detener.wait(min(max(self.intervalo, 1.0) * 2 ** (intentos - 1), self.ESPERA_MAXIMA))
+            else:
+                reintento, intentos = [], 0
+        # Vaciado final
+        docs = reintento or self._tomar_lote(bloquear=False)
+        while docs:
+            if not self._persistir(docs):
+                print(f"⚠️ {len(docs) + self._cola.qsize()} documentos de {self.coleccion.name} sin persistir al cerrar")
+                return
+            docs = self._tomar_lote(bloquear=False)
+
+    def vaciar(self, timeout: float = 10.0) -> bool:
+        """Espera hasta que no queden documentos pendientes"""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            with self._lock:
+                if not self._pendientes:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def cerrar(self, timeout: float = 10.0):
+        """Persiste lo encolado y detiene el hilo"""
+        self._detener.set()
+        self._hilo.join(timeout)
@@ -1,7 +1,8 @@
 # database/init_db.py
-from pymongo import MongoClient
+from pymongo import ReturnDocument, UpdateOne
 from pymongo.errors import ServerSelectionTimeoutError
 from database.config import DB_URI, DB_NAME
+from database import conexion
 
 def init_db():
     """
@@ -11,9 +12,9 @@ def init_db():
         Base de datos MongoDB o None si falla
     """
     try:
-        client = MongoClient(DB_URI, serverSelectionTimeoutMS=5000)
-        # Verificar conexión
-        client.admin.command('ping')
+        client = conexion.get_client()
+        # Verificar conexión y precalentar el pool
+        conexion.calentar(client)
         
         db = client[DB_NAME]
         print(f"✅ Conectado a MongoDB: {DB_NAME}")
@@ -42,10 +43,21 @@ def create_indexes(db):
         # Índices para secuencias
         db.secuencias.create_index("nombre", unique=False)
         db.secuencias.create_index("fecha_carga")
+        # Número secuencial para búsquedas posicionales (solo docs que ya lo tienen)
+        db.secuencias.create_index(
+            "idx", unique=True,
+            partialFilterExpression={"idx": {"$exists": True}}
+        )
         
         # Índices para experimentos
-        db.experimentos.create_index("secuencia_idx")
+        # Último resultado por secuencia y tipo (cubre también búsquedas por secuencia_idx)
+        db.experimentos.create_index([("secuencia_idx", 1), ("tipo", 1), ("fecha", -1)])
         db.experimentos.create_index("fecha")
+        # Filtros y exportaciones por tipo
+        db.experimentos.create_index([("tipo", 1), ("fecha", -1)])
+        
+        # Reutilización de análisis PLM por contenido de la secuencia
+        db.experimentos.create_index([("hash_secuencia", 1), ("modelo", 1), ("fecha", -1)])
         
         # Índices para alertas
         db.alertas.create_index("usuario")
@@ -53,4 +65,174 @@ def create_indexes(db):
         
         print("✅ Índices creados correctamente")
     except Exception as e:
-        print(f"⚠️ Error creando índices: {str(e)}")
\ No newline at end of file
+        print(f"⚠️ Error creando índices: {str(e)}")
+
+def siguiente_secuencial(db, nombre, cantidad=1):
+    """Reserva `cantidad` números secuenciales para la colección `nombre`.
+
+    Usa un contador atómico en la colección `contadores`, por lo que es seguro
+    con múltiples workers. Devuelve el primer número reservado (base 0).
+    """
+    contador = db.contadores.find_one_and_update(
+        {"_id": nombre},
+        {"$inc": {"valor": cantidad}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return contador["valor"] - cantidad
+
+def asignar_indices_secuenciales(db, nombre="secuencias"):
+    """Asigna `idx` a los documentos que no lo tienen, en orden de inserción"""
+    if db is None:
+        return 0
+
+    try:
+        col = db[nombre]
+        pendientes = [d["_id"] for d in col.find({"idx": {"$exists": False}}, {"_id": 1}).sort("_id", 1)]
+        if not pendientes:
+            return 0
+
+        inicio = siguiente_secuencial(db, nombre, len(pendientes))
+        col.bulk_write([
+            UpdateOne({"_id": _id}, {"$set": {"idx": inicio + i}})
+            for i, _id in enumerate(pendientes)
+        ], ordered=False)
+        print(f"✅ {len(pendientes)} documentos de {nombre} numerados desde {inicio}")
+        return len(pendientes)
+    except Exception as e:
+        print(f"⚠️ Error asignando índices secuenciales: {str(e)}")
+        return 0
+
+def normalizar_secuencia_idx(db):
+    """Convierte `secuencia_idx` heredados (str numérico u ObjectId en texto)
+    al número `idx` (int) de la secuencia referenciada.
+    """
+    if db is None:
+        return 0
+
+    try:
+        # Strings numéricos -> int
+        res = db.experimentos.update_many(
+            {"secuencia_idx": {"$type": "string", "$regex": "^[0-9]+$"}},
+            [{"$set": {"secuencia_idx": {"$toInt": "$secuencia_idx"}}}]
+        )
+        total = res.modified_count
+
+        # Ids de documento -> idx de la secuencia
+        from bson import ObjectId
+        for ref in db.experimentos.distinct("secuencia_idx", {"secuencia_idx": {"$type": "string"}}):
+            if not ObjectId.is_valid(ref):
+                continue
+            seq = db.secuencias.find_one({"_id": ObjectId(ref)}, {"idx": 1})
+            if seq and seq.get("idx") is not None:
+                total += db.experimentos.update_many(
+                    {"secuencia_idx": ref}, {"$set": {"secuencia_idx": seq["idx"]}}
+                ).modified_count
+
+        if total:
+            print(f"✅ {total} experimentos con secuencia_idx normalizado")
+        return total
+    except Exception as e:
+        print(f"⚠️ Error normalizando secuencia_idx: {str(e)}")
+        return 0
+
+def marcar_duplicadas(db):
+    """Deja `hash_secuencia` solo en la secuencia más antigua de cada contenido.
+
+    Las repetidas (cargadas antes de que existiera el índice único) conservan
+    su documento, su `idx` y sus experimentos, pero pierden el hash y reciben
+    `duplicada_de` (el `_id` de la original), así quedan fuera del índice.
+    """
+    total = 0
+    grupos = db.secuencias.aggregate([
+        {"$match": {"hash_secuencia": {"$exists": True}}},
+        {"$group": {"_id": "$hash_secuencia", "ids": {"$push": "$_id"}, "cantidad": {"$sum": 1}}},
+        {"$match": {"cantidad": {"$gt": 1}}}
+    ])
+    for grupo in grupos:
+        original, *repetidas = sorted(grupo["ids"])
+        total += db.secuencias.update_many(
+            {"_id": {"$in": repetidas}},
+            {"$unset": {"hash_secuencia": ""}, "$set": {"duplicada_de": original}}
+        ).modified_count
+    return total
+
+def asignar_hashes_secuencias(db):
+    """Calcula `hash_secuencia` (SHA-256 de los residuos) donde falte, marca
+    las secuencias repetidas (`marcar_duplicadas`) y crea el índice único que
+    deduplica las cargas. Si el índice no se puede crear, lanza la excepción:
+    sin él las cargas concurrentes volverían a duplicar secuencias.
+    """
+    if db is None:
+        return 0
+
+    from modules.biopython_utils import sequence_hash
+
+    total = 0
+    try:
+        lote = []
+        filtro = {"hash_secuencia": {"$exists": False}, "duplicada_de": {"$exists": False}}
+        for d in db.secuencias.find(filtro, {"secuencia": 1}):
+            lote.append(UpdateOne({"_id": d["_id"]}, {"$set": {"hash_secuencia": sequence_hash(d.get("secuencia") or "")}}))
+            if len(lote) >= 1000:
+                total += db.secuencias.bulk_write(lote, ordered=False).modified_count
+                lote = []
+        if lote:
+            total += db.secuencias.bulk_write(lote, ordered=False).modified_count
+        if total:
+            print(f"✅ {total} secuencias con hash de contenido asignado")
+    except Exception as e:
+        print(f"⚠️ Error asignando hashes de secuencias: {str(e)}")
+
+    duplicadas = marcar_duplicadas(db)
+    if duplicadas:
+        print(f"⚠️ {duplicadas} secuencias repetidas marcadas con `duplicada_de` (fuera del índice único)")
+    # Versiones anteriores creaban un índice no único con el mismo nombre
+    existente = db.secuencias.index_information().get("hash_secuencia_1")
+    if existente is not None and not existente.get("unique"):
+        db.secuencias.drop_index("hash_secuencia_1")
+    db.secuencias.create_index(
+        "hash_secuencia", unique=True,
+        partialFilterExpression={"hash_secuencia": {"$exists": True}}
+    )
+    return total
+
+
+def asignar_caracteristicas(db):
+    """Calcula el vector `caracteristicas` de las secuencias cargadas antes de
+    que existiera o con una versión anterior del cálculo. Las de referencia
+    se leen del FASTA indexado.
+    """
+    if db is None:
+        return 0
+
+    from modules.almacen_fasta import AlmacenFasta
+    from modules.caracteristicas import VERSION, calcular
+
+    total = 0
+    almacen = AlmacenFasta()
+    try:
+        lote = []
+        filtro = {
+            "caracteristicas.version": {"$ne": VERSION},
+            "$or": [{"secuencia": {"$exists": True}}, {"almacen": {"$exists": True}}]
+        }
+        for d in db.secuencias.find(filtro, {"secuencia": 1, "almacen": 1}):
+            try:
+                residuos = d.get("secuencia") if "secuencia" in d else almacen.leer(d["almacen"])
+            except OSError:
+                # Archivo de referencia movido o borrado: se reintenta en el próximo arranque
+                continue
+            lote.append(UpdateOne({"_id": d["_id"]}, {"$set": {"caracteristicas": calcular((residuos or "").upper())}}))
+            if len(lote) >= 1000:
+                total += db.secuencias.bulk_write(lote, ordered=False).modified_count
+                lote = []
+        if lote:
+            total += db.secuencias.bulk_write(lote, ordered=False).modified_count
+        if total:
+            print(f"✅ {total} secuencias con vector de características asignado")
+    except Exception as e:
+        print(f"⚠️ Error asignando características de secuencias: {str(e)}")
+    finally:
+        almacen.cerrar()
+    return total
@@ -0,0 +1,172 @@
+# database/memoria.py
+"""
+Almacenamiento en memoria usado cuando MongoDB no está disponible.
+
+`AlmacenMemoria` guarda los documentos en un dict por clave primaria (`id`)
+y mantiene índices secundarios por campo, de modo que las búsquedas del modo
+degradado cuestan lo mismo que con la base de datos. Todas las operaciones
+se hacen bajo un lock, porque los endpoints síncronos corren en paralelo en
+el pool de hilos de Starlette.
+"""
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class ClaveDuplicada(Exception):
+    """Se intentó insertar un valor repetido en un campo con índice único"""
+
+
+class AlmacenMemoria:
+    """Colección en memoria con clave primaria, índices y asignación atómica de ids.
+
+    Args:
+        indices: campos con índice secundario (valor -> documentos)
+        unicos: campos con índice único (valor -> documento)
+
+    Los ids son enteros monotónicos, por lo que el orden de `id` coincide con
+    el orden de inserción (y de creación): la paginación por clave y "lo más
+    reciente" no necesitan un índice aparte sobre `fecha`.
+    """
+
+    def __init__(self, indices: Iterable[str] = (), unicos: Iterable[str] = ()):
+        self._lock = threading.RLock()
+        self._docs: Dict[int, dict] = {}
+        self._orden: List[int] = []
+        self._siguiente = 0
+        self._indices: Dict[str, Dict[Any, Dict[int, dict]]] = {campo: {} for campo in indices}
+        self._unicos: Dict[str, Dict[Any, dict]] = {campo: {} for campo in unicos}
+
+    # Mantenimiento de índices
+
+    def _indexar(self, doc: dict):
+        for campo, indice in self._indices.items():
+            if campo in doc:
+                indice.setdefault(doc[campo], {})[doc['id']] = doc
+        for campo, indice in self._unicos.items():
+            if doc.get(campo) is not None:
+                indice[doc[campo]] = doc
+
+    def _desindexar(self, doc: dict):
+        for campo, indice in self._indices.items():
+            if campo in doc:
+                grupo = indice.get(doc[campo], {})
+                grupo.pop(doc['id'], None)
+                if not grupo:
+                    indice.pop(doc[campo], None)
+        for campo, indice in self._unicos.items():
+            if indice.get(doc.get(campo)) is doc:
+                del indice[doc[campo]]
+
+    @staticmethod
+    def _clave(id_doc) -> Optional[int]:
+        try:
+            return int(id_doc)
+        except (TypeError, ValueError):
+            return None
+
+    # Escritura
+
+    def insertar(self, record: dict, secuencial: bool = False) -> dict:
+        """Asigna `id` (y `idx` si `secuencial`) de forma atómica e inserta.
+        Lanza `ClaveDuplicada` si viola un índice único.
+        """
+        with self._lock:
+            for campo, indice in self._unicos.items():
+                if record.get(campo) is not None and record[campo] in indice:
+                    raise ClaveDuplicada(f"{campo} duplicado: {record[campo]}")
+            record['id'] = self._siguiente
+            self._siguiente += 1
+            if secuencial:
+                record['idx'] = record['id']
+            self._docs[record['id']] = record
+            self._orden.append(record['id'])
+            self._indexar(record)
+            return record
+
+    def extend(self, records: Iterable[dict]):
+        """Carga documentos respetando su `id` entero si lo traen (datos de ejemplo)"""
+        with self._lock:
+            for record in records:
+                clave = self._clave(record.get('id'))
+                if clave is None or clave in self._docs:
+                    self.insertar(record)
+                    continue
+                record['id'] = clave
+                self._siguiente = max(self._siguiente, clave + 1)
+                self._docs[clave] = record
+                bisect.insort(self._orden, clave)
+                self._indexar(record)
+
+    def append(self, record: dict):
+        self.insertar(record)
+
+    def actualizar(self, id_doc, cambios: dict) -> Optional[dict]:
+        """Aplica `cambios` al documento y reindexa; None si no existe"""
+        with self._lock:
+            doc = self._docs.get(self._clave(id_doc))
+            if doc is None:
+                return None
+            self._desindexar(doc)
+            doc.update(cambios)
+            self._indexar(doc)
+            return doc
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._orden.clear()
+            self._siguiente = 0
+            for indice in list(self._indices.values()) + list(self._unicos.values()):
+                indice.clear()
+
+    # Lectura
+
+    def obtener(self, id_doc) -> Optional[dict]:
+        """Documento por clave primaria (acepta int o str numérico)"""
+        return self._docs.get(self._clave(id_doc))
+
+    def buscar_unico(self, campo: str, valor) -> Optional[dict]:
+        """Documento por un campo con índice único"""
+        return self._unicos[campo].get(valor)
+
+    def buscar(self, **filtros) -> List[dict]:
+        """Documentos que cumplen todos los filtros de igualdad, en orden de inserción.
+
+        Parte del grupo indexado más chico y filtra el resto de los campos.
+        """
+        with self._lock:
+            grupos = [self._indices[c].get(v, {}) for c, v in filtros.items() if c in self._indices]
+            if grupos:
+                candidatos = sorted(min(grupos, key=len).values(), key=lambda d: d['id'])
+            else:
+                candidatos = [self._docs[i] for i in self._orden]
+            return [d for d in candidatos if all(d.get(c) == v for c, v in filtros.items())]
+
+    def mas_reciente(self, **filtros) -> Optional[dict]:
+        """Documento con la `fecha` más reciente entre los que cumplen los filtros"""
+        docs = self.buscar(**filtros)
+        if not docs:
+            return None
+        return max(docs, key=lambda d: (d.get('fecha') or '', d['id']))
+
+    def pagina(self, limit: int, cursor=None, descendente: bool = False) -> List[dict]:
+        """Hasta `limit` documentos posteriores a `cursor` (keyset sobre `id`)"""
+        ultimo = self._clave(cursor) if cursor not in (None, '') else None
+        if cursor not in (None, '') and ultimo is None:
+            raise ValueError("Cursor inválido")
+        with self._lock:
+            if descendente:
+                fin = len(self._orden) if ultimo is None else bisect.bisect_left(self._orden, ultimo)
+                ids = self._orden[max(0, fin - limit):fin][::-1]
+            else:
+                inicio = 0 if ultimo is None else bisect.bisect_right(self._orden, ultimo)
+                ids = self._orden[inicio:inicio + limit]
+            return [self._docs[i] for i in ids]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __iter__(self):
+        with self._lock:
+            return iter([self._docs[i] for i in self._orden])
@@ -0,0 +1,215 @@
+# database/repositorio.py
+"""
+Capa de acceso a datos asíncrona para los endpoints de la API.
+
+Cada `Repositorio` envuelve una colección de MongoDB o, si no hay base de
+datos, un `AlmacenMemoria`, con la misma semántica que los helpers
+síncronos de `backend/main.py`. Las operaciones de pymongo (el cliente
+compartido de `database.conexion`, o un sustituto tipo mongomock) se
+ejecutan en el pool de hilos para no bloquear el event loop.
+
+Con el circuito de MongoDB abierto las lecturas se responden desde memoria,
+pero las escrituras lanzan `BaseDatosNoDisponible`.
+"""
+import asyncio
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from database.conexion import BaseDatosNoDisponible, circuito
+from database.init_db import siguiente_secuencial
+from database.memoria import AlmacenMemoria, ClaveDuplicada
+
+try:
+    from bson import ObjectId
+except Exception:
+    ObjectId = None
+
+try:
+    from pymongo.errors import BulkWriteError, DuplicateKeyError
+except Exception:
+    BulkWriteError = DuplicateKeyError = ClaveDuplicada
+
+
+def documento_api(doc: dict) -> dict:
+    """Reemplaza `_id` por `id` (str) para serialización JSON"""
+    doc['id'] = str(doc.get('_id'))
+    doc.pop('_id', None)
+    return doc
+
+
+def proyectar(doc: dict, excluir) -> dict:
+    """Copia superficial de `doc` sin los campos (con notación de punto) de `excluir`"""
+    if not excluir:
+        return doc
+    copia = dict(doc)
+    for campo in excluir:
+        padre, _, hijo = campo.partition('.')
+        if not hijo:
+            copia.pop(padre, None)
+        elif isinstance(copia.get(padre), dict):
+            copia[padre] = {k: v for k, v in copia[padre].items() if k != hijo}
+    return copia
+
+
+def pagina_memoria(almacen, limit: int, cursor: Optional[str] = None,
+                   excluir=(), descendente: bool = False) -> List[dict]:
+    """Hasta `limit + 1` documentos posteriores al cursor en un `AlmacenMemoria`"""
+    return [proyectar(d, excluir) for d in almacen.pagina(limit + 1, cursor, descendente)]
+
+
+def filtro_cursor(cursor: Optional[str], descendente: bool = False) -> dict:
+    """Filtro de MongoDB para la página posterior a `cursor` (keyset sobre `_id`)"""
+    if not cursor:
+        return {}
+    try:
+        ultimo = ObjectId(str(cursor)) if ObjectId else str(cursor)
+    except Exception:
+        raise ValueError("Cursor inválido")
+    return {'_id': {'$lt' if descendente else '$gt': ultimo}}
+
+
+class Repositorio:
+    """Acceso asíncrono a una colección con respaldo en memoria.
+
+    Args:
+        coleccion: colección pymongo (o mongomock), o None
+        memoria: `AlmacenMemoria` usado cuando `coleccion` es None
+        secuencial: asignar número secuencial `idx` a cada documento insertado
+    """
+
+    def __init__(self, coleccion=None, memoria: Optional[AlmacenMemoria] = None,
+                 secuencial: bool = False):
+        self.coleccion = coleccion
+        self.memoria = memoria if memoria is not None else AlmacenMemoria()
+        self.secuencial = secuencial
+
+    @property
+    def en_memoria(self) -> bool:
+        # Con el circuito de MongoDB abierto se responde desde memoria
+        return self.coleccion is None or not circuito.permite()
+
+    def _escribe_en_memoria(self) -> bool:
+        """True sin base de datos. Con MongoDB caído falla en lugar de escribir
+        en memoria: esos documentos no se reconciliarían al volver la conexión.
+        """
+        if self.coleccion is None:
+            return True
+        if not circuito.permite():
+            raise BaseDatosNoDisponible("MongoDB no disponible")
+        return False
+
+    async def _en_hilo(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(fn, *args, **kwargs))
+
+    # Primitivas
+
+    async def _find(self, query: dict, proyeccion: Optional[dict], orden: List[Tuple[str, int]],
+                    limit: int) -> List[dict]:
+        cursor = self.coleccion.find(query, proyeccion).sort(orden).limit(limit)
+        return await self._en_hilo(list, cursor)
+
+    async def _llamar(self, coleccion, metodo: str, *args, **kwargs):
+        return await self._en_hilo(getattr(coleccion, metodo), *args, **kwargs)
+
+    # Operaciones
+
+    async def insertar(self, record: dict) -> dict:
+        """Inserta un documento; si el repositorio es `secuencial` asigna `idx`.
+        Lanza `ClaveDuplicada` si viola un índice único en cualquier backend.
+        """
+        if self._escribe_en_memoria():
+            return self.memoria.insertar(record, self.secuencial)
+        if self.secuencial:
+            record['idx'] = await self._en_hilo(siguiente_secuencial, self.coleccion.database, self.coleccion.name)
+        try:
+            res = await self._llamar(self.coleccion, 'insert_one', record)
+        except DuplicateKeyError as e:
+            raise ClaveDuplicada(str(e))
+        record['id'] = str(res.inserted_id)
+        record.pop('_id', None)
+        return record
+
+    async def insertar_muchos(self, records: List[dict]) -> Tuple[List[dict], int]:
+        """Inserta un lote con un único `insert_many` (no ordenado).
+
+        Los documentos que violan un índice único se omiten. Devuelve los
+        registros insertados y la cantidad de duplicados.
+        """
+        if not records:
+            return [], 0
+        if self._escribe_en_memoria():
+            insertados = []
+            for record in records:
+                try:
+                    insertados.append(self.memoria.insertar(record, self.secuencial))
+                except ClaveDuplicada:
+                    pass
+            return insertados, len(records) - len(insertados)
+        if self.secuencial:
+            # Reserva un rango del contador para todo el lote
+            inicio = await self._en_hilo(
+                siguiente_secuencial, self.coleccion.database, self.coleccion.name, len(records)
+            )
+            for i, record in enumerate(records):
+                record['idx'] = inicio + i
+        fallidos = set()
+        try:
+            await self._llamar(self.coleccion, 'insert_many', records, ordered=False)
+        except BulkWriteError as e:
+            errores = (getattr(e, 'details', None) or {}).get('writeErrors', [])
+            if not errores or any(err.get('code') != 11000 for err in errores):
+                raise
+            fallidos = {err['index'] for err in errores}
+        insertados = [documento_api(r) for i, r in enumerate(records) if i not in fallidos]
+        return insertados, len(fallidos)
+
+    async def buscar_pagina(self, limit: int, cursor: Optional[str] = None, excluir=(),
+                            descendente: bool = False) -> Tuple[List[dict], Optional[str]]:
+        """Una página por clave (keyset) sobre `_id` y el cursor de la siguiente"""
+        if self.en_memoria:
+            docs = pagina_memoria(self.memoria, limit, cursor, excluir, descendente)
+        else:
+            proyeccion = {campo: 0 for campo in excluir} or None
+            docs = await self._find(
+                filtro_cursor(cursor, descendente), proyeccion,
+                [('_id', -1 if descendente else 1)], limit + 1
+            )
+            docs = [documento_api(d) for d in docs]
+        siguiente = str(docs[limit - 1].get('id')) if len(docs) > limit else None
+        return docs[:limit], siguiente
+
+    async def buscar_por_idx(self, idx: int) -> Optional[dict]:
+        """Documento por número secuencial `idx` (índice único / dict)"""
+        if self.en_memoria:
+            return self.memoria.buscar_unico('idx', idx)
+        doc = await self._llamar(self.coleccion, 'find_one', {'idx': idx})
+        return documento_api(doc) if doc else None
+
+    async def buscar_unico(self, campo: str, valor) -> Optional[dict]:
+        """Documento por un campo con índice único"""
+        if self.en_memoria:
+            return self.memoria.buscar_unico(campo, valor)
+        doc = await self._llamar(self.coleccion, 'find_one', {campo: valor})
+        return documento_api(doc) if doc else None
+
+    async def buscar_por_id(self, id_doc) -> Optional[dict]:
+        """Documento por clave primaria: `_id` (ObjectId) en MongoDB, `id` en memoria"""
+        if self.en_memoria:
+            return self.memoria.obtener(id_doc)
+        if ObjectId is not None:
+            if not ObjectId.is_valid(str(id_doc)):
+                return None
+            id_doc = ObjectId(str(id_doc))
+        doc = await self._llamar(self.coleccion, 'find_one', {'_id': id_doc})
+        return documento_api(doc) if doc else None
+
+    async def contar(self) -> int:
+        """Total de documentos (estimado a partir de metadatos en MongoDB)"""
+        if self.en_memoria:
+            return len(self.memoria)
+        return await self._llamar(self.coleccion, 'estimated_document_count')
+
+    async def agregar(self, pipeline: List[Dict[str, Any]]) -> List[dict]:
+        """Ejecuta un pipeline de agregación y devuelve todos los resultados"""
+        return await self._en_hilo(lambda: list(self.coleccion.aggregate(pipeline)))
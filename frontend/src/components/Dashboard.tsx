@@ -28,18 +28,14 @@ export function Dashboard({ token }: DashboardProps) {
   const cargarDatos = async () => {
     setIsLoading(true);
     try {
-      const [secResponse, expResponse] = await Promise.all([
-        axios.get(`${API_URL}/secuencias/`),
-        axios.get(`${API_URL}/experimentos/`)
-      ]);
-
-      const secuencias = secResponse.data.secuencias || [];
-      const experimentos = expResponse.data.experimentos || [];
+      // Los listados están paginados: los totales salen del informe del sistema
+      const response = await axios.get(`${API_URL}/informes/sistema/`);
+      const estadisticas = response.data.estadisticas || {};
 
       setStats({
-        totalAnalisis: experimentos.length,
-        prediccionesActivas: secuencias.length,
-        datasets: secuencias.length,
+        totalAnalisis: estadisticas.total_experimentos ?? 0,
+        prediccionesActivas: estadisticas.total_secuencias ?? 0,
+        datasets: estadisticas.total_secuencias ?? 0,
         precisionPromedio: 92.4
       });
     } catch (error) {
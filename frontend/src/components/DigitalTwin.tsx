@@ -10,6 +10,7 @@ import { Badge } from './ui/badge';
 import { LineChart, Line, AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { listarPagina } from '../services/api';
 import ReportDownloader from './ReportDownloader';
 
 interface DigitalTwinProps {
@@ -20,6 +21,7 @@ export function DigitalTwin({ token }: DigitalTwinProps) {
   const [isRunning, setIsRunning] = useState(false);
   const [currentTime, setCurrentTime] = useState(0);
   const [sequences, setSequences] = useState<any[]>([]);
+  const [siguienteCursor, setSiguienteCursor] = useState<string | null>(null);
   const [selectedSequenceIndex, setSelectedSequenceIndex] = useState<number>(0);
   const [isLoadingSequences, setIsLoadingSequences] = useState(true);
   const [performanceData, setPerformanceData] = useState<any[]>([]);
@@ -40,19 +42,14 @@ export function DigitalTwin({ token }: DigitalTwinProps) {
     setIsLoadingSequences(true);
     setError(null);
     try {
-      const response = await axios.get(`${API_URL}/secuencias/`);
-      console.log('Respuesta de secuencias:', response.data);
-      
-      if (response.data && response.data.secuencias) {
-        setSequences(response.data.secuencias);
-        if (response.data.secuencias.length > 0) {
-          setSelectedSequenceIndex(0);
-        }
-        console.log('Secuencias cargadas:', response.data.secuencias.length);
-      } else {
-        console.warn('No se encontraron secuencias en la respuesta');
-        setSequences([]);
+      // Solo la primera página: el resto se pide con "Cargar más secuencias"
+      const { items: secuencias, siguiente } = await listarPagina(`${API_URL}/secuencias/`, 'secuencias');
+      setSequences(secuencias);
+      setSiguienteCursor(siguiente);
+      if (secuencias.length > 0) {
+        setSelectedSequenceIndex(0);
       }
+      console.log('Secuencias cargadas:', secuencias.length);
     } catch (error) {
       console.error('Error cargando secuencias:', error);
       setError(`Error al cargar secuencias: ${error instanceof Error ? error.message : 'Error desconocido'}`);
@@ -63,6 +60,21 @@ export function DigitalTwin({ token }: DigitalTwinProps) {
     }
   };
 
+  // Agrega la página siguiente del listado
+  const cargarMasSecuencias = async () => {
+    if (!siguienteCursor) {
+      return;
+    }
+    try {
+      const { items, siguiente } = await listarPagina(`${API_URL}/secuencias/`, 'secuencias', siguienteCursor);
+      setSequences((actuales) => [...actuales, ...items]);
+      setSiguienteCursor(siguiente);
+    } catch (error) {
+      console.error('Error cargando secuencias:', error);
+      toast.error('Error al cargar secuencias');
+    }
+  };
+
   // Datos iniciales por defecto
   const defaultPerformanceData = [
     { time: 0, biomasa: 0.5, producto: 0, viabilidad: 98 },
@@ -80,6 +92,21 @@ export function DigitalTwin({ token }: DigitalTwinProps) {
     }
   }, []);
 
+  // El listado omite los residuos: se piden al seleccionar la secuencia
+  useEffect(() => {
+    const seleccionada = sequences[selectedSequenceIndex];
+    if (!seleccionada || seleccionada.secuencia !== undefined || seleccionada.idx === undefined) {
+      return;
+    }
+    axios.get(`${API_URL}/secuencia/${seleccionada.idx}`)
+      .then((response) => {
+        setSequences((actuales) => actuales.map((seq) =>
+          seq.idx === seleccionada.idx ? { ...seq, secuencia: response.data.secuencia ?? '' } : seq
+        ));
+      })
+      .catch((error) => console.error('Error cargando la secuencia:', error));
+  }, [sequences, selectedSequenceIndex]);
+
   const handleToggleSimulation = async () => {
     if (isRunning) {
       setIsRunning(false);
@@ -96,7 +123,7 @@ export function DigitalTwin({ token }: DigitalTwinProps) {
     
     try {
       const formData = new FormData();
-      formData.append('idx_or_id', selectedSequenceIndex.toString());
+      formData.append('idx_or_id', String(sequences[selectedSequenceIndex]?.idx ?? selectedSequenceIndex));
 
       const response = await axios.post(`${API_URL}/simular_gemelo/`, formData);
       
@@ -230,18 +257,23 @@ export function DigitalTwin({ token }: DigitalTwinProps) {
                 <SelectContent>
                   {sequences.map((seq, index) => (
                     <SelectItem key={index} value={index.toString()}>
-                      {seq.nombre || `Secuencia ${index + 1}`} ({seq.secuencia?.length || 0} AA)
+                      {seq.nombre || `Secuencia ${index + 1}`} ({seq.longitud ?? seq.secuencia?.length ?? 0} AA)
                     </SelectItem>
                   ))}
                 </SelectContent>
               </Select>
+              {siguienteCursor && (
+                <Button variant="link" size="sm" className="px-0" onClick={cargarMasSecuencias}>
+                  Cargar más secuencias
+                </Button>
+              )}
             </div>
             {sequences.length > 0 && selectedSequenceIndex < sequences.length && (
               <div className="space-y-2">
                 <Label>Información de la secuencia</Label>
                 <div className="p-3 bg-gray-50 rounded-lg">
                   <p className="text-sm"><strong>Nombre:</strong> {sequences[selectedSequenceIndex]?.nombre || 'Sin nombre'}</p>
-                  <p className="text-sm"><strong>Longitud:</strong> {sequences[selectedSequenceIndex]?.secuencia?.length || 0} aminoácidos</p>
+                  <p className="text-sm"><strong>Longitud:</strong> {sequences[selectedSequenceIndex]?.longitud ?? sequences[selectedSequenceIndex]?.secuencia?.length ?? 0} aminoácidos</p>
                   <p className="text-sm"><strong>Secuencia:</strong> {sequences[selectedSequenceIndex]?.secuencia?.substring(0, 20) || ''}...</p>
                 </div>
               </div>
@@ -278,6 +310,11 @@ export function DigitalTwin({ token }: DigitalTwinProps) {
                   </SelectContent>
                 </Select>
               )}
+              {siguienteCursor && (
+                <Button variant="link" size="sm" className="px-0" onClick={cargarMasSecuencias}>
+                  Cargar más secuencias
+                </Button>
+              )}
             </div>
 
             <div>
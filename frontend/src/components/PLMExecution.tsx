@@ -10,6 +10,7 @@ import { toast } from 'sonner';
 import { Progress } from './ui/progress';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from './ui/tabs';
 import axios from 'axios';
+import { listarPagina } from '../services/api';
 import ReportDownloader from './ReportDownloader';
 
 interface PLMExecutionProps {
@@ -22,6 +23,7 @@ export function PLMExecution({ token }: PLMExecutionProps) {
   const [isRunning, setIsRunning] = useState(false);
   const [progress, setProgress] = useState(0);
   const [sequences, setSequences] = useState<any[]>([]);
+  const [siguienteCursor, setSiguienteCursor] = useState<string | null>(null);
   const [results, setResults] = useState<any[]>([]);
   const [isLoadingSequences, setIsLoadingSequences] = useState(true);
   const [experiments, setExperiments] = useState<any[]>([]);
@@ -44,12 +46,12 @@ export function PLMExecution({ token }: PLMExecutionProps) {
   const cargarSecuencias = async () => {
     setIsLoadingSequences(true);
     try {
-      const response = await axios.get(`${API_URL}/secuencias/`);
-      if (response.data.secuencias) {
-        setSequences(response.data.secuencias);
-        if (response.data.secuencias.length > 0) {
-          setSelectedSequenceIndex(0);
-        }
+      // Solo la primera página: el resto se pide con "Cargar más secuencias"
+      const { items: secuencias, siguiente } = await listarPagina(`${API_URL}/secuencias/`, 'secuencias');
+      setSequences(secuencias);
+      setSiguienteCursor(siguiente);
+      if (secuencias.length > 0) {
+        setSelectedSequenceIndex(0);
       }
     } catch (error) {
       console.error('Error cargando secuencias:', error);
@@ -59,6 +61,21 @@ export function PLMExecution({ token }: PLMExecutionProps) {
     }
   };
 
+  // Agrega la página siguiente del listado
+  const cargarMasSecuencias = async () => {
+    if (!siguienteCursor) {
+      return;
+    }
+    try {
+      const { items, siguiente } = await listarPagina(`${API_URL}/secuencias/`, 'secuencias', siguienteCursor);
+      setSequences((actuales) => [...actuales, ...items]);
+      setSiguienteCursor(siguiente);
+    } catch (error) {
+      console.error('Error cargando secuencias:', error);
+      toast.error('Error al cargar secuencias');
+    }
+  };
+
   const cargarExperimentos = async () => {
     try {
       const response = await axios.get(`${API_URL}/experimentos/`);
@@ -90,7 +107,7 @@ export function PLMExecution({ token }: PLMExecutionProps) {
       }, 300);
 
       const formData = new FormData();
-      formData.append('idx_or_id', selectedSequenceIndex.toString());
+      formData.append('idx_or_id', String(sequences[selectedSequenceIndex]?.idx ?? selectedSequenceIndex));
       formData.append('modelo', selectedModel);
 
       const response = await axios.post(`${API_URL}/analizar_plm/`, formData);
@@ -189,6 +206,11 @@ export function PLMExecution({ token }: PLMExecutionProps) {
                     </SelectContent>
                   </Select>
                 )}
+                {siguienteCursor && (
+                  <Button variant="link" size="sm" className="px-0" onClick={cargarMasSecuencias}>
+                    Cargar más secuencias
+                  </Button>
+                )}
               </div>
 
               <div>
@@ -308,7 +330,7 @@ export function PLMExecution({ token }: PLMExecutionProps) {
       {/* Generación de Reportes */}
       {sequences.length > 0 && selectedSequenceIndex < sequences.length && (
         <ReportDownloader 
-          sequenceId={selectedSequenceIndex.toString()}
+          sequenceId={String(sequences[selectedSequenceIndex]?.idx ?? selectedSequenceIndex)}
           hasPlm={true} // Temporal: habilitar siempre
           hasLaboratory={true} // Temporal: habilitar siempre
           hasDigitalTwin={true} // Temporal: habilitar siempre
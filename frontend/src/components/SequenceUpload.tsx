@@ -10,16 +10,18 @@ import { toast } from 'sonner';
 import { Badge } from './ui/badge';
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from './ui/table';
 import axios from 'axios';
+import { listarPagina } from '../services/api';
 
 interface SequenceUploadProps {
   token: string | null;
 }
 
 interface Sequence {
-  id: number;
+  id: string;
+  idx: number;
   nombre: string;
   fuente: string;
-  secuencia: string;
+  secuencia?: string;
   formato: string;
   fecha_carga: string;
   longitud: number;
@@ -28,6 +30,7 @@ interface Sequence {
 export function SequenceUpload({ token }: SequenceUploadProps) {
   const [uploadMethod, setUploadMethod] = useState<'file' | 'database' | 'manual'>('file');
   const [uploadedSequences, setUploadedSequences] = useState<Sequence[]>([]);
+  const [siguienteCursor, setSiguienteCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(false);
   const [formData, setFormData] = useState({
     nombre: '',
@@ -45,10 +48,24 @@ export function SequenceUpload({ token }: SequenceUploadProps) {
 
   const cargarSecuencias = async () => {
     try {
-      const response = await axios.get(`${API_URL}/secuencias/`);
-      if (response.data.secuencias) {
-        setUploadedSequences(response.data.secuencias);
-      }
+      // Solo la primera página: el resto se pide con "Cargar más secuencias"
+      const { items, siguiente } = await listarPagina<Sequence>(`${API_URL}/secuencias/`, 'secuencias');
+      setUploadedSequences(items);
+      setSiguienteCursor(siguiente);
+    } catch (error) {
+      console.error('Error al cargar secuencias:', error);
+    }
+  };
+
+  // Agrega la página siguiente del listado
+  const cargarMasSecuencias = async () => {
+    if (!siguienteCursor) {
+      return;
+    }
+    try {
+      const { items, siguiente } = await listarPagina<Sequence>(`${API_URL}/secuencias/`, 'secuencias', siguienteCursor);
+      setUploadedSequences((actuales) => [...actuales, ...items]);
+      setSiguienteCursor(siguiente);
     } catch (error) {
       console.error('Error al cargar secuencias:', error);
     }
@@ -165,7 +182,7 @@ export function SequenceUpload({ token }: SequenceUploadProps) {
             {uploadMethod === 'manual' && 'Entrada Manual de Secuencia'}
           </CardTitle>
           <CardDescription>
-            {uploadMethod === 'file' && 'Soporta formatos: .fasta, .csv, .pdb, .txt'}
+            {uploadMethod === 'file' && 'Soporta formatos: .fasta, .csv, .tsv, .parquet, .pdb, .txt (también comprimidos .gz, .bz2, .xz)'}
             {uploadMethod === 'database' && 'Conecta con bases de datos públicas de proteínas'}
             {uploadMethod === 'manual' && 'Ingresa la secuencia en formato FASTA'}
           </CardDescription>
@@ -188,7 +205,7 @@ export function SequenceUpload({ token }: SequenceUploadProps) {
                 <Input 
                   id="file-upload" 
                   type="file" 
-                  accept=".fasta,.csv,.pdb,.txt"
+                  accept=".fasta,.csv,.tsv,.parquet,.pdb,.txt,.gz,.bz2,.xz"
                   onChange={handleFileUpload}
                   className="mt-1"
                   disabled={isLoading}
@@ -323,6 +340,11 @@ export function SequenceUpload({ token }: SequenceUploadProps) {
               </TableBody>
             </Table>
           )}
+          {siguienteCursor && (
+            <Button variant="link" size="sm" className="px-0" onClick={cargarMasSecuencias}>
+              Cargar más secuencias
+            </Button>
+          )}
         </CardContent>
       </Card>
     </div>
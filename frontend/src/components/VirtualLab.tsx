@@ -11,6 +11,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from './ui/tabs';
 import { Slider } from './ui/slider';
 import { Progress } from './ui/progress';
 import axios from 'axios';
+import { listarPagina } from '../services/api';
 import ReportDownloader from './ReportDownloader';
 
 interface VirtualLabProps {
@@ -21,6 +22,7 @@ export function VirtualLab({ token }: VirtualLabProps) {
   const [isSimulating, setIsSimulating] = useState(false);
   const [progress, setProgress] = useState(0);
   const [sequences, setSequences] = useState<any[]>([]);
+  const [siguienteCursor, setSiguienteCursor] = useState<string | null>(null);
   const [selectedSequenceIndex, setSelectedSequenceIndex] = useState<number>(0);
   const [experiments, setExperiments] = useState<any[]>([]);
   const [isLoadingSequences, setIsLoadingSequences] = useState(true);
@@ -29,28 +31,6 @@ export function VirtualLab({ token }: VirtualLabProps) {
 
   const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
-  useEffect(() => {
-    loadSequences();
-  }, [token]);
-
-  const loadSequences = async () => {
-    setIsLoadingSequences(true);
-    try {
-      const response = await axios.get(`${API_URL}/secuencias/`);
-      if (response.data.secuencias) {
-        setSequences(response.data.secuencias);
-        if (response.data.secuencias.length > 0) {
-          setSelectedSequenceIndex(0);
-        }
-      }
-    } catch (error) {
-      console.error('Error loading sequences:', error);
-      toast.error('Error al cargar secuencias');
-    } finally {
-      setIsLoadingSequences(false);
-    }
-  };
-
   useEffect(() => {
     cargarSecuencias();
     cargarExperimentos();
@@ -72,12 +52,12 @@ export function VirtualLab({ token }: VirtualLabProps) {
   const cargarSecuencias = async () => {
     setIsLoadingSequences(true);
     try {
-      const response = await axios.get(`${API_URL}/secuencias/`);
-      if (response.data.secuencias) {
-        setSequences(response.data.secuencias);
-        if (response.data.secuencias.length > 0) {
-          setSelectedSequenceIndex(0);
-        }
+      // Solo la primera página: el resto se pide con "Cargar más secuencias"
+      const { items: secuencias, siguiente } = await listarPagina(`${API_URL}/secuencias/`, 'secuencias');
+      setSequences(secuencias);
+      setSiguienteCursor(siguiente);
+      if (secuencias.length > 0) {
+        setSelectedSequenceIndex(0);
       }
     } catch (error) {
       console.error('Error cargando secuencias:', error);
@@ -87,6 +67,21 @@ export function VirtualLab({ token }: VirtualLabProps) {
     }
   };
 
+  // Agrega la página siguiente del listado
+  const cargarMasSecuencias = async () => {
+    if (!siguienteCursor) {
+      return;
+    }
+    try {
+      const { items, siguiente } = await listarPagina(`${API_URL}/secuencias/`, 'secuencias', siguienteCursor);
+      setSequences((actuales) => [...actuales, ...items]);
+      setSiguienteCursor(siguiente);
+    } catch (error) {
+      console.error('Error cargando secuencias:', error);
+      toast.error('Error al cargar secuencias');
+    }
+  };
+
   const handleRunSimulation = async () => {
     if (sequences.length === 0) {
       toast.error('Por favor carga al menos una secuencia');
@@ -107,7 +102,7 @@ export function VirtualLab({ token }: VirtualLabProps) {
       }, 400);
 
       const formData = new FormData();
-      formData.append('idx_or_id', selectedSequenceIndex.toString());
+      formData.append('idx_or_id', String(sequences[selectedSequenceIndex]?.idx ?? selectedSequenceIndex));
 
       const response = await axios.post(`${API_URL}/simular_laboratorio/`, formData);
       
@@ -194,7 +189,7 @@ export function VirtualLab({ token }: VirtualLabProps) {
             <div className="text-center py-8">
               <Database className="h-12 w-12 text-gray-400 mx-auto mb-4" />
               <p className="text-gray-600 mb-4">No se encontraron secuencias en la base de datos.</p>
-              <Button onClick={loadSequences}>
+              <Button onClick={cargarSecuencias}>
                 <RotateCcw className="mr-2 h-4 w-4" />
                 Recargar Secuencias
               </Button>
@@ -248,6 +243,11 @@ export function VirtualLab({ token }: VirtualLabProps) {
                         </SelectContent>
                       </Select>
                     )}
+                    {siguienteCursor && (
+                      <Button variant="link" size="sm" className="px-0" onClick={cargarMasSecuencias}>
+                        Cargar más secuencias
+                      </Button>
+                    )}
                   </div>
 
                   <div>
@@ -27,6 +27,20 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Tamaño de página de los selectores de secuencias
+export const TAM_PAGINA = 50;
+
+// Una página de un listado paginado por cursor; `siguiente` es null en la última
+export const listarPagina = async <T = any>(
+  url: string,
+  clave: string,
+  cursor: string | null = null,
+  limit: number = TAM_PAGINA,
+): Promise<{ items: T[]; siguiente: string | null }> => {
+  const response = await apiClient.get(url, { params: { limit, ...(cursor ? { cursor } : {}) } });
+  return { items: response.data[clave] || [], siguiente: response.data.siguiente_cursor ?? null };
+};
+
 // Servicio de Secuencias
 export const secuenciasService = {
   cargarSecuencia: async (nombre: string, fuente: string, secuencia_texto?: string, archivo?: File) => {
@@ -47,7 +61,7 @@ export const secuenciasService = {
     });
   },
 
-  listarSecuencias: () => apiClient.get('/secuencias/'),
+  listarSecuencias: (cursor: string | null = null) => listarPagina('/secuencias/', 'secuencias', cursor),
 
   consultarSecuencia: (idx: number) => apiClient.get(`/secuencia/${idx}`),
 };
@@ -2,8 +2,24 @@
 Lightweight AI model integration helpers.
 These functions use safe imports so the codebase remains importable
 when the heavy libraries are not installed in all environments.
+
+`registry` keeps PLM models (ESM-2, ProtBERT, ProtTrans) resident between
+calls: each model is loaded on first use, moved to its device once, and the
+least recently used ones are evicted when the total exceeds
+PLM_MEMORIA_MODELOS_MB.
+
+`scheduler` groups concurrent embedding requests for the same model into
+batched forward passes (see InferenceScheduler). Sequences longer than a
+model's context are embedded in overlapping windows (see
+stream_residue_embeddings).
 """
-from typing import Any, Dict, Optional
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
 
 
 def _safe_import_torch():
@@ -46,15 +62,22 @@ def load_pytorch_model(model_fn: str, device: Optional[str] = None) -> Any:
     return model
 
 
-def load_transformers_model(model_name: str):
+def load_transformers_model(model_name: str, encoder_only: bool = False, **tokenizer_kwargs):
+    """Load a Transformers model and its tokenizer from the hub or a local path.
+    `encoder_only` loads just the encoder of T5-style models (ProtT5).
+    Prefer `registry.get` for models used repeatedly: this always loads from disk.
+    """
     transformers = _safe_import_transformers()
     if transformers is None:
         raise ImportError("transformers is not installed. Install transformers to use this function.")
 
     from transformers import AutoModel, AutoTokenizer
 
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModel.from_pretrained(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, **tokenizer_kwargs)
+    if encoder_only:
+        model = transformers.T5EncoderModel.from_pretrained(model_name)
+    else:
+        model = AutoModel.from_pretrained(model_name)
     model.eval()
     return model, tokenizer
 
@@ -70,13 +93,384 @@ def infer_with_pytorch(model: Any, inputs: Any, device: Optional[str] = None) ->
     torch = _safe_import_torch()
     if torch is None:
         raise ImportError("PyTorch is not installed.")
-    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
+    device = device or _model_device(model) or ("cuda" if torch.cuda.is_available() else "cpu")
+    if _model_device(model) != str(device):
+        model.to(device)
     with torch.no_grad():
         inputs = inputs.to(device) if hasattr(inputs, "to") else inputs
         return model(inputs)
 
 
+def _model_device(model: Any) -> Optional[str]:
+    try:
+        return str(next(model.parameters()).device)
+    except Exception:
+        return None
+
+
+def _model_bytes(model: Any) -> int:
+    """Memory held by the parameters and buffers of a PyTorch model"""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+# Model id used by the app -> how to load it. Hub ids can be overridden
+# (e.g. a local path or a larger ESM-2) with PLM_MODELO_<ID>.
+# `max_residues` is the context without special tokens.
+PLM_MODELS = {
+    "esm2": {"hf_id": "facebook/esm2_t6_8M_UR50D", "spaced": False, "max_residues": 1022},
+    "protbert": {"hf_id": "Rostlab/prot_bert", "spaced": True, "max_residues": 1022,
+                 "tokenizer": {"do_lower_case": False}},
+    "prottrans": {"hf_id": "Rostlab/prot_t5_xl_half_uniref50-enc", "spaced": True, "encoder_only": True,
+                  "max_residues": 1022, "tokenizer": {"do_lower_case": False}},
+}
+
+# Residues shared by consecutive windows (kept below half a window so that
+# each residue is covered by at most two) and windows per forward pass
+WINDOW_OVERLAP = int(os.getenv("PLM_VENTANA_SOLAPAMIENTO", "256"))
+WINDOWS_PER_BATCH = int(os.getenv("PLM_VENTANAS_POR_LOTE", "8"))
+
+
+def model_spec(model_id: str) -> Dict[str, Any]:
+    spec = dict(PLM_MODELS[model_id])
+    spec["hf_id"] = os.getenv(f"PLM_MODELO_{model_id.upper()}", spec["hf_id"])
+    return spec
+
+
+class ResidentModel:
+    """A loaded model with its tokenizer, device and memory footprint"""
+
+    def __init__(self, model_id: str, model: Any, tokenizer: Any, device: str, size: int):
+        self.model_id = model_id
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.size = size
+        # Fast tokenizers are not safe to call from several threads at once
+        self.tokenizer_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded PLM models with an LRU memory budget.
+
+    `get` is safe for concurrent callers: a model is loaded once even if many
+    requests ask for it at the same time (the others wait for that load), and
+    loads of different models do not block each other or cache hits.
+    An evicted model stays usable by callers that already hold it; its memory
+    is released when the last of them finishes.
+    """
+
+    def __init__(self, budget_bytes: int, device: Optional[str] = None):
+        self.budget_bytes = budget_bytes
+        self.device = device
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[str, ResidentModel]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _default_device(self) -> str:
+        if self.device:
+            return self.device
+        torch = _safe_import_torch()
+        return "cuda" if torch is not None and torch.cuda.is_available() else "cpu"
+
+    def _load(self, model_id: str) -> ResidentModel:
+        if model_id not in PLM_MODELS:
+            raise KeyError(f"Unknown PLM model: {model_id}")
+        if _safe_import_torch() is None:
+            raise ImportError("PyTorch is not installed.")
+        spec = model_spec(model_id)
+        model, tokenizer = load_transformers_model(
+            spec["hf_id"], encoder_only=spec.get("encoder_only", False), **spec.get("tokenizer", {})
+        )
+        device = self._default_device()
+        model.to(device)
+        return ResidentModel(model_id, model, tokenizer, device, _model_bytes(model))
+
+    def get(self, model_id: str) -> ResidentModel:
+        """Resident model for `model_id`, loading it on first use"""
+        with self._lock:
+            entry = self._models.get(model_id)
+            if entry is not None:
+                self._models.move_to_end(model_id)
+                self.hits += 1
+                return entry
+            loading = self._loading.setdefault(model_id, threading.Lock())
+
+        with loading:
+            # Another caller may have finished loading it while we waited
+            with self._lock:
+                entry = self._models.get(model_id)
+                if entry is not None:
+                    self._models.move_to_end(model_id)
+                    self.hits += 1
+                    return entry
+            entry = self._load(model_id)
+            with self._lock:
+                self._models[model_id] = entry
+                self.loads += 1
+                self._loading.pop(model_id, None)
+                self._evict(keep=model_id)
+            return entry
+
+    def _evict(self, keep: str):
+        # Called with self._lock held. The model just requested is never
+        # evicted, even if it alone exceeds the budget.
+        total = sum(e.size for e in self._models.values())
+        for model_id in list(self._models):
+            if total <= self.budget_bytes:
+                break
+            if model_id == keep:
+                continue
+            total -= self._models.pop(model_id).size
+            self.evictions += 1
+            print(f"ℹ️ Modelo PLM {model_id} descargado de memoria (LRU)")
+
+    def unload(self, model_id: str) -> bool:
+        with self._lock:
+            return self._models.pop(model_id, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def hidden_size(self, model_id: str) -> Optional[int]:
+        """Embedding size of `model_id` if it is resident (without loading it)"""
+        with self._lock:
+            entry = self._models.get(model_id)
+        if entry is None:
+            return None
+        config = getattr(entry.model, "config", None)
+        return getattr(config, "hidden_size", None) or getattr(config, "d_model", None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "resident": {m: {"device": e.device, "mb": round(e.size / 2**20, 1)} for m, e in self._models.items()},
+                "used_mb": round(sum(e.size for e in self._models.values()) / 2**20, 1),
+                "budget_mb": round(self.budget_bytes / 2**20, 1),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+registry = ModelRegistry(
+    int(os.getenv("PLM_MEMORIA_MODELOS_MB", "4096")) * 2**20,
+    device=os.getenv("PLM_DISPOSITIVO") or None,
+)
+
+
+def _residue_states(model_id: str, sequences: List[str]) -> list:
+    """Per-residue hidden states (one float32 tensor of shape (len, dim) per
+    sequence, special tokens removed). Every sequence must fit the context.
+    """
+    torch = _safe_import_torch()
+    if torch is None:
+        raise ImportError("PyTorch is not installed.")
+    entry = registry.get(model_id)
+    if PLM_MODELS[model_id].get("spaced"):
+        # ProtBERT / ProtT5 vocabularies tokenize space-separated residues
+        texts = [" ".join(s) for s in sequences]
+    else:
+        texts = list(sequences)
+    with entry.tokenizer_lock:
+        batch = entry.tokenizer(texts, return_tensors="pt", padding=True, return_special_tokens_mask=True)
+    # One token per residue: the residues are the non-special, non-padding tokens
+    residues = (batch.pop("special_tokens_mask") == 0) & (batch["attention_mask"] == 1)
+    batch = {k: v.to(entry.device) for k, v in batch.items()}
+    with torch.inference_mode():
+        hidden = entry.model(**batch).last_hidden_state.float().cpu()
+    return [hidden[i][residues[i]] for i in range(len(sequences))]
+
+
+def sliding_windows(length: int, size: int, overlap: int) -> List[tuple]:
+    """[start, end) windows of `size` residues covering `length`, consecutive
+    windows sharing `overlap` residues (the last one may be shorter)"""
+    overlap = max(0, min(overlap, (size - 1) // 2))
+    stride = size - overlap
+    windows, start = [], 0
+    while True:
+        end = min(start + size, length)
+        windows.append((start, end))
+        if end >= length:
+            return windows
+        start += stride
+
+
+def stream_residue_embeddings(model_id: str, sequence: str, overlap: int = WINDOW_OVERLAP,
+                              windows_per_batch: int = WINDOWS_PER_BATCH):
+    """Per-residue embeddings of a sequence of any length, as a stream of
+    `(start, states)` blocks in order, `states` being a float32 tensor (n, dim).
+
+    Long sequences are cut into overlapping windows that fit the model
+    context; windows are run `windows_per_batch` at a time and the residues
+    two windows share are averaged. Only one batch of windows and one overlap
+    are held in memory, whatever the sequence length.
+    """
+    size = PLM_MODELS[model_id]["max_residues"]
+    windows = sliding_windows(len(sequence), size, overlap)
+    tail = None  # states of the overlap with the next window, not yet emitted
+    emitted = 0
+    for first in range(0, len(windows), max(1, windows_per_batch)):
+        group = windows[first:first + windows_per_batch]
+        states = _residue_states(model_id, [sequence[s:e] for s, e in group])
+        for i, ((start, end), window) in enumerate(zip(group, states)):
+            if tail is not None:
+                window[:len(tail)] = (window[:len(tail)] + tail) / 2
+            following = windows[first + i + 1][0] if first + i + 1 < len(windows) else end
+            yield emitted, window[emitted - start:following - start]
+            tail = window[following - start:] if following < end else None
+            emitted = following
+
+
+def embed_sequences(model_id: str, sequences: List[str]) -> List[List[float]]:
+    """Mean of the per-residue embeddings of each sequence, using a resident model.
+    Sequences that fit the context share one forward pass; longer ones are
+    streamed through stream_residue_embeddings.
+    """
+    size = PLM_MODELS[model_id]["max_residues"]
+    results: List[Optional[List[float]]] = [None] * len(sequences)
+    short = [i for i, s in enumerate(sequences) if len(s) <= size]
+    if short:
+        for i, states in zip(short, _residue_states(model_id, [sequences[i] for i in short])):
+            results[i] = states.mean(dim=0).tolist()
+    for i, sequence in enumerate(sequences):
+        if results[i] is None:
+            total = None
+            for _, states in stream_residue_embeddings(model_id, sequence):
+                block = states.sum(dim=0)
+                total = block if total is None else total + block
+            results[i] = (total / len(sequence)).tolist()
+    return results
+
+
+def window_count(model_id: str, length: int) -> int:
+    """Number of context windows `length` residues need with `model_id`"""
+    return len(sliding_windows(length, PLM_MODELS[model_id]["max_residues"], WINDOW_OVERLAP))
+
+
+class InferenceScheduler:
+    """Dynamic micro-batching of single-sequence inference requests.
+
+    `submit` queues a sequence and returns a Future. A worker thread per model
+    takes the first queued request, keeps collecting for up to `window_ms`
+    (or until `max_batch` requests), sorts them by length and runs them through
+    `run_batch(model_id, sequences)` in buckets whose padded size
+    (longest sequence x count) stays under `max_tokens`. Results are fanned
+    out to each request's Future. If a bucket fails (or returns a wrong number
+    of results) its requests are re-run one by one, so only the offending
+    sequence gets the error.
+
+    A request waits at most the window plus the batches ahead of it, so
+    latency stays bounded while concurrent requests share forward passes.
+    """
+
+    def __init__(self, run_batch, window_ms: float = 5, max_batch: int = 16, max_tokens: int = 8192):
+        self._run_batch = run_batch
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._queues: Dict[str, "queue.Queue"] = {}
+        self.batches = 0
+        self.requests = 0
+        self.retried = 0
+
+    def submit(self, model_id: str, sequence: str) -> Future:
+        future = Future()
+        self._queue(model_id).put((sequence, future))
+        return future
+
+    def _queue(self, model_id: str) -> "queue.Queue":
+        with self._lock:
+            pending = self._queues.get(model_id)
+            if pending is None:
+                pending = self._queues[model_id] = queue.Queue()
+                threading.Thread(
+                    target=self._worker, args=(model_id, pending), daemon=True, name=f"plm-lotes-{model_id}"
+                ).start()
+            return pending
+
+    def _collect(self, pending: "queue.Queue") -> list:
+        requests = [pending.get()]
+        deadline = time.monotonic() + self.window
+        while len(requests) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                requests.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+            except queue.Empty:
+                break
+        return requests
+
+    def buckets(self, requests: list) -> List[list]:
+        """Split requests sorted by length so that each bucket pads little and
+        stays under the token budget"""
+        requests = sorted(requests, key=lambda r: len(r[0]))
+        buckets, current = [], []
+        for request in requests:
+            # Sorted ascending: the new request is the longest of the bucket
+            # (longer than the model context it is streamed in windows anyway)
+            if current and len(request[0]) * (len(current) + 1) > self.max_tokens:
+                buckets.append(current)
+                current = []
+            current.append(request)
+        if current:
+            buckets.append(current)
+        return buckets
+
+    def _worker(self, model_id: str, pending: "queue.Queue"):
+        while True:
+            for bucket in self.buckets(self._collect(pending)):
+                bucket = [(seq, f) for seq, f in bucket if f.set_running_or_notify_cancel()]
+                if not bucket:
+                    continue
+                self._run_bucket(model_id, bucket)
+                with self._lock:
+                    self.batches += 1
+                    self.requests += len(bucket)
+
+    def _run_bucket(self, model_id: str, bucket: list):
+        try:
+            results = self._run_batch(model_id, [seq for seq, _ in bucket])
+            if len(results) != len(bucket):
+                raise RuntimeError(f"run_batch returned {len(results)} results for {len(bucket)} sequences")
+        except Exception as e:
+            if len(bucket) == 1:
+                bucket[0][1].set_exception(e)
+                return
+            with self._lock:
+                self.retried += len(bucket)
+            for request in bucket:
+                self._run_bucket(model_id, [request])
+            return
+        for (_, future), result in zip(bucket, results):
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "retried": self.retried,
+                "avg_batch": round(self.requests / self.batches, 2) if self.batches else 0,
+                "queued": {m: q.qsize() for m, q in self._queues.items()},
+            }
+
+
+scheduler = InferenceScheduler(
+    embed_sequences,
+    window_ms=float(os.getenv("PLM_LOTE_VENTANA_MS", "5")),
+    max_batch=int(os.getenv("PLM_LOTE_MAXIMO", "16")),
+    max_tokens=int(os.getenv("PLM_LOTE_TOKENS", "8192")),
+)
+
+
 def try_load_tiny_transformers(model_name: str = "sshleifer/tiny-gpt2") -> Dict[str, str]:
     """Attempt to load a small Transformers model and tokenizer to verify environment.
     Returns a dict with status and message. Does not keep the model in memory.
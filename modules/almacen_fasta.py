@@ -0,0 +1,109 @@
+"""
+Almacén de secuencias de referencia en archivos FASTA indexados (estilo `.fai`).
+
+Los proteomas de referencia quedan en disco: los documentos de `secuencias`
+guardan solo `almacen = {"archivo", "offset", "bytes"}` (posición de los
+residuos dentro del archivo) y los residuos se leen bajo demanda vía `mmap`.
+
+`indexar_fasta` recorre el archivo una vez, escribe el índice `<archivo>.fai`
+(nombre, longitud, offset, residuos por línea, bytes por línea, como samtools)
+y genera los lotes `(registros, rechazos)` para `Repositorio.insertar_muchos`.
+"""
+import mmap
+import os
+import threading
+from typing import Dict, Iterator, Optional
+
+from modules.ingesta_fasta import LOTE_DEFECTO, Lote, validar_lote
+
+_ESPACIOS = b" \t\r\n\x0b\x0c"
+
+
+class AlmacenFasta:
+    """Lectura perezosa de residuos con un `mmap` compartido por archivo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mapas: Dict[str, mmap.mmap] = {}
+
+    def _mapa(self, archivo: str) -> mmap.mmap:
+        mapa = self._mapas.get(archivo)
+        if mapa is None:
+            with self._lock:
+                mapa = self._mapas.get(archivo)
+                if mapa is None:
+                    with open(archivo, "rb") as f:
+                        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._mapas[archivo] = mapa
+        return mapa
+
+    def leer(self, almacen: dict) -> str:
+        """Residuos de un registro a partir de su entrada `almacen`"""
+        inicio = int(almacen["offset"])
+        crudo = self._mapa(almacen["archivo"])[inicio:inicio + int(almacen["bytes"])]
+        return crudo.translate(None, _ESPACIOS).upper().decode("ascii", errors="replace")
+
+    def cerrar(self):
+        with self._lock:
+            for mapa in self._mapas.values():
+                mapa.close()
+            self._mapas.clear()
+
+
+def indexar_fasta(ruta: str, nombre: str, fuente: Optional[str] = None,
+                  lote: int = LOTE_DEFECTO) -> Iterator[Lote]:
+    """Indexa `ruta` en una pasada: escribe `<ruta>.fai` y genera lotes de
+    documentos de referencia (sin residuos) validados.
+    """
+    archivo = os.path.abspath(ruta)
+    pendientes = []
+    actual = None
+    total = 0
+
+    def cerrar_registro(fin):
+        actual["almacen"]["bytes"] = fin - actual["almacen"]["offset"]
+        actual["secuencia"] = b"".join(actual.pop("_lineas")).decode("ascii", errors="replace")
+        linea = actual.pop("_linea") or (0, 0)
+        # Como samtools: el nombre en el índice es la primera palabra del encabezado
+        fai.write("\t".join(map(str, (
+            (actual["nombre"].split() or [actual["nombre"]])[0], len(actual["secuencia"]),
+            actual["almacen"]["offset"], linea[0], linea[1]
+        ))) + "\n")
+        pendientes.append(actual)
+
+    def vaciar():
+        registros, rechazos = validar_lote(pendientes, fuente, "fasta")
+        for registro in registros:
+            # Solo la referencia: los residuos quedan en el archivo
+            registro.pop("secuencia")
+        pendientes.clear()
+        return registros, rechazos
+
+    with open(archivo, "rb") as f, open(archivo + ".fai.tmp", "w", encoding="utf-8") as fai:
+        offset = 0
+        for linea in f:
+            if linea.startswith(b">"):
+                if actual is not None:
+                    cerrar_registro(offset)
+                    if len(pendientes) >= lote:
+                        yield vaciar()
+                encabezado = linea[1:].strip().decode("utf-8", errors="replace")[:255]
+                total += 1
+                actual = {
+                    "nombre": encabezado or f"{nombre}_{total}",
+                    "almacen": {"archivo": archivo, "offset": offset + len(linea)},
+                    "_lineas": [],
+                    "_linea": None,
+                }
+            elif actual is not None:
+                residuos = linea.strip()
+                if residuos:
+                    actual["_lineas"].append(residuos)
+                    if actual["_linea"] is None:
+                        actual["_linea"] = (len(linea.rstrip(b"\r\n")), len(linea))
+            offset += len(linea)
+        if actual is not None:
+            cerrar_registro(offset)
+    os.replace(archivo + ".fai.tmp", archivo + ".fai")
+    if pendientes:
+        yield vaciar()
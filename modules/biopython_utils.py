@@ -2,7 +2,10 @@
 Helpers for simple protein/sequence tasks using Biopython.
 Provides safe imports so tests and environments without Biopython still work.
 """
-from typing import List, Tuple, Optional
+import hashlib
+import re
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple, Optional
 
 
 def _safe_import_biopython():
@@ -14,34 +17,88 @@ def _safe_import_biopython():
         return None, None
 
 
-def parse_fasta_string(fasta_str: str) -> List[Tuple[str, str]]:
-    """Parse a FASTA-formatted string and return list of (id, seq).
-    Falls back to a simple parser if Biopython is not installed.
+def iter_fasta(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (id, seq) records from an iterable of FASTA lines.
+    Only the current record is held in memory, so it works on arbitrarily large streams.
     """
-    SeqIO, _ = _safe_import_biopython()
-    if SeqIO is not None:
-        from io import StringIO
-        records = list(SeqIO.parse(StringIO(fasta_str), "fasta"))
-        return [(r.id, str(r.seq)) for r in records]
-
-    # Simple fallback parser
-    entries = []
     cur_id = None
     cur_seq = []
-    for line in fasta_str.splitlines():
+    for line in lines:
         line = line.strip()
         if not line:
             continue
         if line.startswith(">"):
             if cur_id is not None:
-                entries.append((cur_id, "".join(cur_seq)))
+                yield cur_id, "".join(cur_seq)
             cur_id = line[1:]
             cur_seq = []
         else:
             cur_seq.append(line)
     if cur_id is not None:
-        entries.append((cur_id, "".join(cur_seq)))
-    return entries
+        yield cur_id, "".join(cur_seq)
+
+
+def parse_fasta_string(fasta_str: str) -> List[Tuple[str, str]]:
+    """Parse a FASTA-formatted string and return list of (id, seq).
+    With Biopython the id is the first word of the header; the fallback
+    parser (shared with `iter_fasta`) keeps the whole header line.
+    """
+    SeqIO, _ = _safe_import_biopython()
+    if SeqIO is not None:
+        from io import StringIO
+        return [(r.id, str(r.seq)) for r in SeqIO.parse(StringIO(fasta_str), "fasta")]
+
+    # Simple fallback parser
+    return list(iter_fasta(fasta_str.splitlines()))
+
+
+# Residue alphabet accepted on upload: the 20 standard amino acids plus stop
+PROTEIN_ALPHABET = frozenset("ACDEFGHIKLMNPQRSTVWY*")
+
+# Byte-level tables: validation and normalization run in C via bytes.translate
+_VALID_BYTES = "".join(sorted(PROTEIN_ALPHABET)).encode("ascii")
+_WHITESPACE_BYTES = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_UPPER_TABLE = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_INVALID_RE = re.compile(b"[^" + re.escape(_VALID_BYTES) + b"]")
+
+
+def _normalize_bytes(seq) -> bytes:
+    if isinstance(seq, str):
+        # Characters outside latin-1 become '?', which is never a valid residue
+        seq = seq.encode("latin-1", "replace")
+    return seq.translate(_UPPER_TABLE, _WHITESPACE_BYTES)
+
+
+def normalize_sequence(seq: str) -> str:
+    """Canonical residue string: whitespace removed, uppercase."""
+    return _normalize_bytes(seq).decode("latin-1")
+
+
+def is_valid_protein(seq: str) -> bool:
+    """True if `seq` (case-insensitive, whitespace ignored) only uses PROTEIN_ALPHABET."""
+    return not _normalize_bytes(seq).translate(None, _VALID_BYTES)
+
+
+def validate_sequences(seqs: Iterable[str], max_positions: int = 20) -> List[Tuple[str, List[int]]]:
+    """Normalize and validate a batch of sequences.
+
+    Returns one (normalized, offending_positions) pair per input; positions are
+    0-based offsets into the normalized sequence (at most `max_positions`) and
+    the list is empty for valid sequences.
+    """
+    results = []
+    for seq in seqs:
+        norm = _normalize_bytes(seq)
+        positions = []
+        if norm.translate(None, _VALID_BYTES):
+            positions = [m.start() for m in islice(_INVALID_RE.finditer(norm), max_positions)]
+        results.append((norm.decode("latin-1"), positions))
+    return results
+
+
+def sequence_hash(seq: str) -> str:
+    """SHA-256 hex digest of the normalized residues (content address)."""
+    return hashlib.sha256(normalize_sequence(seq).encode("ascii", "replace")).hexdigest()
 
 
 def estimate_molecular_weight(seq: str) -> Optional[float]:
@@ -0,0 +1,220 @@
+"""
+Caché de embeddings en dos niveles, con clave `(modelo, hash_secuencia)`.
+`modelo` identifica el checkpoint y la forma de agregar el embedding (ver
+`plm.clave_cache`), no el alias de la aplicación.
+
+1. Memoria: LRU de arreglos float16 acotado en bytes.
+2. Disco: por modelo, shards de solo-agregado con filas float16 crudas
+   (`<n>_d<dimension>.f16`, leídos con `numpy.memmap`) y un índice
+   `indice.tsv` (hash, shard, fila). Al superar el límite se borran los
+   shards más antiguos completos y se reescribe el índice. Al abrir, un
+   shard con una fila a medio escribir (caída durante un append) se trunca
+   a sus filas completas.
+
+Una lectura de disco cuya dimensión no coincide con la esperada (la del
+modelo, si se conoce, o la del shard en curso) cuenta como fallo.
+
+    <directorio>/<modelo>/indice.tsv
+    <directorio>/<modelo>/000001_d320.f16
+
+Sin numpy solo funciona el nivel de memoria.
+"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except Exception:
+    np = None
+    HAVE_NUMPY = False
+
+FILAS_POR_SHARD = 4096
+
+
+class _ModeloDisco:
+    """Índice y shards en disco de un modelo"""
+
+    def __init__(self, directorio: Path):
+        self.directorio = directorio
+        self.indice: Dict[str, Tuple[str, int]] = {}
+        self.filas: Dict[str, int] = {}
+        self.mapas: Dict[str, "np.memmap"] = {}
+        self.actual: Optional[str] = None
+        for shard in directorio.glob("*.f16"):
+            tam_fila = 2 * _dimension(shard.name)
+            tam = shard.stat().st_size
+            self.filas[shard.name] = tam // tam_fila
+            if tam % tam_fila:
+                # Los agregados siguientes quedarían desalineados
+                os.truncate(shard, self.filas[shard.name] * tam_fila)
+        if self.filas:
+            self.actual = max(self.filas)
+        if (directorio / "indice.tsv").exists():
+            with open(directorio / "indice.tsv", encoding="utf-8") as f:
+                for linea in f:
+                    partes = linea.rstrip("\n").split("\t")
+                    # Se ignoran entradas de shards borrados o filas a medio escribir
+                    if len(partes) == 3 and int(partes[2]) < self.filas.get(partes[1], 0):
+                        self.indice[partes[0]] = (partes[1], int(partes[2]))
+
+    def leer(self, hash_sec: str, dimension: Optional[int] = None) -> Optional["np.ndarray"]:
+        ubicacion = self.indice.get(hash_sec)
+        if ubicacion is None:
+            return None
+        shard, fila = ubicacion
+        esperada = dimension or (_dimension(self.actual) if self.actual else None)
+        if esperada is not None and _dimension(shard) != esperada:
+            return None
+        mapa = self.mapas.get(shard)
+        if mapa is None or fila >= mapa.shape[0]:
+            # El shard en curso crece: se vuelve a mapear con las filas nuevas
+            mapa = np.memmap(self.directorio / shard, dtype=np.float16, mode="r").reshape(-1, _dimension(shard))
+            self.mapas[shard] = mapa
+        return np.array(mapa[fila])
+
+    def escribir(self, hash_sec: str, vector: "np.ndarray") -> bool:
+        """Agrega el vector; devuelve True si abrió un shard nuevo"""
+        dimension = vector.shape[0]
+        nuevo = (self.actual is None or _dimension(self.actual) != dimension
+                 or self.filas[self.actual] >= FILAS_POR_SHARD)
+        if nuevo:
+            numero = int(self.actual.split("_")[0]) + 1 if self.actual else 1
+            self.actual = f"{numero:06d}_d{dimension}.f16"
+            self.filas[self.actual] = 0
+        with open(self.directorio / self.actual, "ab") as f:
+            f.write(vector.astype(np.float16).tobytes())
+        fila = self.filas[self.actual]
+        self.filas[self.actual] += 1
+        with open(self.directorio / "indice.tsv", "a", encoding="utf-8") as f:
+            f.write(f"{hash_sec}\t{self.actual}\t{fila}\n")
+        self.indice[hash_sec] = (self.actual, fila)
+        return nuevo
+
+    def eliminar_shard(self, shard: str):
+        self.mapas.pop(shard, None)
+        self.filas.pop(shard, None)
+        (self.directorio / shard).unlink(missing_ok=True)
+        self.indice = {h: u for h, u in self.indice.items() if u[0] != shard}
+        tmp = self.directorio / "indice.tsv.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for h, (s, fila) in self.indice.items():
+                f.write(f"{h}\t{s}\t{fila}\n")
+        os.replace(tmp, self.directorio / "indice.tsv")
+        if self.actual == shard:
+            self.actual = max(self.filas) if self.filas else None
+
+
+def _dimension(shard: str) -> int:
+    return int(shard.rsplit("_d", 1)[1].split(".")[0])
+
+
+class CacheEmbeddings:
+    """LRU en memoria respaldado por shards float16 en `directorio`"""
+
+    def __init__(self, directorio, memoria_bytes: int, disco_bytes: int):
+        self.directorio = Path(directorio)
+        self.memoria_bytes = memoria_bytes
+        self.disco_bytes = disco_bytes
+        self._lock = threading.Lock()
+        self._memoria: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+        self._memoria_usada = 0
+        self._modelos: Dict[str, _ModeloDisco] = {}
+        self.contadores = {
+            "aciertos_memoria": 0, "aciertos_disco": 0, "fallos": 0,
+            "desalojos_memoria": 0, "shards_eliminados": 0,
+        }
+
+    def _disco(self, modelo: str) -> Optional[_ModeloDisco]:
+        if not HAVE_NUMPY or self.disco_bytes <= 0:
+            return None
+        disco = self._modelos.get(modelo)
+        if disco is None:
+            directorio = self.directorio / modelo
+            directorio.mkdir(parents=True, exist_ok=True)
+            disco = self._modelos[modelo] = _ModeloDisco(directorio)
+        return disco
+
+    def _recordar(self, clave, vector):
+        # Llamado con self._lock tomado
+        anterior = self._memoria.pop(clave, None)
+        if anterior is not None:
+            self._memoria_usada -= _tam(anterior)
+        self._memoria[clave] = vector
+        self._memoria_usada += _tam(vector)
+        while self._memoria_usada > self.memoria_bytes and len(self._memoria) > 1:
+            _, desalojado = self._memoria.popitem(last=False)
+            self._memoria_usada -= _tam(desalojado)
+            self.contadores["desalojos_memoria"] += 1
+
+    def obtener(self, modelo: str, hash_sec: str, dimension: Optional[int] = None) -> Optional[List[float]]:
+        """Embedding guardado, o None. Con `dimension`, solo uno de ese tamaño"""
+        clave = (modelo, hash_sec)
+        with self._lock:
+            vector = self._memoria.get(clave)
+            if vector is not None and (dimension is None or len(vector) == dimension):
+                self._memoria.move_to_end(clave)
+                self.contadores["aciertos_memoria"] += 1
+                return _lista(vector)
+            disco = self._disco(modelo)
+            vector = disco.leer(hash_sec, dimension) if disco is not None else None
+            if vector is None:
+                self.contadores["fallos"] += 1
+                return None
+            self.contadores["aciertos_disco"] += 1
+            self._recordar(clave, vector)
+            return _lista(vector)
+
+    def guardar(self, modelo: str, hash_sec: str, embedding: List[float]):
+        clave = (modelo, hash_sec)
+        vector = np.asarray(embedding, dtype=np.float16) if HAVE_NUMPY else list(embedding)
+        with self._lock:
+            self._recordar(clave, vector)
+            disco = self._disco(modelo)
+            ubicacion = disco.indice.get(hash_sec) if disco is not None else None
+            if disco is None or (ubicacion is not None and _dimension(ubicacion[0]) == len(vector)):
+                return
+            try:
+                if disco.escribir(hash_sec, vector):
+                    self._limitar_disco()
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el embedding en disco: {e}")
+
+    def _limitar_disco(self):
+        # Llamado con self._lock tomado: elimina los shards más antiguos
+        shards = []
+        for disco in self._modelos.values():
+            for shard in disco.filas:
+                ruta = disco.directorio / shard
+                if ruta.exists():
+                    estado = ruta.stat()
+                    shards.append((estado.st_mtime, estado.st_size, disco, shard))
+        total = sum(s[1] for s in shards)
+        for _, tam, disco, shard in sorted(shards, key=lambda s: (s[0], s[3])):
+            if total <= self.disco_bytes or shard == disco.actual:
+                continue
+            disco.eliminar_shard(shard)
+            total -= tam
+            self.contadores["shards_eliminados"] += 1
+
+    def estado(self) -> dict:
+        with self._lock:
+            consultas = self.contadores["aciertos_memoria"] + self.contadores["aciertos_disco"] + self.contadores["fallos"]
+            return {
+                **self.contadores,
+                "tasa_aciertos": round((consultas - self.contadores["fallos"]) / consultas, 3) if consultas else 0,
+                "en_memoria": len(self._memoria),
+                "memoria_mb": round(self._memoria_usada / 2**20, 1),
+                "en_disco": sum(len(d.indice) for d in self._modelos.values()),
+            }
+
+
+def _tam(vector) -> int:
+    return vector.nbytes if HAVE_NUMPY else 8 * len(vector)
+
+
+def _lista(vector) -> List[float]:
+    return vector.astype(np.float32).tolist() if HAVE_NUMPY else list(vector)
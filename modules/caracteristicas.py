@@ -0,0 +1,117 @@
+"""
+Vector de características por secuencia, calculado una vez al cargarla.
+
+`calcular` devuelve un dict compacto que se guarda en el documento de la
+secuencia (`caracteristicas`):
+
+    composicion         20 fracciones, en el orden de AMINOACIDOS
+    peso_molecular      Da (masas promedio)
+    punto_isoelectrico  pH con carga neta 0 (pK de Bjellqvist)
+    gravy               hidropatía promedio (Kyte-Doolittle)
+    carga_neta          carga a pH 7.0
+    version             VERSION con la que se calculó
+
+Peso, pI y carga se calculan con `Bio.SeqUtils.ProtParam.ProteinAnalysis`
+sobre los residuos estándar. Sin Biopython se usan las mismas tablas
+(IUPAC y Bjellqvist), así que ambos caminos dan los mismos valores.
+`database.init_db.asignar_caracteristicas` recalcula los vectores de una
+versión anterior.
+
+Los simuladores y reportes leen este vector (`fraccion`) en lugar de
+recorrer la secuencia en cada llamada.
+"""
+from typing import Dict, List, Optional
+
+try:
+    from Bio.SeqUtils.ProtParam import ProteinAnalysis
+    HAVE_BIOPYTHON = True
+except Exception:
+    ProteinAnalysis = None
+    HAVE_BIOPYTHON = False
+
+# 2: peso y pI de Biopython (antes, masas de residuo propias y pKa de EMBOSS)
+VERSION = 2
+
+AMINOACIDOS = "ACDEFGHIKLMNPQRSTVWY"
+_POSICION = {aa: i for i, aa in enumerate(AMINOACIDOS)}
+_NO_ESTANDAR = {c: None for c in range(128) if chr(c) not in AMINOACIDOS}
+
+# Bio.Data.IUPACData.protein_weights (aminoácido libre) y agua promedio
+_MASA_AMINOACIDO = {
+    'A': 89.0932, 'C': 121.1582, 'D': 133.1027, 'E': 147.1293, 'F': 165.1891,
+    'G': 75.0666, 'H': 155.1546, 'I': 131.1729, 'K': 146.1876, 'L': 131.1729,
+    'M': 149.2113, 'N': 132.1179, 'P': 115.1305, 'Q': 146.1445, 'R': 174.201,
+    'S': 105.0926, 'T': 119.1192, 'V': 117.1463, 'W': 204.2252, 'Y': 181.1885,
+}
+_MASA_AGUA = 18.0153
+
+_KYTE_DOOLITTLE = {
+    'A': 1.8, 'C': 2.5, 'D': -3.5, 'E': -3.5, 'F': 2.8, 'G': -0.4, 'H': -3.2,
+    'I': 4.5, 'K': -3.9, 'L': 3.8, 'M': 1.9, 'N': -3.5, 'P': -1.6, 'Q': -3.5,
+    'R': -4.5, 'S': -0.8, 'T': -0.7, 'V': 4.2, 'W': -0.9, 'Y': -1.3,
+}
+
+# Bio.SeqUtils.IsoelectricPoint (Bjellqvist), con pK de extremo según el residuo
+_PK_POSITIVOS = {'K': 10.0, 'R': 12.0, 'H': 5.98}
+_PK_NEGATIVOS = {'D': 4.05, 'E': 4.45, 'C': 9.0, 'Y': 10.0}
+_PK_N_TERMINAL = {'A': 7.59, 'M': 7.0, 'S': 6.93, 'P': 8.36, 'T': 6.82, 'V': 7.44, 'E': 7.7}
+_PK_C_TERMINAL = {'D': 4.55, 'E': 4.75}
+
+
+def _carga(conteos: Dict[str, int], ph: float, estandar: str) -> float:
+    positiva = 1 / (1 + 10 ** (ph - _PK_N_TERMINAL.get(estandar[0], 7.5)))
+    positiva += sum(conteos[aa] / (1 + 10 ** (ph - pk)) for aa, pk in _PK_POSITIVOS.items())
+    negativa = 1 / (1 + 10 ** (_PK_C_TERMINAL.get(estandar[-1], 3.55) - ph))
+    negativa += sum(conteos[aa] / (1 + 10 ** (pk - ph)) for aa, pk in _PK_NEGATIVOS.items())
+    return positiva - negativa
+
+
+def _punto_isoelectrico(conteos: Dict[str, int], estandar: str) -> float:
+    # Misma bisección que IsoelectricPoint.pi
+    ph, bajo, alto = 7.775, 4.05, 12.0
+    while alto - bajo > 0.0001:
+        if _carga(conteos, ph, estandar) > 0:
+            bajo = ph
+        else:
+            alto = ph
+        ph = (bajo + alto) / 2
+    return ph
+
+
+def _fisicoquimicas(conteos: Dict[str, int], total: int, estandar: str):
+    """(peso molecular, punto isoeléctrico, carga a pH 7) de los residuos estándar"""
+    if HAVE_BIOPYTHON:
+        analisis = ProteinAnalysis(estandar)
+        return analisis.molecular_weight(), analisis.isoelectric_point(), analisis.charge_at_pH(7.0)
+    peso = sum(_MASA_AMINOACIDO[aa] * n for aa, n in conteos.items()) - (total - 1) * _MASA_AGUA
+    return peso, _punto_isoelectrico(conteos, estandar), _carga(conteos, 7.0, estandar)
+
+
+def calcular(secuencia: str) -> Optional[dict]:
+    """Vector de características de una secuencia normalizada (mayúsculas).
+    Devuelve None si no tiene residuos estándar.
+    """
+    if not secuencia:
+        return None
+    # str.count recorre la cadena en C: 20 pasadas rápidas en lugar de un bucle Python
+    conteos = {aa: secuencia.count(aa) for aa in AMINOACIDOS}
+    total = sum(conteos.values())
+    if not total:
+        return None
+    # Sin residuos ambiguos (X, B, Z, U...), que ProteinAnalysis no pesa
+    estandar = secuencia if total == len(secuencia) else secuencia.translate(_NO_ESTANDAR)
+    peso, punto_isoelectrico, carga = _fisicoquimicas(conteos, total, estandar)
+    return {
+        "composicion": [round(conteos[aa] / total, 4) for aa in AMINOACIDOS],
+        "peso_molecular": round(peso, 2),
+        "punto_isoelectrico": round(punto_isoelectrico, 2),
+        "gravy": round(sum(_KYTE_DOOLITTLE[aa] * n for aa, n in conteos.items()) / total, 3),
+        "carga_neta": round(carga, 2),
+        "version": VERSION,
+    }
+
+
+def fraccion(caracteristicas: dict, grupo: str) -> float:
+    """Fracción de residuos de la secuencia que pertenecen a `grupo` (p. ej. 'FYW')"""
+    composicion: List[float] = caracteristicas["composicion"]
+    return sum(composicion[_POSICION[aa]] for aa in grupo if aa in _POSICION)
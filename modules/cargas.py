@@ -0,0 +1,215 @@
+"""
+Cargas por partes reanudables, almacenadas en disco local.
+
+Protocolo:
+  1. `crear` abre una sesión y devuelve su id.
+  2. `guardar_parte` recibe cada parte numerada (0, 1, ...) con su SHA-256
+     (obligatorio); reenviar una parte la reemplaza, así que un corte solo
+     obliga a repetir las partes que faltan (ver `estado`).
+  3. `ensamblar` concatena las partes en orden en un único archivo. Solo una
+     llamada gana la transición `abierta` -> `ensamblando` (`transicion`).
+
+Cada sesión es un directorio `<directorio>/<id>/` con `sesion.json`, las
+partes (`000000.parte`, ...) y, al ensamblar, `archivo`. Al no depender de
+memoria del proceso, las sesiones sobreviven a reinicios del backend:
+`recuperar` indica cuáles retomar y `limpiar` borra las inactivas.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+TAM_PARTE_SUGERIDO = 8 * 1024 * 1024
+TAM_PARTE_MAXIMO = 64 * 1024 * 1024
+# Bytes acumulados antes de cada escritura en el pool de hilos
+TAM_ESCRITURA = 1024 * 1024
+
+# Estados con una ingesta en curso: `limpiar` no los toca
+ESTADOS_ACTIVOS = ("ensamblando", "en_cola", "procesando")
+
+
+class ErrorCarga(Exception):
+    """Sesión inexistente, parte inválida o carga incompleta"""
+
+
+class AlmacenCargas:
+    """Sesiones de carga por partes en `directorio`"""
+
+    def __init__(self, directorio):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    # Sesiones
+
+    def _ruta(self, carga_id: str) -> Path:
+        # Los ids son uuid hex: cualquier otra cosa no puede ser una sesión
+        if not carga_id or not all(c in "0123456789abcdef" for c in carga_id):
+            raise ErrorCarga("Carga no encontrada")
+        ruta = self.directorio / carga_id
+        if not (ruta / "sesion.json").exists():
+            raise ErrorCarga("Carga no encontrada")
+        return ruta
+
+    def _guardar_sesion(self, ruta: Path, sesion: dict):
+        tmp = ruta / "sesion.json.tmp"
+        tmp.write_text(json.dumps(sesion), encoding="utf-8")
+        os.replace(tmp, ruta / "sesion.json")
+
+    def crear(self, **metadatos) -> dict:
+        """Abre una sesión con los `metadatos` dados (nombre, fuente, archivo...)"""
+        carga_id = uuid.uuid4().hex
+        ruta = self.directorio / carga_id
+        ruta.mkdir()
+        sesion = {
+            **metadatos,
+            "carga_id": carga_id,
+            "estado": "abierta",
+            "fecha_creacion": datetime.now().isoformat(),
+        }
+        self._guardar_sesion(ruta, sesion)
+        return sesion
+
+    def sesion(self, carga_id: str) -> dict:
+        return json.loads((self._ruta(carga_id) / "sesion.json").read_text(encoding="utf-8"))
+
+    def actualizar(self, carga_id: str, **cambios) -> dict:
+        with self._lock:
+            ruta = self._ruta(carga_id)
+            sesion = json.loads((ruta / "sesion.json").read_text(encoding="utf-8"))
+            sesion.update(cambios)
+            self._guardar_sesion(ruta, sesion)
+            return sesion
+
+    def transicion(self, carga_id: str, desde: str, hacia: str, **cambios) -> dict:
+        """Pasa la sesión de `desde` a `hacia` solo si sigue en `desde`"""
+        with self._lock:
+            ruta = self._ruta(carga_id)
+            sesion = json.loads((ruta / "sesion.json").read_text(encoding="utf-8"))
+            if sesion.get("estado") != desde:
+                raise ErrorCarga(f"La carga está {sesion.get('estado')}")
+            sesion.update(cambios, estado=hacia)
+            self._guardar_sesion(ruta, sesion)
+            return sesion
+
+    def partes(self, carga_id: str) -> List[int]:
+        """Números de las partes ya recibidas, en orden"""
+        return sorted(int(p.stem) for p in self._ruta(carga_id).glob("*.parte"))
+
+    def estado(self, carga_id: str) -> dict:
+        return {**self.sesion(carga_id), "partes_recibidas": self.partes(carga_id)}
+
+    # Partes
+
+    async def guardar_parte(self, carga_id: str, numero: int, datos: AsyncIterator[bytes],
+                            sha256: Optional[str]) -> int:
+        """Escribe una parte desde un flujo de bytes, verificando su SHA-256.
+        La parte solo queda visible (renombrado atómico) si el checksum coincide.
+        El disco se escribe en el pool de hilos, en bloques de `TAM_ESCRITURA`.
+        """
+        ruta = self._ruta(carga_id)
+        if self.sesion(carga_id).get("estado") != "abierta":
+            raise ErrorCarga("La carga ya fue completada")
+        if numero < 0:
+            raise ErrorCarga("Número de parte inválido")
+        if not sha256:
+            raise ErrorCarga("Falta el checksum SHA-256 de la parte")
+
+        loop = asyncio.get_running_loop()
+        tmp = ruta / f"{numero:06d}.{uuid.uuid4().hex}.tmp"
+        resumen = hashlib.sha256()
+        tam = 0
+        pendiente = bytearray()
+        f = await loop.run_in_executor(None, open, tmp, "wb")
+        try:
+            try:
+                async for bloque in datos:
+                    tam += len(bloque)
+                    if tam > TAM_PARTE_MAXIMO:
+                        raise ErrorCarga(f"La parte supera el máximo de {TAM_PARTE_MAXIMO} bytes")
+                    resumen.update(bloque)
+                    pendiente += bloque
+                    if len(pendiente) >= TAM_ESCRITURA:
+                        await loop.run_in_executor(None, f.write, bytes(pendiente))
+                        pendiente.clear()
+                if pendiente:
+                    await loop.run_in_executor(None, f.write, bytes(pendiente))
+            finally:
+                await loop.run_in_executor(None, f.close)
+            if resumen.hexdigest() != sha256.strip().lower():
+                raise ErrorCarga("Checksum SHA-256 no coincide")
+            await loop.run_in_executor(None, os.replace, tmp, ruta / f"{numero:06d}.parte")
+        finally:
+            await loop.run_in_executor(None, lambda: tmp.unlink(missing_ok=True))
+        return tam
+
+    def ensamblar(self, carga_id: str, total_partes: int) -> Path:
+        """Concatena las partes 0..total_partes-1 en `archivo` y las elimina"""
+        ruta = self._ruta(carga_id)
+        faltantes = sorted(set(range(total_partes)) - set(self.partes(carga_id)))
+        if total_partes <= 0 or faltantes:
+            raise ErrorCarga(f"Faltan partes: {faltantes[:20]}")
+        destino = ruta / "archivo"
+        # `archivo` solo existe completo: `recuperar` se guía por él
+        tmp = ruta / "archivo.tmp"
+        with open(tmp, "wb") as salida:
+            for numero in range(total_partes):
+                with open(ruta / f"{numero:06d}.parte", "rb") as parte:
+                    shutil.copyfileobj(parte, salida, 1024 * 1024)
+        os.replace(tmp, destino)
+        for parte in ruta.glob("*.parte"):
+            parte.unlink()
+        return destino
+
+    def eliminar(self, carga_id: str):
+        shutil.rmtree(self._ruta(carga_id), ignore_errors=True)
+
+    # Mantenimiento
+
+    def _sesiones(self):
+        for ruta in self.directorio.iterdir():
+            try:
+                yield ruta, self.sesion(ruta.name)
+            except (ErrorCarga, OSError, ValueError):
+                continue
+
+    def limpiar(self, ttl_s: float) -> int:
+        """Elimina las sesiones sin actividad (partes o cambios de estado) en
+        `ttl_s` segundos, salvo las que tienen una ingesta en curso"""
+        limite = time.time() - ttl_s
+        eliminadas = 0
+        for ruta, sesion in list(self._sesiones()):
+            if sesion.get("estado") in ESTADOS_ACTIVOS:
+                continue
+            # Crear o renombrar una parte o `sesion.json` actualiza el directorio
+            if ruta.stat().st_mtime < limite:
+                self.eliminar(sesion["carga_id"])
+                eliminadas += 1
+        return eliminadas
+
+    def recuperar(self) -> List[dict]:
+        """Sesiones que un reinicio dejó a medias. Las que tienen el archivo
+        ensamblado vuelven a `en_cola` y se devuelven para retomar la ingesta
+        (las secuencias ya insertadas cuentan como duplicadas); las que no
+        llegaron a ensamblarlo vuelven a `abierta` con sus partes.
+        """
+        retomar = []
+        for ruta, sesion in list(self._sesiones()):
+            if sesion.get("estado") not in ESTADOS_ACTIVOS:
+                continue
+            carga_id = sesion["carga_id"]
+            if (ruta / "archivo").exists():
+                retomar.append(self.actualizar(carga_id, estado="en_cola"))
+            elif sesion["estado"] == "ensamblando":
+                (ruta / "archivo.tmp").unlink(missing_ok=True)
+                self.actualizar(carga_id, estado="abierta")
+            else:
+                self.actualizar(carga_id, estado="error", error="Archivo ensamblado no encontrado al reiniciar")
+        return retomar
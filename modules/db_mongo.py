@@ -2,18 +2,14 @@
 Simple MongoDB helper using pymongo and `database.config` for URI.
 Provides a get_db() convenience function.
 """
-from typing import Optional
 from pymongo import MongoClient
-from database.config import DB_URI, DB_NAME
-
-_client: Optional[MongoClient] = None
+from database.config import DB_NAME
+from database import conexion
 
 
 def get_client() -> MongoClient:
-    global _client
-    if _client is None:
-        _client = MongoClient(DB_URI)
-    return _client
+    # Mismo cliente (y pool) que el backend
+    return conexion.get_client()
 
 
 def get_db():
@@ -1,7 +1,9 @@
 # modules/gemelo_digital.py
 import json
 
-def simular_biorreactor(y0, t, params, secuencia=None, resultado_plm=None):
+from modules.caracteristicas import calcular as calcular_caracteristicas, fraccion
+
+def simular_biorreactor(y0, t, params, secuencia=None, resultado_plm=None, caracteristicas=None):
     """
     Simulación de gemelo digital de biorreactor con integración PLM
     
@@ -11,6 +13,7 @@ def simular_biorreactor(y0, t, params, secuencia=None, resultado_plm=None):
         params: Parámetros del modelo (dict con clave 'k')
         secuencia: Secuencia de proteína para ajustar parámetros
         resultado_plm: Resultados del análisis PLM para parametrización
+        caracteristicas: Vector precalculado de la secuencia (modules/caracteristicas.py)
     
     Returns:
         Dict con resultados de simulación y datos temporales
@@ -85,13 +88,15 @@ def simular_biorreactor(y0, t, params, secuencia=None, resultado_plm=None):
                 viabilidad_base = 82 + (confianza_3d * confianza * 15)
                 eficiencia_plm = 0.6 + confianza_3d * 0.6
         
-        elif secuencia:
-            # Fallback: usar propiedades básicas de secuencia
-            aromáticos = sum(1 for aa in secuencia if aa in 'FYW')
-            básicos = sum(1 for aa in secuencia if aa in 'KRH')
-            
-            k_ajustado = k * (1 + aromáticos / len(secuencia) * 0.3)
-            viabilidad_base = 98 - (básicos / len(secuencia) * 10)
+        elif caracteristicas or secuencia:
+            # Fallback: usar la composición precalculada de la secuencia
+            caracteristicas = caracteristicas or calcular_caracteristicas(secuencia)
+            if caracteristicas:
+                aromáticos = fraccion(caracteristicas, 'FYW')
+                básicos = fraccion(caracteristicas, 'KRH')
+                
+                k_ajustado = k * (1 + aromáticos * 0.3)
+                viabilidad_base = 98 - (básicos * 10)
         
         # Generar datos temporales (48 horas, punto cada 2 horas)
         datos_temporales = []
@@ -0,0 +1,265 @@
+"""
+Ingesta de archivos FASTA con muchos registros.
+
+- `lotes_fasta`: parsea y valida líneas FASTA en lotes (un solo núcleo, streaming).
+- `lotes_paralelos`: mapea el archivo en memoria, lo divide en rangos de bytes
+  alineados a los encabezados `>` y los procesa en un pool de procesos.
+- `abrir_descomprimido`: descomprime gzip/bz2/xz en streaming según los
+  bytes mágicos del contenido (no por la extensión).
+
+Ambos generan lotes `(registros, rechazos)` con la forma de documento de
+`secuencias`, listos para `Repositorio.insertar_muchos`.
+
+Uso por línea de comandos:
+    python -m modules.ingesta_fasta uniprot.fasta --procesos 8 --fuente UniProt
+"""
+import bz2
+import gzip
+import lzma
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from modules.biopython_utils import iter_fasta, sequence_hash, validate_sequences
+from modules.caracteristicas import calcular as calcular_caracteristicas
+
+LOTE_DEFECTO = 1000
+TAM_BLOQUE_DEFECTO = 32 * 1024 * 1024
+
+Lote = Tuple[List[dict], List[dict]]
+
+# Prefijo provisional de los registros sin encabezado de un rango: un
+# encabezado real llega sin espacios iniciales, así que no puede empezar así
+_SIN_NOMBRE = " "
+
+# Bytes mágicos -> clase de archivo que descomprime en streaming
+COMPRESIONES = (
+    (b"\x1f\x8b", "gzip", gzip.GzipFile),
+    (b"BZh", "bz2", bz2.BZ2File),
+    (b"\xfd7zXZ\x00", "xz", lzma.LZMAFile),
+)
+EXTENSIONES_COMPRESION = ("gz", "bz2", "xz")
+# Errores que indican un archivo comprimido truncado o dañado
+ERRORES_DESCOMPRESION = (OSError, EOFError, lzma.LZMAError)
+
+
+def detectar_compresion(archivo) -> Optional[str]:
+    """Nombre de la compresión de un archivo binario (o None) sin consumirlo"""
+    inicio = archivo.read(6)
+    archivo.seek(0)
+    for magia, nombre, _ in COMPRESIONES:
+        if inicio.startswith(magia):
+            return nombre
+    return None
+
+
+def abrir_descomprimido(archivo):
+    """Flujo binario con el contenido descomprimido de `archivo` (o el mismo
+    archivo si no está comprimido). Se descomprime a medida que se lee.
+    """
+    compresion = detectar_compresion(archivo)
+    for _, nombre, clase in COMPRESIONES:
+        if nombre == compresion:
+            # El modo explícito evita que GzipFile lo tome del archivo (p. ej. "wb+" de un upload)
+            return clase(fileobj=archivo, mode="rb") if clase is gzip.GzipFile else clase(archivo)
+    return archivo
+
+
+def lineas_texto(archivo):
+    """Líneas UTF-8 de un flujo binario, decodificadas de a una"""
+    for linea in archivo:
+        yield linea.decode("utf-8", errors="replace")
+
+
+def validar_lote(filas: List[dict], fuente: Optional[str], formato: str) -> Lote:
+    """Valida y normaliza de una vez un lote de filas {"nombre", "secuencia", ...}.
+
+    Los campos adicionales de cada fila (organismo, tags, ...) se copian al
+    documento de `secuencias`, junto con su vector de `caracteristicas`.
+    """
+    registros, rechazos = [], []
+    fecha = datetime.now().isoformat()
+    validadas = validate_sequences(fila["secuencia"] for fila in filas)
+    for fila, (secuencia, posiciones) in zip(filas, validadas):
+        if posiciones:
+            rechazos.append({
+                "registro": fila["nombre"],
+                "motivo": "Secuencia contiene caracteres inválidos",
+                "posiciones": posiciones
+            })
+        elif not secuencia:
+            rechazos.append({"registro": fila["nombre"], "motivo": "Secuencia vacía"})
+        else:
+            registros.append({
+                **fila,
+                "fuente": fuente,
+                "secuencia": secuencia,
+                "formato": formato,
+                "fecha_carga": fecha,
+                "longitud": len(secuencia),
+                "hash_secuencia": sequence_hash(secuencia),
+                "caracteristicas": calcular_caracteristicas(secuencia)
+            })
+    return registros, rechazos
+
+
+def lotes_fasta(lineas: Iterable[str], nombre: str, fuente: Optional[str], formato: str,
+                lote: int = LOTE_DEFECTO, desplazamiento: int = 0) -> Iterator[Lote]:
+    """Parsea, valida y normaliza registros FASTA; genera lotes (registros válidos, rechazos).
+
+    Los registros sin encabezado se nombran `{nombre}_{n}` con su ordinal `n`;
+    `desplazamiento` es la cantidad de registros anteriores cuando las líneas
+    son un tramo de un archivo mayor.
+    """
+    pendientes = []
+    for i, (encabezado, secuencia) in enumerate(iter_fasta(lineas)):
+        pendientes.append({
+            "nombre": encabezado.strip()[:255] or f"{nombre}_{desplazamiento + i + 1}",
+            "secuencia": secuencia
+        })
+        if len(pendientes) >= lote:
+            yield validar_lote(pendientes, fuente, formato)
+            pendientes = []
+    if pendientes:
+        yield validar_lote(pendientes, fuente, formato)
+
+
+def dividir_rangos(ruta: str, tam_bloque: int = TAM_BLOQUE_DEFECTO) -> List[Tuple[int, int]]:
+    """Rangos de bytes [inicio, fin) de ~`tam_bloque` que empiezan en un registro `>`"""
+    tam = os.path.getsize(ruta)
+    if tam == 0:
+        return []
+    with open(ruta, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        cortes = [0]
+        while cortes[-1] + tam_bloque < tam:
+            corte = datos.find(b"\n>", cortes[-1] + tam_bloque)
+            if corte < 0:
+                break
+            cortes.append(corte + 1)
+    cortes.append(tam)
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def _procesar_rango(ruta: str, inicio: int, fin: int, fuente: Optional[str],
+                    formato: str, lote: int) -> List[Lote]:
+    """Trabajo de un proceso: parsea y valida un rango de bytes del archivo.
+    Los registros sin encabezado quedan con un nombre provisional numerado
+    dentro del rango; `_renumerar` les da el ordinal en el archivo.
+    """
+    with open(ruta, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        texto = datos[inicio:fin].decode("utf-8", errors="replace")
+    return list(lotes_fasta(texto.splitlines(), _SIN_NOMBRE, fuente, formato, lote))
+
+
+def _renumerar(lotes: List[Lote], nombre: str, desplazamiento: int) -> Iterator[Lote]:
+    """Nombra los registros sin encabezado de un rango con su ordinal en el
+    archivo; `desplazamiento` es la cantidad de registros de los rangos previos"""
+    prefijo = f"{_SIN_NOMBRE}_"
+
+    def nombrar(provisional):
+        if not provisional.startswith(prefijo):
+            return provisional
+        return f"{nombre}_{desplazamiento + int(provisional[len(prefijo):])}"
+
+    for registros, rechazos in lotes:
+        for doc in registros:
+            doc["nombre"] = nombrar(doc["nombre"])
+        for rechazo in rechazos:
+            rechazo["registro"] = nombrar(rechazo["registro"])
+        yield registros, rechazos
+
+
+def lotes_paralelos(ruta: str, nombre: str, fuente: Optional[str] = None, formato: str = "fasta",
+                    procesos: Optional[int] = None, lote: int = LOTE_DEFECTO,
+                    tam_bloque: int = TAM_BLOQUE_DEFECTO) -> Iterator[Lote]:
+    """Como `lotes_fasta` sobre un archivo, repartiendo el parseo entre procesos.
+
+    Mantiene a lo sumo dos rangos en vuelo por proceso, así que la memoria no
+    crece con el tamaño del archivo aunque la inserción sea más lenta que el parseo.
+    """
+    with open(ruta, 'rb') as f:
+        if detectar_compresion(f) is not None:
+            # Sin acceso aleatorio: se parsea en streaming mientras se descomprime
+            yield from lotes_fasta(lineas_texto(abrir_descomprimido(f)), nombre, fuente, formato, lote)
+            return
+
+    procesos = procesos or os.cpu_count() or 1
+    rangos = dividir_rangos(ruta, tam_bloque)
+    # Cada registro del rango termina en un único lote, válido o rechazado
+    desplazamiento = 0
+
+    def numerados(lotes):
+        nonlocal desplazamiento
+        yield from _renumerar(lotes, nombre, desplazamiento)
+        desplazamiento += sum(len(registros) + len(rechazos) for registros, rechazos in lotes)
+
+    if procesos == 1 or len(rangos) <= 1:
+        for inicio, fin in rangos:
+            yield from numerados(_procesar_rango(ruta, inicio, fin, fuente, formato, lote))
+        return
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        pendientes = iter(rangos)
+        en_vuelo = []
+        for inicio, fin in pendientes:
+            en_vuelo.append(pool.submit(_procesar_rango, ruta, inicio, fin, fuente, formato, lote))
+            if len(en_vuelo) >= 2 * procesos:
+                break
+        while en_vuelo:
+            # En orden de archivo: los `idx` quedan en el orden de los registros
+            futuro = en_vuelo.pop(0)
+            siguiente = next(pendientes, None)
+            if siguiente is not None:
+                en_vuelo.append(pool.submit(_procesar_rango, ruta, *siguiente, fuente, formato, lote))
+            yield from numerados(futuro.result())
+
+
+def main(argv=None):
+    import argparse
+    import asyncio
+    from pathlib import Path
+
+    import database.init_db as db_init
+    from database.repositorio import Repositorio
+
+    parser = argparse.ArgumentParser(description="Importación masiva de un archivo FASTA a MongoDB")
+    parser.add_argument("ruta", help="archivo FASTA")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos de parseo (por defecto, un núcleo cada uno)")
+    parser.add_argument("--fuente", default=None)
+    parser.add_argument("--nombre", default=None, help="prefijo para registros sin encabezado")
+    parser.add_argument("--lote", type=int, default=LOTE_DEFECTO)
+    parser.add_argument("--referencia", action="store_true",
+                        help="dejar los residuos en el archivo e indexarlo (.fai) en lugar de copiarlos a MongoDB")
+    args = parser.parse_args(argv)
+
+    db = db_init.init_db()
+    if db is None:
+        return 1
+    db_init.create_indexes(db)
+    db_init.asignar_hashes_secuencias(db)
+    db_init.asignar_caracteristicas(db)
+    repo = Repositorio(db.secuencias, secuencial=True)
+    nombre = args.nombre or Path(args.ruta).stem
+
+    async def importar():
+        aceptadas = duplicadas = rechazadas = 0
+        if args.referencia:
+            from modules.almacen_fasta import indexar_fasta
+            lotes = indexar_fasta(args.ruta, nombre, args.fuente, args.lote)
+        else:
+            lotes = lotes_paralelos(args.ruta, nombre, args.fuente, "fasta", args.procesos, args.lote)
+        for registros, rechazos in lotes:
+            insertados, repetidos = await repo.insertar_muchos(registros)
+            aceptadas += len(insertados)
+            duplicadas += repetidos
+            rechazadas += len(rechazos)
+        print(f"✅ {aceptadas} secuencias cargadas, {duplicadas} ya registradas, {rechazadas} rechazadas")
+
+    asyncio.run(importar())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
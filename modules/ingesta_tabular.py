@@ -0,0 +1,120 @@
+"""
+Importación de tablas de secuencias (CSV, TSV, Parquet) en bloques.
+
+Las columnas se reconocen por nombre (sin distinguir mayúsculas) y se mapean
+a la forma de documento de `database.seed_data.get_sample_sequences`:
+
+    nombre, secuencia (obligatoria), organismo, descripcion, tags
+
+`tags` acepta listas (Parquet) o texto separado por `;`, `,` o `|`. Cada
+bloque se valida con `validar_lote` (tablas de bytes, ver
+`biopython_utils.validate_sequences`) y se genera como lote
+`(registros, rechazos)` listo para `Repositorio.insertar_muchos`.
+
+Requiere pandas; Parquet además requiere pyarrow.
+"""
+import re
+from typing import Iterator, List, Optional
+
+from modules.ingesta_fasta import LOTE_DEFECTO, Lote, validar_lote
+
+try:
+    import pandas as pd
+    HAVE_PANDAS = True
+except Exception:
+    pd = None
+    HAVE_PANDAS = False
+
+try:
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except Exception:
+    pq = None
+    HAVE_PYARROW = False
+
+FORMATOS_TABLA = ("csv", "tsv", "parquet")
+
+# Campo del documento -> nombres de columna aceptados
+COLUMNAS = {
+    "nombre": ("nombre", "name", "id", "entry", "accession"),
+    "secuencia": ("secuencia", "sequence", "seq"),
+    "organismo": ("organismo", "organism"),
+    "descripcion": ("descripcion", "descripción", "description"),
+    "tags": ("tags", "etiquetas", "keywords"),
+}
+
+_SEPARADOR_TAGS = re.compile(r"\s*[;,|]\s*")
+
+
+class ErrorTabla(Exception):
+    """Formato no disponible o tabla sin columna de secuencia"""
+
+
+def mapear_columnas(columnas) -> dict:
+    """{campo: columna} para las columnas reconocidas de la tabla"""
+    por_nombre = {str(c).strip().lower(): c for c in columnas}
+    mapa = {}
+    for campo, alias in COLUMNAS.items():
+        for nombre in alias:
+            if nombre in por_nombre:
+                mapa[campo] = por_nombre[nombre]
+                break
+    if "secuencia" not in mapa:
+        raise ErrorTabla("La tabla no tiene columna de secuencia (secuencia/sequence)")
+    return mapa
+
+
+def _tags(valor) -> List[str]:
+    if valor is None:
+        return []
+    if isinstance(valor, str):
+        return [t for t in _SEPARADOR_TAGS.split(valor.strip()) if t]
+    try:
+        return [str(t) for t in valor]
+    except TypeError:
+        return []
+
+
+def _bloques(archivo, formato: str, filas: int) -> Iterator["pd.DataFrame"]:
+    if not HAVE_PANDAS:
+        raise ErrorTabla("pandas no está instalado")
+    if formato == "parquet":
+        if not HAVE_PYARROW:
+            raise ErrorTabla("pyarrow no está instalado: no se pueden leer archivos Parquet")
+        tabla = pq.ParquetFile(archivo)
+        # Solo se leen las columnas mapeadas
+        columnas = list(mapear_columnas(tabla.schema_arrow.names).values())
+        for lote in tabla.iter_batches(batch_size=filas, columns=columnas):
+            yield lote.to_pandas()
+        return
+    yield from pd.read_csv(
+        archivo, sep="\t" if formato == "tsv" else ",", dtype=str,
+        keep_default_na=False, chunksize=filas
+    )
+
+
+def lotes_tabla(archivo, formato: str, nombre: str, fuente: Optional[str] = None,
+                lote: int = LOTE_DEFECTO) -> Iterator[Lote]:
+    """Lee `archivo` (binario) en bloques de `lote` filas y genera lotes validados"""
+    if formato not in FORMATOS_TABLA:
+        raise ErrorTabla(f"Formato de tabla no soportado: {formato}")
+    fila_inicial = 0
+    mapa = None
+    for df in _bloques(archivo, formato, lote):
+        mapa = mapa or mapear_columnas(df.columns)
+        columnas = {campo: df[col].tolist() for campo, col in mapa.items()}
+        filas = []
+        for i in range(len(df)):
+            fila = {
+                "nombre": str(columnas["nombre"][i] or "").strip()[:255] if "nombre" in columnas else "",
+                "secuencia": str(columnas["secuencia"][i] or ""),
+            }
+            fila["nombre"] = fila["nombre"] or f"{nombre}_{fila_inicial + i + 1}"
+            for campo in ("organismo", "descripcion"):
+                if campo in columnas and columnas[campo][i]:
+                    fila[campo] = str(columnas[campo][i])
+            if "tags" in columnas:
+                fila["tags"] = _tags(columnas["tags"][i])
+            filas.append(fila)
+        fila_inicial += len(df)
+        yield validar_lote(filas, fuente, formato)
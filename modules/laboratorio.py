@@ -5,6 +5,8 @@ try:
 except Exception:
     simpy = None
 
+from modules.caracteristicas import calcular as calcular_caracteristicas, fraccion
+
 
 def _simulate_with_simpy(duracion, parametros):
     """Run a minimal SimPy simulation that waits `duracion` time units.
@@ -173,7 +175,7 @@ def _simular_con_simpy_avanzado(duracion, parametros, secuencia, resultado_plm):
     }
 
 
-def simular_experimento(parametros, secuencia=None, resultado_plm=None):
+def simular_experimento(parametros, secuencia=None, resultado_plm=None, caracteristicas=None):
     """
     Simulación de laboratorio virtual avanzada con SimPy y integración PLM
 
@@ -181,6 +183,7 @@ def simular_experimento(parametros, secuencia=None, resultado_plm=None):
         parametros: Dict con parámetros de simulación (duracion, condiciones, etc)
         secuencia: Secuencia de proteína para ajustar simulación
         resultado_plm: Resultados del análisis PLM para parametrización precisa
+        caracteristicas: Vector precalculado de la secuencia (modules/caracteristicas.py)
 
     Returns:
         Dict con resultados de la simulación y datos de gráficos
@@ -225,14 +228,15 @@ def simular_experimento(parametros, secuencia=None, resultado_plm=None):
                 confianza_3d = float(resultado_plm['estructura_3d'].get('confianza_plegamiento', '80%').replace('%', '')) / 100
                 seq_factor = 0.6 + confianza_3d * 0.5
                 
-        elif secuencia:
-            # Fallback: propiedades básicas de secuencia
-            hidrofobicos = sum(1 for aa in secuencia if aa in 'AILMFWYV')
-            polares = sum(1 for aa in secuencia if aa in 'STNQ')
-            cargados = sum(1 for aa in secuencia if aa in 'KRHDE')
-            
-            seq_factor = 0.8 + (hidrofobicos / len(secuencia)) * 0.4
-            estabilidad_base = 0.7 + (polares / len(secuencia)) * 0.3
+        elif caracteristicas or secuencia:
+            # Fallback: composición precalculada de la secuencia
+            caracteristicas = caracteristicas or calcular_caracteristicas(secuencia)
+            if caracteristicas:
+                hidrofobicos = fraccion(caracteristicas, 'AILMFWYV')
+                polares = fraccion(caracteristicas, 'STNQ')
+                
+                seq_factor = 0.8 + hidrofobicos * 0.4
+                estabilidad_base = 0.7 + polares * 0.3
             
         # Generar serie temporal de datos experimentales
         puntos_tiempo = []
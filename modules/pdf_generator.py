@@ -18,6 +18,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
 from jinja2 import Template
+from modules.series_temporales import columnas
 # Disable WeasyPrint to avoid Windows library issues
 HAVE_WEASYPRINT = False
 weasyprint = None
@@ -486,13 +487,13 @@ class PDFReportGenerator:
             print(f"Error creando gráfico de confianza: {e}")
             return None
 
-    def _create_temporal_chart(self, datos_temporales: List[Dict], tipo: str) -> Optional[io.BytesIO]:
-        """Crear gráfico de evolución temporal"""
+    def _create_temporal_chart(self, datos_temporales: Any, tipo: str) -> Optional[io.BytesIO]:
+        """Crear gráfico de evolución temporal (acepta series en filas o columnar)"""
         try:
             if not datos_temporales:
                 return None
                 
-            df = pd.DataFrame(datos_temporales)
+            df = pd.DataFrame(columnas(datos_temporales))
             
             fig, axes = plt.subplots(2, 2, figsize=(12, 8))
             fig.suptitle(f'Evolución Temporal - {tipo}', fontsize=16, fontweight='bold')
@@ -566,7 +567,8 @@ class PDFReportGenerator:
     def create_comprehensive_report(self, resultado_plm: Dict[Any, Any] = None,
                                   resultado_lab: Dict[Any, Any] = None, 
                                   resultado_gemelo: Dict[Any, Any] = None,
-                                  secuencia: str = None) -> bytes:
+                                  secuencia: str = None,
+                                  caracteristicas: Dict[str, Any] = None) -> bytes:
         """
         Crear reporte comprehensivo que incluye todos los análisis disponibles
         """
@@ -589,6 +591,16 @@ class PDFReportGenerator:
             story.append(Paragraph(f"Secuencia Analizada: {len(secuencia)} aminoácidos", self.styles['Normal']))
             story.append(Spacer(1, 20))
         
+        if caracteristicas:
+            story.append(Paragraph(
+                f"Peso molecular: {caracteristicas['peso_molecular']:.2f} Da &nbsp; "
+                f"pI: {caracteristicas['punto_isoelectrico']:.2f} &nbsp; "
+                f"GRAVY: {caracteristicas['gravy']:.3f} &nbsp; "
+                f"Carga neta (pH 7): {caracteristicas['carga_neta']:+.2f}",
+                self.styles['Normal']
+            ))
+            story.append(Spacer(1, 20))
+        
         # Índice de contenidos
         story.append(Paragraph("Contenido del Reporte", self.styles['CustomSubtitle']))
         contenido = []
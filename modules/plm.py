@@ -1,5 +1,77 @@
 # modules/plm.py
+import math
+import os
+from concurrent.futures import TimeoutError as FuturoVencido
 import random
+import time
+from pathlib import Path
+
+from modules import ai_inference
+from modules.biopython_utils import sequence_hash
+from modules.cache_embeddings import CacheEmbeddings
+
+MODELOS = ("esm2", "protbert", "prottrans", "alphafold")
+
+# Inferencia real con los modelos de Hugging Face (requiere torch y transformers).
+# Los modelos quedan residentes en `ai_inference.registry` entre llamadas y las
+# solicitudes concurrentes se agrupan en lotes (`ai_inference.scheduler`).
+INFERENCIA_REAL = os.getenv("PLM_INFERENCIA", "0").lower() in ("1", "true", "si", "sí")
+# Espera máxima por un embedding (cola del lote + inferencia)
+TIEMPO_MAXIMO_S = float(os.getenv("PLM_TIEMPO_MAXIMO_S", "300"))
+
+# Embeddings ya calculados, por (checkpoint y agregación, hash de la secuencia)
+cache_embeddings = CacheEmbeddings(
+    os.getenv("EMBEDDINGS_DIR", str(Path(__file__).parent.parent / "datos" / "embeddings")),
+    memoria_bytes=int(os.getenv("EMBEDDINGS_MEMORIA_MB", "256")) * 2**20,
+    disco_bytes=int(os.getenv("EMBEDDINGS_DISCO_MB", "2048")) * 2**20,
+)
+
+
+# Versión de la agregación de embeddings (media por residuo sobre ventanas
+# solapadas); cambiarla invalida la caché
+VERSION_EMBEDDING = "media-v1"
+
+
+def clave_cache(modelo):
+    """Clave de caché de `modelo`: el checkpoint configurado (no el alias),
+    la agregación y el solapamiento de ventanas, que cambian el embedding"""
+    hf_id = ai_inference.model_spec(modelo)["hf_id"]
+    return f"{hf_id.replace('/', '__')}@{VERSION_EMBEDDING}-s{ai_inference.WINDOW_OVERLAP}"
+
+
+def obtener_embedding(secuencia, modelo, hash_secuencia=None):
+    """Embedding de la secuencia: de la caché o, si falta, del modelo residente.
+    Devuelve (embedding, desde_cache).
+    """
+    hash_secuencia = hash_secuencia or sequence_hash(secuencia)
+    clave = clave_cache(modelo)
+    embedding = cache_embeddings.obtener(clave, hash_secuencia, ai_inference.registry.hidden_size(modelo))
+    if embedding is not None:
+        return embedding, True
+    futuro = ai_inference.scheduler.submit(modelo, secuencia)
+    try:
+        embedding = futuro.result(timeout=TIEMPO_MAXIMO_S)
+    except FuturoVencido:
+        # Si sigue en cola, el planificador la descarta
+        futuro.cancel()
+        raise TimeoutError(f"La inferencia con {modelo} superó {TIEMPO_MAXIMO_S:.0f} s")
+    cache_embeddings.guardar(clave, hash_secuencia, embedding)
+    return embedding, False
+
+
+def _inferencia(secuencia, modelo):
+    """Embedding de la secuencia con el modelo residente (resumen para el resultado)"""
+    inicio = time.perf_counter()
+    embedding, desde_cache = obtener_embedding(secuencia, modelo)
+    return {
+        "modelo_hf": ai_inference.model_spec(modelo)["hf_id"],
+        "dimension": len(embedding),
+        "norma": round(math.sqrt(sum(x * x for x in embedding)), 4),
+        # Secuencias más largas que el contexto del modelo se procesan en ventanas solapadas
+        "ventanas": ai_inference.window_count(modelo, len(secuencia)),
+        "cache": desde_cache,
+        "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 1)
+    }
 
 def analizar_proteina(secuencia, modelo="esm2"):
     """
@@ -98,4 +170,10 @@ def analizar_proteina(secuencia, modelo="esm2"):
         "timestamp": "análisis completado"
     })
     
+    if INFERENCIA_REAL and modelo in ai_inference.PLM_MODELS:
+        try:
+            resultado["inferencia"] = _inferencia(secuencia, modelo)
+        except Exception as e:
+            print(f"⚠️ Inferencia PLM no disponible ({modelo}), se usan resultados simulados: {e}")
+    
     return resultado
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Codificación columnar de las series temporales (`datos_temporales`) de las simulaciones.
+
+Formatos soportados para `datos_temporales`:
+  - filas (legado): lista de dicts, uno por punto de tiempo
+  - "columnas": {"formato": "columnas", "n": N, "columnas": {variable: [valores]}}
+  - "f32": igual que "columnas" pero cada variable numérica es un blob
+    float32 comprimido con zlib (los valores no numéricos quedan como lista)
+
+Solo usa la biblioteca estándar, así que funciona sin NumPy.
+"""
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional
+
+FORMATOS = ("filas", "columnas", "f32")
+
+
+def _es_numerica(valores: List[Any]) -> bool:
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores)
+
+
+def _empaquetar(valores: List[float]) -> bytes:
+    return zlib.compress(array('f', valores).tobytes())
+
+
+def _desempaquetar(blob: bytes) -> List[float]:
+    valores = array('f')
+    valores.frombytes(zlib.decompress(bytes(blob)))
+    # float32 guarda ~7 dígitos significativos: se redondea para no exponer ruido
+    return [float(f"{v:.7g}") for v in valores]
+
+
+def es_columnar(serie: Any) -> bool:
+    return isinstance(serie, dict) and serie.get("formato") in ("columnas", "f32")
+
+
+def columnas(serie: Any) -> Dict[str, List[Any]]:
+    """Devuelve {variable: [valores]} para una serie en cualquier formato"""
+    if not serie:
+        return {}
+    if es_columnar(serie):
+        return {
+            k: _desempaquetar(v) if isinstance(v, (bytes, bytearray, memoryview)) else list(v)
+            for k, v in serie["columnas"].items()
+        }
+    variables: Dict[str, List[Any]] = {}
+    for punto in serie:
+        for k in punto:
+            variables.setdefault(k, [])
+    return {k: [punto.get(k) for punto in serie] for k in variables}
+
+
+def a_filas(serie: Any) -> List[Dict[str, Any]]:
+    """Expande una serie a la forma legada (lista de dicts por punto)"""
+    if not es_columnar(serie):
+        return serie or []
+    cols = columnas(serie)
+    return [{k: v[i] for k, v in cols.items()} for i in range(serie.get("n", 0))]
+
+
+def resumen(serie: Any) -> Dict[str, Dict[str, Any]]:
+    """{variable: {"n", "min", "max", "ultimo"}} de las variables numéricas"""
+    return {
+        k: {"n": len(v), "min": min(v), "max": max(v), "ultimo": v[-1]}
+        for k, v in columnas(serie).items() if v and _es_numerica(v)
+    }
+
+
+def codificar(filas: List[Dict[str, Any]], formato: str = "columnas") -> Any:
+    """Codifica una serie en filas al `formato` pedido ("filas" la deja igual)"""
+    if formato not in ("columnas", "f32") or not isinstance(filas, list):
+        return filas
+    cols = columnas(filas)
+    if formato == "f32":
+        cols = {k: _empaquetar(v) if _es_numerica(v) else v for k, v in cols.items()}
+    return {"formato": formato, "n": len(filas), "columnas": cols}
+
+
+def codificar_resultado(resultado: Any, formato: str = "columnas") -> Any:
+    """Copia de `resultado` con `datos_temporales` codificado para almacenarse"""
+    if not isinstance(resultado, dict) or not resultado.get("datos_temporales"):
+        return resultado
+    return {**resultado, "datos_temporales": codificar(resultado["datos_temporales"], formato)}
+
+
+def expandir_resultado(resultado: Any, forma: Optional[str] = None) -> Any:
+    """Copia de `resultado` apta para JSON.
+
+    forma: "filas" expande a la forma legada, "columnas" devuelve
+    {"formato": "columnas", ...} con listas; None conserva la forma almacenada
+    (decodificando los blobs binarios).
+    """
+    if not isinstance(resultado, dict) or not resultado.get("datos_temporales"):
+        return resultado
+    serie = resultado["datos_temporales"]
+    if forma == "filas":
+        serie = a_filas(serie)
+    elif forma == "columnas" or (forma is None and es_columnar(serie)):
+        n = serie.get("n", 0) if es_columnar(serie) else len(serie)
+        serie = {"formato": "columnas", "n": n, "columnas": columnas(serie)}
+    return {**resultado, "datos_temporales": serie}
@@ -0,0 +1,19 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Permite `import database...` / `import modules...` desde la raíz del repo
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def backend_main():
+    """`backend.main` importado sin MongoDB alcanzable (modo memoria)"""
+    pytest.importorskip("dotenv")
+    pytest.importorskip("fastapi")
+    os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:1")
+    os.environ.setdefault("MONGO_TIMEOUT_MS", "200")
+    from backend import main
+    return main
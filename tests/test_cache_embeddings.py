@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from modules.cache_embeddings import CacheEmbeddings
+
+
+def _cache(directorio):
+    return CacheEmbeddings(directorio, memoria_bytes=2**20, disco_bytes=2**30)
+
+
+def test_disco_persiste_entre_instancias(tmp_path):
+    _cache(tmp_path).guardar("m", "h1", [1.0, 2.0, 3.0])
+    cache = _cache(tmp_path)
+    assert cache.obtener("m", "h1") == [1.0, 2.0, 3.0]
+    assert cache.contadores["aciertos_disco"] == 1
+
+
+def test_fila_a_medio_escribir_se_trunca_al_abrir(tmp_path):
+    cache = _cache(tmp_path)
+    cache.guardar("m", "h1", [1.0, 2.0])
+    shard = next((tmp_path / "m").glob("*.f16"))
+    with open(shard, "ab") as f:
+        f.write(b"\x00\x3c")  # media fila de una escritura interrumpida
+
+    cache = _cache(tmp_path)
+    assert cache.obtener("m", "h1") == [1.0, 2.0]
+    assert shard.stat().st_size == 4
+    cache.guardar("m", "h2", [3.0, 4.0])
+    cache = _cache(tmp_path)
+    assert cache.obtener("m", "h1") == [1.0, 2.0]
+    assert cache.obtener("m", "h2") == [3.0, 4.0]
+
+
+def test_dimension_distinta_es_un_fallo(tmp_path):
+    _cache(tmp_path).guardar("m", "h1", [1.0, 2.0])
+    cache = _cache(tmp_path)
+    assert cache.obtener("m", "h1", dimension=3) is None
+    cache.guardar("m", "h1", [1.0, 2.0, 3.0])
+    assert cache.obtener("m", "h1", dimension=3) == [1.0, 2.0, 3.0]
+    # Un shard de otra dimensión que la del shard en curso no se devuelve
+    assert _cache(tmp_path).obtener("m", "h1") == [1.0, 2.0, 3.0]
+
+
+def test_clave_cache_usa_el_checkpoint(monkeypatch):
+    pytest.importorskip("dotenv")
+    from modules import plm
+
+    clave = plm.clave_cache("esm2")
+    assert clave.startswith("facebook__esm2_t6_8M_UR50D@")
+    monkeypatch.setenv("PLM_MODELO_ESM2", "facebook/esm2_t12_35M_UR50D")
+    assert plm.clave_cache("esm2") != clave
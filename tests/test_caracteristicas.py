@@ -0,0 +1,47 @@
+import pytest
+
+from database.seed_data import get_sample_sequences
+from modules import caracteristicas
+from modules.caracteristicas import VERSION, calcular
+
+
+def test_sin_biopython_da_los_mismos_valores(monkeypatch):
+    pytest.importorskip("Bio")
+    for seq in get_sample_sequences() + [{"secuencia": "DKXRE"}, {"secuencia": "PETER"}]:
+        con_biopython = calcular(seq["secuencia"])
+        monkeypatch.setattr(caracteristicas, "HAVE_BIOPYTHON", False)
+        assert calcular(seq["secuencia"]) == con_biopython
+        monkeypatch.setattr(caracteristicas, "HAVE_BIOPYTHON", True)
+
+
+@pytest.mark.parametrize("secuencia, peso", [
+    # Masas medias IUPAC de los aminoácidos libres y del dipéptido
+    ("G", 75.07), ("A", 89.09), ("W", 204.23), ("GG", 132.12),
+])
+def test_peso_molecular_de_referencia(secuencia, peso):
+    assert calcular(secuencia)["peso_molecular"] == peso
+
+
+def test_valores_de_referencia():
+    # Ejemplos de Bio.SeqUtils.IsoelectricPoint (escala de Bjellqvist)
+    assert calcular("PETER")["punto_isoelectrico"] == 4.53
+    assert calcular("INGAR")["punto_isoelectrico"] == 9.75
+    assert calcular("INGAR")["carga_neta"] == 0.76
+    assert calcular("XXX") is None
+    assert calcular("") is None
+
+
+def test_backfill_recalcula_versiones_anteriores():
+    pytest.importorskip("dotenv")
+    mongomock = pytest.importorskip("mongomock")
+    from database.init_db import asignar_caracteristicas
+
+    db = mongomock.MongoClient().db
+    db.secuencias.insert_many([
+        {"secuencia": "MKVLA", "caracteristicas": {"punto_isoelectrico": 9.9}},
+        {"secuencia": "PETER"},
+        {"secuencia": "MEEPQ", "caracteristicas": calcular("MEEPQ")},
+    ])
+    assert asignar_caracteristicas(db) == 2
+    assert all(d["caracteristicas"]["version"] == VERSION for d in db.secuencias.find())
+    assert asignar_caracteristicas(db) == 0
@@ -0,0 +1,54 @@
+import gzip
+
+import pytest
+
+
+@pytest.fixture
+def cliente(backend_main):
+    from fastapi.testclient import TestClient
+    return TestClient(backend_main.app)
+
+
+def test_txt_comprimido_que_se_expande_de_mas_se_rechaza(cliente, backend_main, monkeypatch):
+    monkeypatch.setattr(backend_main, "MAX_BYTES_SECUENCIA", 1000)
+    bomba = gzip.compress(b"A" * 100_000)
+    respuesta = cliente.post(
+        "/cargar_secuencia/", data={"nombre": "bomba"}, files={"archivo": ("x.txt.gz", bomba)}
+    )
+    assert respuesta.status_code == 413
+
+
+def test_txt_comprimido_dentro_del_limite(cliente):
+    datos = gzip.compress(b"MKVLAAGIVALLLAAGCSSA\n")
+    respuesta = cliente.post(
+        "/cargar_secuencia/", data={"nombre": "chica"}, files={"archivo": ("x.txt.gz", datos)}
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["registro"]["secuencia"] == "MKVLAAGIVALLLAAGCSSA"
+
+
+def test_fasta_comprimido_con_varios_registros(cliente):
+    import random
+    residuos = ["M" + "".join(random.choices("ACDEFGHIKLMNPQRSTVWY", k=30)) for _ in range(2)]
+    fasta = "".join(f">p{i} proteina {i}\n{r[:15]}\n{r[15:]}\n" for i, r in enumerate(residuos))
+    respuesta = cliente.post(
+        "/cargar_secuencia/", data={"nombre": "lote"}, files={"archivo": ("x.fasta.gz", gzip.compress(fasta.encode()))}
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["aceptadas"] == 2
+
+
+def test_parse_fasta_string_con_biopython_usa_la_primera_palabra():
+    pytest.importorskip("Bio")
+    from modules.biopython_utils import parse_fasta_string
+
+    fasta = ">p1 proteina uno\nMKV\nLAA\n\n>p2\nGIV\n"
+    assert parse_fasta_string(fasta) == [("p1", "MKVLAA"), ("p2", "GIV")]
+
+
+def test_parse_fasta_string_sin_biopython_conserva_el_encabezado(monkeypatch):
+    from modules import biopython_utils
+
+    monkeypatch.setattr(biopython_utils, "_safe_import_biopython", lambda: (None, None))
+    fasta = ">p1 proteina uno\nMKV\nLAA\n\n>p2\nGIV\n"
+    assert biopython_utils.parse_fasta_string(fasta) == [("p1 proteina uno", "MKVLAA"), ("p2", "GIV")]
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+
+from modules.cargas import AlmacenCargas, ErrorCarga
+
+
+async def _flujo(*bloques):
+    for bloque in bloques:
+        yield bloque
+
+
+def _subir(almacen, carga_id, numero, datos, sha256="auto"):
+    if sha256 == "auto":
+        sha256 = hashlib.sha256(datos).hexdigest()
+    return asyncio.run(almacen.guardar_parte(carga_id, numero, _flujo(datos[:3], datos[3:]), sha256))
+
+
+def test_partes_verificadas_y_ensambladas(tmp_path):
+    almacen = AlmacenCargas(tmp_path)
+    carga_id = almacen.crear(nombre="x")["carga_id"]
+    assert _subir(almacen, carga_id, 1, b">b\nKLM\n") == 7
+    assert _subir(almacen, carga_id, 0, b">a\nMKV\n") == 7
+    assert almacen.partes(carga_id) == [0, 1]
+    ruta = almacen.ensamblar(carga_id, 2)
+    assert ruta.read_bytes() == b">a\nMKV\n>b\nKLM\n"
+
+
+def test_parte_sin_checksum_o_con_checksum_erroneo_se_rechaza(tmp_path):
+    almacen = AlmacenCargas(tmp_path)
+    carga_id = almacen.crear(nombre="x")["carga_id"]
+    with pytest.raises(ErrorCarga, match="Falta"):
+        _subir(almacen, carga_id, 0, b"MKV", sha256=None)
+    with pytest.raises(ErrorCarga, match="no coincide"):
+        _subir(almacen, carga_id, 0, b"MKV", sha256="0" * 64)
+    assert almacen.partes(carga_id) == []
+    assert not list((tmp_path / carga_id).glob("*.tmp"))
+
+
+def test_transicion_solo_la_gana_una_llamada(tmp_path):
+    almacen = AlmacenCargas(tmp_path)
+    carga_id = almacen.crear(nombre="x")["carga_id"]
+    assert almacen.transicion(carga_id, "abierta", "ensamblando")["estado"] == "ensamblando"
+    with pytest.raises(ErrorCarga, match="ensamblando"):
+        almacen.transicion(carga_id, "abierta", "ensamblando")
+    with pytest.raises(ErrorCarga):
+        _subir(almacen, carga_id, 0, b"MKV")
+
+
+def test_limpiar_respeta_ttl_y_las_ingestas_en_curso(tmp_path):
+    almacen = AlmacenCargas(tmp_path)
+    vieja = almacen.crear(nombre="vieja")["carga_id"]
+    activa = almacen.crear(nombre="activa")["carga_id"]
+    almacen.actualizar(activa, estado="procesando")
+    reciente = almacen.crear(nombre="reciente")["carga_id"]
+    hace_dos_dias = time.time() - 2 * 86400
+    for carga_id in (vieja, activa):
+        os.utime(tmp_path / carga_id, (hace_dos_dias, hace_dos_dias))
+
+    assert almacen.limpiar(86400) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([activa, reciente])
+
+
+def test_recuperar_tras_un_reinicio(tmp_path):
+    almacen = AlmacenCargas(tmp_path)
+    ensamblada = almacen.crear(nombre="ensamblada")["carga_id"]
+    _subir(almacen, ensamblada, 0, b">a\nMKV\n")
+    almacen.ensamblar(ensamblada, 1)
+    almacen.actualizar(ensamblada, estado="procesando")
+    a_medias = almacen.crear(nombre="a_medias")["carga_id"]
+    _subir(almacen, a_medias, 0, b">a\nMKV\n")
+    almacen.actualizar(a_medias, estado="ensamblando")
+    perdida = almacen.crear(nombre="perdida")["carga_id"]
+    almacen.actualizar(perdida, estado="en_cola")
+
+    retomar = AlmacenCargas(tmp_path).recuperar()
+    assert [s["carga_id"] for s in retomar] == [ensamblada]
+    assert almacen.sesion(ensamblada)["estado"] == "en_cola"
+    assert almacen.estado(a_medias)["estado"] == "abierta"
+    assert almacen.partes(a_medias) == [0]
+    assert almacen.sesion(perdida)["estado"] == "error"
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+mongomock = pytest.importorskip("mongomock")
+
+from database import conexion
+from database.conexion import BaseDatosNoDisponible, CircuitoMongo
+from database.repositorio import Repositorio
+
+
+def test_circuito_se_abre_tras_el_umbral():
+    circuito = CircuitoMongo(umbral=2, espera=60)
+    circuito.registrar_fallo()
+    assert circuito.permite()
+    circuito.registrar_fallo()
+    assert circuito.estado == CircuitoMongo.ABIERTO
+    assert not circuito.permite()
+
+
+def test_semiabierto_deja_pasar_una_prueba_y_un_exito_lo_cierra():
+    circuito = CircuitoMongo(umbral=1, espera=0)
+    circuito.registrar_fallo()
+    assert circuito.permite()  # operación de prueba
+    assert circuito.estado == CircuitoMongo.SEMIABIERTO
+    assert not circuito.permite()
+    circuito.registrar_exito()
+    assert circuito.estado == CircuitoMongo.CERRADO
+    assert circuito.permite()
+
+
+def test_semiabierto_vuelve_a_abrir_si_la_prueba_falla():
+    circuito = CircuitoMongo(umbral=3, espera=0)
+    circuito.abrir()
+    assert circuito.permite()
+    circuito.registrar_fallo()
+    assert circuito.estado == CircuitoMongo.ABIERTO
+
+
+@pytest.mark.skipif(not conexion.HAVE_PYMONGO, reason="requiere pymongo")
+def test_comando_exitoso_cierra_el_circuito(monkeypatch):
+    circuito = CircuitoMongo(umbral=1, espera=0)
+    circuito.abrir()
+    circuito.permite()
+    monkeypatch.setattr(conexion, "circuito", circuito)
+    conexion._MonitorComandos().succeeded(object())
+    assert circuito.estado == CircuitoMongo.CERRADO
+
+
+def test_escritura_con_circuito_abierto_falla_en_lugar_de_ir_a_memoria(monkeypatch):
+    import database.repositorio as repositorio
+
+    circuito = CircuitoMongo(umbral=1, espera=60)
+    circuito.abrir()
+    monkeypatch.setattr(repositorio, "circuito", circuito)
+    repo = Repositorio(mongomock.MongoClient().db.secuencias, secuencial=True)
+
+    with pytest.raises(BaseDatosNoDisponible):
+        asyncio.run(repo.insertar({"nombre": "x"}))
+    with pytest.raises(BaseDatosNoDisponible):
+        asyncio.run(repo.insertar_muchos([{"nombre": "x"}]))
+    assert len(repo.memoria) == 0
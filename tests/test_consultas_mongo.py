@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+mongomock = pytest.importorskip("mongomock")
+
+from database import conexion, repositorio
+from database.conexion import CircuitoMongo
+from database.init_db import create_indexes
+from database.repositorio import Repositorio
+
+
+@pytest.fixture
+def main(backend_main, monkeypatch):
+    """backend.main contra una base mongomock con los índices de producción"""
+    main = backend_main
+    circuito = CircuitoMongo()
+    monkeypatch.setattr(conexion, "circuito", circuito)
+    monkeypatch.setattr(repositorio, "circuito", circuito)
+    db = mongomock.MongoClient().db
+    create_indexes(db)
+    for nombre in ("secuencias", "experimentos", "alertas"):
+        monkeypatch.setattr(main, f"{nombre}_col", db[nombre])
+    monkeypatch.setattr(main, "experimentos_repo", Repositorio(db.experimentos))
+    monkeypatch.setattr(main, "experimentos_diferidos", None)
+    monkeypatch.setattr(main, "db_prueba", db, raising=False)
+    return main
+
+
+def _experimento(tipo, secuencia_idx, fecha, v):
+    doc = {"secuencia_idx": secuencia_idx, "fecha": fecha, "resultado": {"v": v}}
+    if tipo is not None:
+        doc["tipo"] = tipo
+    return doc
+
+
+EXPERIMENTOS = [
+    _experimento("PLM", 1, "2024-01-01T00:00:00", "plm viejo"),
+    _experimento("PLM", 1, "2024-03-01T00:00:00", "plm nuevo"),
+    _experimento("Laboratorio", 1, "2024-02-01T00:00:00", "lab"),
+    _experimento("GemeloDigital", 2, "2024-04-01T00:00:00", "otra secuencia"),
+    _experimento("Otro", 1, "2024-05-01T00:00:00", "tipo no pedido"),
+    _experimento(None, 3, "2024-06-01T00:00:00", "sin tipo"),
+]
+
+
+def test_resumen_por_tipo_agrupa_en_la_base(main):
+    main.db_prueba.experimentos.insert_many([dict(d) for d in EXPERIMENTOS])
+    assert asyncio.run(main._resumen_por_tipo()) == {
+        "PLM": {"cantidad": 2, "fecha_ultima": "2024-03-01T00:00:00"},
+        "Laboratorio": {"cantidad": 1, "fecha_ultima": "2024-02-01T00:00:00"},
+        "GemeloDigital": {"cantidad": 1, "fecha_ultima": "2024-04-01T00:00:00"},
+        "Otro": {"cantidad": 1, "fecha_ultima": "2024-05-01T00:00:00"},
+        "Desconocido": {"cantidad": 1, "fecha_ultima": "2024-06-01T00:00:00"},
+    }
+
+
+def test_contar_usa_la_coleccion(main):
+    main.db_prueba.experimentos.insert_many([dict(d) for d in EXPERIMENTOS])
+    # La lista en memoria no se consulta con MongoDB activo
+    assert main._contar(main.experimentos_col, []) == len(EXPERIMENTOS)
+    assert main._contar_tipo() == len(EXPERIMENTOS)
+    assert main._contar_tipo("PLM") == 2
+    assert main._contar_tipo("Inexistente") == 0
+
+
+def test_ultimos_resultados_por_tipo(main):
+    main.db_prueba.experimentos.insert_many([dict(d) for d in EXPERIMENTOS])
+    assert main._ultimos_resultados(1) == {"PLM": {"v": "plm nuevo"}, "Laboratorio": {"v": "lab"}}
+    assert main._ultimos_resultados(1, tipos=("Laboratorio",)) == {"Laboratorio": {"v": "lab"}}
+    assert main._ultimos_resultados(2) == {"GemeloDigital": {"v": "otra secuencia"}}
+    assert main._ultimos_resultados(99) == {}
+
+
+def test_indice_compuesto_de_ultimos_resultados(main):
+    claves = [info["key"] for info in main.db_prueba.experimentos.index_information().values()]
+    assert [("secuencia_idx", 1), ("tipo", 1), ("fecha", -1)] in claves
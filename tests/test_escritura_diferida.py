@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+mongomock = pytest.importorskip("mongomock")
+
+from database import conexion
+from database.conexion import CircuitoMongo
+from database.escritura_diferida import EscrituraDiferida
+
+
+class _ColeccionCaida:
+    """Colección cuyo insert siempre falla: los documentos quedan en cola"""
+    name = "experimentos"
+
+    def __init__(self):
+        self.intentos = 0
+
+    def insert_many(self, docs, ordered=False):
+        self.intentos += 1
+        raise RuntimeError("MongoDB caído")
+
+    insert_one = insert_many
+
+
+def _esperar(condicion, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_buscar_filtra_pendientes_por_igualdad_y_conjunto():
+    buffer = EscrituraDiferida(_ColeccionCaida(), intervalo=0.01, reintentos=100)
+    try:
+        buffer.encolar({"tipo": "PLM", "modelo": "esm2", "hash_secuencia": "a"})
+        buffer.encolar({"tipo": "PLM", "modelo": "protbert", "hash_secuencia": "b"})
+        buffer.encolar({"tipo": "Laboratorio", "hash_secuencia": "a"})
+
+        assert [d["modelo"] for d in buffer.buscar(tipo="PLM", hash_secuencia={"a", "b"})] == ["esm2", "protbert"]
+        assert len(buffer.buscar(hash_secuencia="a")) == 2
+        assert all("_id" in d for d in buffer.buscar(tipo=["PLM", "Laboratorio"]))
+    finally:
+        buffer.cerrar()
+
+
+def test_los_reintentos_estan_acotados():
+    coleccion = _ColeccionCaida()
+    buffer = EscrituraDiferida(coleccion, intervalo=0.01, reintentos=0)
+    buffer.encolar({"tipo": "PLM"})
+    assert _esperar(lambda: buffer.descartados == 1)
+    assert coleccion.intentos == 1
+    assert buffer.pendientes() == []
+    buffer.cerrar()
+
+
+def test_persiste_y_libera_los_pendientes():
+    coleccion = mongomock.MongoClient().db.experimentos
+    buffer = EscrituraDiferida(coleccion, intervalo=0.01)
+    registro = buffer.encolar({"tipo": "PLM"})
+    assert buffer.vaciar()
+    assert coleccion.count_documents({}) == 1
+    assert buffer.obtener(registro["id"]) is None
+    buffer.cerrar()
+
+
+def test_superponer_usa_la_instantanea_previa_a_la_consulta():
+    coleccion = mongomock.MongoClient().db.alertas
+    buffer = EscrituraDiferida(coleccion, intervalo=0.01)
+    registro = buffer.encolar({"mensaje": "nueva"})
+    pendientes = buffer.pendientes()
+    # Se confirma entre la instantánea y la consulta a la base
+    assert buffer.vaciar()
+    docs, _ = buffer.superponer([], None, 10, pendientes=pendientes)
+    assert [d["id"] for d in docs] == [registro["id"]]
+    buffer.cerrar()
+
+
+def test_actualizar_un_pendiente():
+    buffer = EscrituraDiferida(_ColeccionCaida(), intervalo=0.01, reintentos=100)
+    try:
+        registro = buffer.encolar({"mensaje": "nueva", "resuelta": False})
+        assert buffer.actualizar(registro["id"], {"resuelta": True})
+        assert buffer.obtener(registro["id"])["resuelta"] is True
+        assert not buffer.actualizar("no-existe", {"resuelta": True})
+    finally:
+        buffer.cerrar()
+
+
+class _ColeccionLenta:
+    """Colección mongomock cuyo insert_many espera una señal antes de insertar"""
+    name = "alertas"
+
+    def __init__(self):
+        self.base = mongomock.MongoClient().db.alertas
+        self.insertando = threading.Event()
+        self.seguir = threading.Event()
+
+    def insert_many(self, docs, ordered=False):
+        docs = [dict(d) for d in docs]  # lo que se serializó al enviar
+        self.insertando.set()
+        self.seguir.wait(5)
+        return self.base.insert_many(docs, ordered=ordered)
+
+    def update_one(self, *args, **kwargs):
+        return self.base.update_one(*args, **kwargs)
+
+
+def test_actualizar_durante_la_insercion_se_aplica_despues():
+    coleccion = _ColeccionLenta()
+    buffer = EscrituraDiferida(coleccion, intervalo=0.01)
+    registro = buffer.encolar({"mensaje": "nueva", "resuelta": False})
+    assert coleccion.insertando.wait(5)
+    assert buffer.actualizar(registro["id"], {"resuelta": True})
+    coleccion.seguir.set()
+    assert buffer.vaciar()
+    assert coleccion.base.find_one()["resuelta"] is True
+    buffer.cerrar()
+
+
+@pytest.fixture
+def main(backend_main, monkeypatch):
+    """backend.main con experimentos en mongomock y escritura diferida que no confirma"""
+    main = backend_main
+    monkeypatch.setattr(conexion, "circuito", CircuitoMongo())
+    coleccion = mongomock.MongoClient().db.experimentos
+    buffer = EscrituraDiferida(_ColeccionCaida(), intervalo=0.01, reintentos=100)
+    monkeypatch.setattr(main, "experimentos_col", coleccion)
+    monkeypatch.setattr(main, "experimentos_diferidos", buffer)
+    yield main
+    buffer.cerrar()
+
+
+def test_analisis_previo_ve_los_pendientes(main):
+    main.experimentos_col.insert_one({
+        "tipo": "PLM", "hash_secuencia": "h", "modelo": "esm2", "secuencia_idx": 1,
+        "resultado": {"v": "viejo"}, "fecha": "2024-01-01T00:00:00"
+    })
+    main.experimentos_diferidos.encolar({
+        "tipo": "PLM", "hash_secuencia": "h", "modelo": "esm2", "secuencia_idx": 1,
+        "resultado": {"v": "nuevo"}, "fecha": "2024-02-01T00:00:00"
+    })
+    assert main._analisis_previo("h", "esm2")["resultado"] == {"v": "nuevo"}
+    assert main._analisis_previo("h", "protbert") is None
+
+
+def test_analisis_previos_ve_los_pendientes(main):
+    main.experimentos_col.insert_one({
+        "tipo": "PLM", "hash_secuencia": "a", "modelo": "esm2", "secuencia_idx": 1,
+        "resultado": {"v": "a"}, "fecha": "2024-01-01T00:00:00"
+    })
+    main.experimentos_diferidos.encolar({
+        "tipo": "PLM", "hash_secuencia": "b", "modelo": "esm2", "secuencia_idx": 2,
+        "resultado": {"v": "b"}, "fecha": "2024-01-01T00:00:00"
+    })
+    previos = main._analisis_previos(["a", "b", "c"], "esm2")
+    assert {h: p["resultado"]["v"] for h, p in previos.items()} == {"a": "a", "b": "b"}
+
+
+def test_ultimos_resultados_prefiere_el_pendiente_mas_reciente(main):
+    main.experimentos_col.insert_many([
+        {"tipo": "PLM", "secuencia_idx": 1, "resultado": {"v": "plm"}, "fecha": "2024-03-01T00:00:00"},
+        {"tipo": "Laboratorio", "secuencia_idx": 1, "resultado": {"v": "lab viejo"}, "fecha": "2024-01-01T00:00:00"},
+    ])
+    main.experimentos_diferidos.encolar(
+        {"tipo": "Laboratorio", "secuencia_idx": 1, "resultado": {"v": "lab nuevo"}, "fecha": "2024-02-01T00:00:00"}
+    )
+    main.experimentos_diferidos.encolar(
+        {"tipo": "PLM", "secuencia_idx": 1, "resultado": {"v": "plm viejo"}, "fecha": "2023-01-01T00:00:00"}
+    )
+    assert main._ultimos_resultados(1) == {"PLM": {"v": "plm"}, "Laboratorio": {"v": "lab nuevo"}}
+
+
+def test_resolver_alerta_pendiente_sin_vaciar_la_cola(main, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    buffer = EscrituraDiferida(_ColeccionCaida(), intervalo=0.01, reintentos=100)
+    monkeypatch.setattr(main, "alertas_col", mongomock.MongoClient().db.alertas)
+    monkeypatch.setattr(main, "alertas_diferidas", buffer)
+    try:
+        alerta = buffer.encolar({"usuario": "u", "mensaje": "m", "resuelta": False})
+        respuesta = TestClient(main.app).put(f"/alerta/{alerta['id']}/resolver")
+        assert respuesta.status_code == 200, respuesta.text
+        assert buffer.obtener(alerta["id"])["resuelta"] is True
+    finally:
+        buffer.cerrar()
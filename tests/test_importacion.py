@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def cliente(backend_main, monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(backend_main, "IMPORTACION_DIR", tmp_path.resolve())
+    monkeypatch.setitem(backend_main.sesiones_db, "admin-test", {"rol": "admin"})
+    monkeypatch.setitem(backend_main.sesiones_db, "usuario-test", {"rol": "investigador"})
+    return TestClient(backend_main.app)
+
+
+def _fasta(tmp_path, n):
+    # Residuos distintos en cada corrida: la ingesta deduplica por contenido
+    semilla = uuid.uuid4().hex.upper().translate(str.maketrans("0123456789ABCDEF", "ACDEFGHIKLMNPQRS"))
+    registros = [f">p{i}\nM{semilla}{'W' * (i + 1)}\n" for i in range(n)]
+    (tmp_path / "lote.fasta").write_text("".join(registros))
+
+
+def test_importacion_en_segundo_plano(cliente, tmp_path):
+    _fasta(tmp_path, 3)
+    auth = {"Authorization": "Bearer admin-test"}
+    respuesta = cliente.post("/admin/importar_fasta/", data={"ruta": "lote.fasta", "procesos": 1}, headers=auth)
+    assert respuesta.status_code == 202, respuesta.text
+    importacion_id = respuesta.json()["importacion_id"]
+
+    estado = cliente.get(f"/admin/importar_fasta/{importacion_id}", headers=auth).json()
+    assert estado["estado"] == "completado"
+    assert (estado["aceptadas"], estado["duplicadas"], estado["rechazadas"]) == (3, 0, 0)
+    assert estado["resultado"]["aceptadas"] == 3
+    assert estado["fecha_fin"] is not None
+
+
+def test_importacion_requiere_admin_y_archivo(cliente):
+    datos = {"ruta": "lote.fasta"}
+    assert cliente.post("/admin/importar_fasta/", data=datos).status_code == 401
+    assert cliente.post("/admin/importar_fasta/", data=datos, headers={"Authorization": "Bearer usuario-test"}).status_code == 403
+    assert cliente.post("/admin/importar_fasta/", data=datos, headers={"Authorization": "Bearer admin-test"}).status_code == 404
+    assert cliente.get("/admin/importar_fasta/x", headers={"Authorization": "Bearer admin-test"}).status_code == 404
+
+
+def _nombres(lotes):
+    registros, rechazos = [], []
+    for validos, rechazados in lotes:
+        registros += [d["nombre"] for d in validos]
+        rechazos += [r["registro"] for r in rechazados]
+    return registros, rechazos
+
+
+@pytest.mark.parametrize("procesos, tam_bloque", [(1, 16), (2, 16), (3, 40), (2, 1 << 20)])
+def test_nombres_sin_encabezado_no_dependen_del_reparto(tmp_path, procesos, tam_bloque):
+    from modules.ingesta_fasta import lotes_fasta, lotes_paralelos
+
+    registros = [f">p{i}\nMKV{'W' * i}\n" if i % 3 else f">\nMKV{'A' * i}\n" for i in range(12)]
+    registros[4] = ">\nMK1V\n"  # rechazado sin encabezado
+    ruta = tmp_path / "lote.fasta"
+    ruta.write_text("".join(registros))
+
+    serie = _nombres(lotes_fasta(ruta.read_text().splitlines(), "lote", None, "fasta", 2))
+    paralelo = _nombres(lotes_paralelos(str(ruta), "lote", procesos=procesos, lote=2, tam_bloque=tam_bloque))
+    assert paralelo == serie
+    assert serie[0][:2] == ["lote_1", "p1"]
+    assert serie[1] == ["lote_5"]
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+
+import pytest
+
+
+@pytest.fixture
+def cliente(backend_main, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(backend_main, "trabajos_plm", OrderedDict())
+    # TestClient ejecuta las tareas en segundo plano antes de devolver la respuesta
+    return TestClient(backend_main.app)
+
+
+def _lote(cliente, **datos):
+    respuesta = cliente.post("/analizar_plm/lote/", data=datos)
+    assert respuesta.status_code == 202, respuesta.text
+    return cliente.get(f"/analizar_plm/lote/{respuesta.json()['trabajo_id']}").json()
+
+
+def test_ids_repetidos_cuentan_una_vez(cliente):
+    trabajo = _lote(cliente, ids="1, 01;1", modelos="esm2,protbert")
+    assert trabajo["estado"] == "completado"
+    assert trabajo["total"] == 2
+    assert trabajo["procesados"] == 2
+    assert trabajo["no_encontradas"] == 0
+    assert trabajo["progreso"] == 1.0
+
+
+def test_ids_inexistentes_y_reutilizacion(cliente):
+    trabajo = _lote(cliente, ids="1,999999", modelos="esm2")
+    assert (trabajo["total"], trabajo["procesados"], trabajo["no_encontradas"]) == (2, 1, 1)
+    assert _lote(cliente, ids="1", modelos="esm2")["reutilizados"] == 1
+
+
+def test_error_deja_el_trabajo_terminado(cliente, backend_main, monkeypatch):
+    async def fallar(trabajo, docs, modelo):
+        raise RuntimeError("modelo no disponible")
+
+    monkeypatch.setattr(backend_main, "_analizar_bloque", fallar)
+    trabajo = _lote(cliente, ids="1", modelos="esm2")
+    assert trabajo["estado"] == "error"
+    assert trabajo["error"] == "modelo no disponible"
+    assert trabajo["fecha_fin"] is not None
+
+
+def test_peticion_invalida(cliente):
+    assert cliente.post("/analizar_plm/lote/", data={"modelos": "esm2"}).status_code == 400
+    assert cliente.post("/analizar_plm/lote/", data={"ids": "1", "modelos": "gpt"}).status_code == 400
+    assert cliente.post("/analizar_plm/lote/", data={"ids": "1", "limite": 0}).status_code == 400
+    assert cliente.get("/analizar_plm/lote/no-existe").status_code == 404
+
+
+@pytest.mark.parametrize("estado, total, procesados, fecha_fin, progreso", [
+    ("en_cola", None, 0, None, 0.0),
+    ("procesando", 8, 2, None, 0.25),
+    ("procesando", 3, 3, None, 1.0),
+    ("error", 8, 4, "2024-01-01T00:00:00", 0.5),
+    ("error", None, 0, "2024-01-01T00:00:00", 1.0),
+    ("completado", 0, 0, "2024-01-01T00:00:00", 1.0),
+])
+def test_progreso(cliente, backend_main, estado, total, procesados, fecha_fin, progreso):
+    backend_main.trabajos_plm["t"] = {
+        "estado": estado, "total": total, "procesados": procesados, "fecha_fin": fecha_fin
+    }
+    assert cliente.get("/analizar_plm/lote/t").json()["progreso"] == progreso
+
+
+def test_previo_sin_resultado_se_recalcula_en_su_fila(cliente, backend_main, monkeypatch):
+    import random
+
+    monkeypatch.setattr(backend_main.plm, "analizar_proteina", lambda secuencia, modelo="esm2": {"secuencia": secuencia})
+    residuos, idxs = [], []
+    for nombre in ("sin_resultado", "nueva"):
+        residuos.append("M" + "".join(random.choices("ACDEFGHIKLMNPQRSTVWY", k=40)))
+        registro = cliente.post("/cargar_secuencia/", data={"nombre": nombre, "secuencia_texto": residuos[-1]}).json()["registro"]
+        idxs.append(registro["idx"])
+    backend_main.experimentos_db.insertar({
+        "tipo": "PLM", "modelo": "esm2", "secuencia_idx": idxs[0], "resultado": None,
+        "hash_secuencia": backend_main.sequence_hash(residuos[0]), "fecha": "2024-01-01T00:00:00"
+    })
+
+    trabajo = _lote(cliente, ids=",".join(map(str, idxs)), modelos="esm2")
+    assert trabajo["estado"] == "completado", trabajo
+    assert (trabajo["analizados"], trabajo["reutilizados"]) == (2, 0)
+    for idx, secuencia in zip(idxs, residuos):
+        ultimo = backend_main._analisis_previo(backend_main.sequence_hash(secuencia), "esm2")
+        assert (ultimo["secuencia_idx"], ultimo["resultado"]) == (idx, {"secuencia": secuencia})
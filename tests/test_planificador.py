@@ -0,0 +1,53 @@
+from modules.ai_inference import InferenceScheduler
+
+
+def _resultados(scheduler, secuencias, timeout=5):
+    futuros = [scheduler.submit("m", s) for s in secuencias]
+    salida = []
+    for futuro in futuros:
+        try:
+            salida.append(futuro.result(timeout=timeout))
+        except Exception as e:
+            salida.append(e)
+    return salida
+
+
+def test_agrupa_y_devuelve_en_orden():
+    lotes = []
+
+    def run_batch(model_id, secuencias):
+        lotes.append(list(secuencias))
+        return [len(s) for s in secuencias]
+
+    scheduler = InferenceScheduler(run_batch, window_ms=50, max_batch=8)
+    assert _resultados(scheduler, ["MKV", "M", "MKVLA"]) == [3, 1, 5]
+    assert max(len(l) for l in lotes) > 1
+    assert scheduler.stats()["requests"] == 3
+
+
+def test_error_de_lote_solo_falla_la_secuencia_culpable():
+    def run_batch(model_id, secuencias):
+        if "X" in secuencias:
+            raise ValueError("residuo inválido")
+        return [len(s) for s in secuencias]
+
+    scheduler = InferenceScheduler(run_batch, window_ms=50, max_batch=8)
+    resultados = _resultados(scheduler, ["MKV", "X", "MK"])
+    assert resultados[0] == 3 and resultados[2] == 2
+    assert isinstance(resultados[1], ValueError)
+    assert scheduler.stats()["retried"] == 3
+
+
+def test_cantidad_de_resultados_incorrecta_se_reintenta():
+    def run_batch(model_id, secuencias):
+        # Pierde un resultado en los lotes de más de una secuencia
+        return [len(s) for s in secuencias][:max(1, len(secuencias) - 1)]
+
+    scheduler = InferenceScheduler(run_batch, window_ms=50, max_batch=8)
+    assert _resultados(scheduler, ["MKV", "MK"]) == [3, 2]
+
+
+def test_buckets_respetan_el_presupuesto_de_tokens():
+    scheduler = InferenceScheduler(lambda m, s: s, max_tokens=10)
+    buckets = scheduler.buckets([("A" * n, None) for n in (5, 1, 2, 4)])
+    assert [[len(s) for s, _ in b] for b in buckets] == [[1, 2], [4, 5]]
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+mongomock = pytest.importorskip("mongomock")
+
+from database import repositorio
+from database.conexion import CircuitoMongo
+from database.memoria import AlmacenMemoria, ClaveDuplicada
+from database.repositorio import Repositorio
+
+
+@pytest.fixture(params=["memoria", "mongo"])
+def repo(request, monkeypatch):
+    monkeypatch.setattr(repositorio, "circuito", CircuitoMongo())
+    if request.param == "memoria":
+        return Repositorio(None, AlmacenMemoria(unicos=("idx", "hash_secuencia")), secuencial=True)
+    coleccion = mongomock.MongoClient().db.secuencias
+    # Como database.init_db: únicos solo entre los documentos que tienen el campo
+    for campo in ("idx", "hash_secuencia"):
+        coleccion.create_index(campo, unique=True, partialFilterExpression={campo: {"$exists": True}})
+    return Repositorio(coleccion, secuencial=True)
+
+
+def _correr(coro):
+    return asyncio.run(coro)
+
+
+def test_insertar_asigna_idx_e_id(repo):
+    primero = _correr(repo.insertar({"nombre": "a", "hash_secuencia": "ha"}))
+    segundo = _correr(repo.insertar({"nombre": "b", "hash_secuencia": "hb"}))
+    assert (primero["idx"], segundo["idx"]) == (0, 1)
+    assert _correr(repo.buscar_por_id(segundo["id"]))["nombre"] == "b"
+    assert _correr(repo.buscar_por_idx(0))["nombre"] == "a"
+    assert _correr(repo.contar()) == 2
+
+
+def test_insertar_duplicado_lanza_clave_duplicada(repo):
+    _correr(repo.insertar({"hash_secuencia": "ha"}))
+    with pytest.raises(ClaveDuplicada):
+        _correr(repo.insertar({"hash_secuencia": "ha"}))
+
+
+def test_insertar_muchos_omite_duplicados(repo):
+    _correr(repo.insertar({"nombre": "a", "hash_secuencia": "ha"}))
+    insertados, duplicados = _correr(repo.insertar_muchos([
+        {"nombre": "b", "hash_secuencia": "hb"},
+        {"nombre": "a2", "hash_secuencia": "ha"},
+        {"nombre": "c", "hash_secuencia": "hc"},
+    ]))
+    assert [d["nombre"] for d in insertados] == ["b", "c"]
+    assert duplicados == 1
+    assert all("id" in d and "_id" not in d for d in insertados)
+    assert _correr(repo.buscar_unico("hash_secuencia", "hc"))["nombre"] == "c"
+
+
+def test_buscar_por_id_inexistente_o_invalido(repo):
+    assert _correr(repo.buscar_por_id("no-es-un-id")) is None
+    assert _correr(repo.buscar_por_idx(99)) is None
+
+
+@pytest.mark.parametrize("descendente", [False, True])
+def test_paginacion_por_clave_recorre_todo_sin_repetir(repo, descendente):
+    _correr(repo.insertar_muchos([{"nombre": str(i), "secuencia": "MKV" * i} for i in range(5)]))
+    vistos, cursor = [], None
+    while True:
+        docs, cursor = _correr(repo.buscar_pagina(2, cursor, excluir=("secuencia",), descendente=descendente))
+        assert len(docs) <= 2
+        assert all("secuencia" not in d for d in docs)
+        vistos += [d["nombre"] for d in docs]
+        if cursor is None:
+            break
+    esperado = [str(i) for i in range(5)]
+    assert vistos == (esperado[::-1] if descendente else esperado)
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+
+def _residuos_unicos():
+    # Contenido nuevo en cada prueba: la carga deduplica por hash
+    return "M" + "".join(random.choices("ACDEFGHIKLMNPQRSTVWY", k=40))
+
+
+@pytest.fixture
+def cliente(backend_main, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    llamadas = []
+    analizar = backend_main.plm.analizar_proteina
+
+    def contar(secuencia, modelo="esm2"):
+        llamadas.append(secuencia)
+        return analizar(secuencia, modelo)
+
+    monkeypatch.setattr(backend_main.plm, "analizar_proteina", contar)
+    cliente = TestClient(backend_main.app)
+    cliente.llamadas = llamadas
+    return cliente
+
+
+def _experimentos_plm(main, idx):
+    return [e for e in main.experimentos_db if e.get("tipo") == "PLM" and e.get("secuencia_idx") == idx]
+
+
+def test_misma_secuencia_reutiliza_sin_registrar(cliente, backend_main):
+    residuos = _residuos_unicos()
+    registro = cliente.post("/cargar_secuencia/", data={"nombre": "orig", "secuencia_texto": residuos}).json()["registro"]
+    idx = registro["idx"]
+
+    primera = cliente.post("/analizar_plm/", data={"idx_or_id": str(idx), "modelo": "esm2"}).json()
+    assert primera["mensaje"] == "Análisis PLM ejecutado"
+    segunda = cliente.post("/analizar_plm/", data={"idx_or_id": str(idx), "modelo": "esm2"}).json()
+    assert segunda["reutilizado"] and segunda["reutilizado_de"] == idx
+    assert segunda["resultado"] == primera["resultado"]
+    assert len(_experimentos_plm(backend_main, idx)) == 1
+    assert cliente.llamadas == [residuos]
+
+
+def test_otra_secuencia_con_el_mismo_contenido_copia_el_resultado(cliente, backend_main):
+    residuos = _residuos_unicos()
+    original = cliente.post("/cargar_secuencia/", data={"nombre": "orig", "secuencia_texto": residuos}).json()["registro"]
+    assert cliente.post("/cargar_secuencia/", data={"nombre": "otra", "secuencia_texto": residuos}).json()["duplicada"]
+    # Duplicado heredado (anterior al índice único), como los que marca init_db.marcar_duplicadas
+    duplicada = backend_main.secuencias_db.insertar(
+        {"nombre": "dup", "secuencia": residuos, "duplicada_de": original["id"]}, secuencial=True
+    )
+
+    ejecutado = cliente.post("/analizar_plm/", data={"idx_or_id": str(original["idx"])}).json()
+    copia = cliente.post("/analizar_plm/", data={"idx_or_id": str(duplicada["idx"])}).json()
+    assert copia["reutilizado"] and copia["reutilizado_de"] == original["idx"]
+    assert copia["resultado"] == ejecutado["resultado"]
+    assert [e["resultado"] for e in _experimentos_plm(backend_main, duplicada["idx"])] == [ejecutado["resultado"]]
+    assert len(cliente.llamadas) == 1
+
+
+def test_migracion_marca_duplicadas_y_crea_indice_unico():
+    pytest.importorskip("dotenv")
+    mongomock = pytest.importorskip("mongomock")
+    from pymongo.errors import DuplicateKeyError
+    from database.init_db import asignar_hashes_secuencias
+    from modules.biopython_utils import sequence_hash
+
+    db = mongomock.MongoClient().db
+    # Índice no único que dejaban versiones anteriores con duplicados
+    db.secuencias.create_index("hash_secuencia")
+    primera = db.secuencias.insert_one({"secuencia": "MKV"}).inserted_id
+    repetida = db.secuencias.insert_one({"secuencia": "MKV"}).inserted_id
+    db.secuencias.insert_one({"secuencia": "MEEP"})
+
+    assert asignar_hashes_secuencias(db) == 3
+    assert db.secuencias.find_one({"_id": primera})["hash_secuencia"] == sequence_hash("MKV")
+    marcada = db.secuencias.find_one({"_id": repetida})
+    assert "hash_secuencia" not in marcada and marcada["duplicada_de"] == primera
+    assert db.secuencias.index_information()["hash_secuencia_1"]["unique"]
+
+    # Idempotente: la marcada no vuelve a recibir hash
+    assert asignar_hashes_secuencias(db) == 0
+    with pytest.raises(DuplicateKeyError):
+        db.secuencias.insert_one({"secuencia": "MKV", "hash_secuencia": sequence_hash("MKV")})
@@ -0,0 +1,27 @@
+from modules import series_temporales
+
+FILAS = [
+    {"tiempo": 0, "biomasa": 0.5, "fase": "lag"},
+    {"tiempo": 6, "biomasa": 2.25, "fase": "exp"},
+    {"tiempo": 12, "biomasa": 1.75, "fase": "exp"},
+]
+
+
+def test_resumen_igual_en_todos_los_formatos():
+    esperado = {
+        "tiempo": {"n": 3, "min": 0, "max": 12, "ultimo": 12},
+        "biomasa": {"n": 3, "min": 0.5, "max": 2.25, "ultimo": 1.75},
+    }
+    for formato in series_temporales.FORMATOS:
+        assert series_temporales.resumen(series_temporales.codificar(FILAS, formato)) == esperado
+
+
+def test_reporte_pdf_resume_la_serie_codificada(backend_main):
+    resultado = series_temporales.codificar_resultado({"eficiencia": 91.5, "datos_temporales": FILAS}, "f32")
+    lineas = backend_main._lineas_resultado(resultado)
+    assert lineas == [
+        "eficiencia: 91.5",
+        "datos_temporales: 3 puntos",
+        "  tiempo: mín 0, máx 12, último 12",
+        "  biomasa: mín 0.5, máx 2.25, último 1.75",
+    ]
@@ -0,0 +1,32 @@
+import pytest
+
+from modules.biopython_utils import is_valid_protein, sequence_hash, validate_sequences
+
+
+def test_minusculas_y_espacios_se_normalizan():
+    assert validate_sequences(["mkv la\n", "  ACD\r\nefg\t*", b"mk\nv"]) == [
+        ("MKVLA", []), ("ACDEFG*", []), ("MKV", []),
+    ]
+    assert sequence_hash("mkv la\n") == sequence_hash("MKVLA")
+
+
+@pytest.mark.parametrize("codigo", list("BZXJUO"))
+def test_codigos_ambiguos_se_rechazan(codigo):
+    secuencia = f"mk{codigo.lower()}v{codigo}"
+    assert validate_sequences([secuencia]) == [(f"MK{codigo}V{codigo}", [2, 4])]
+    assert not is_valid_protein(secuencia)
+
+
+def test_posiciones_sobre_la_secuencia_normalizada():
+    # Los espacios no cuentan: las posiciones son offsets del resultado
+    [(normalizada, posiciones)] = validate_sequences(["MK V-1\nLé α"])
+    assert normalizada == "MKV-1Lé?"  # solo ASCII se pasa a mayúsculas; α no es latin-1
+    assert posiciones == [3, 4, 6, 7]
+
+
+def test_lote_mixto_y_limite_de_posiciones():
+    resultados = validate_sequences(["MKV", "", "1" * 50, "A C"], max_positions=5)
+    assert resultados[0] == ("MKV", [])
+    assert resultados[1] == ("", [])
+    assert resultados[2] == ("1" * 50, [0, 1, 2, 3, 4])
+    assert resultados[3] == ("AC", [])
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from modules import ai_inference
+from modules.ai_inference import sliding_windows, stream_residue_embeddings
+
+VENTANA, SOLAPAMIENTO = 8, 3  # paso 5
+
+
+@pytest.fixture
+def estados(monkeypatch):
+    """Falso `_residue_states`: fila = (posición global, número de ventana)"""
+    monkeypatch.setitem(ai_inference.PLM_MODELS["esm2"], "max_residues", VENTANA)
+    registro = SimpleNamespace(ventanas=[], llamadas=[])
+
+    def falso(model_id, secuencias):
+        salida = []
+        for trozo in secuencias:
+            k = len(registro.llamadas)
+            inicio, fin = registro.ventanas[k]
+            assert len(trozo) == fin - inicio <= VENTANA
+            registro.llamadas.append(trozo)
+            salida.append(np.array([[inicio + i, k] for i in range(len(trozo))], dtype=np.float32))
+        return salida
+
+    monkeypatch.setattr(ai_inference, "_residue_states", falso)
+    return registro
+
+
+@pytest.mark.parametrize("longitud", [1, VENTANA - 1, VENTANA, VENTANA + 1, 5, 10, 15, 13, 23])
+@pytest.mark.parametrize("por_lote", [1, 2, 3])
+def test_costura_cubre_cada_residuo_una_vez(estados, longitud, por_lote):
+    secuencia = "ACDEFGHIKLMNPQRSTVWY" * 2
+    secuencia = secuencia[:longitud]
+    estados.ventanas = sliding_windows(longitud, VENTANA, SOLAPAMIENTO)
+
+    bloques = list(stream_residue_embeddings("esm2", secuencia, SOLAPAMIENTO, por_lote))
+    emitido = 0
+    for inicio, bloque in bloques:
+        assert inicio == emitido
+        emitido += len(bloque)
+    filas = np.concatenate([b for _, b in bloques])
+    assert emitido == longitud
+    assert filas[:, 0].tolist() == list(range(longitud))
+    assert len(estados.llamadas) == len(estados.ventanas)
+
+    # Los residuos de dos ventanas consecutivas promedian ambas
+    for posicion, (_, ventana) in enumerate(filas):
+        cubren = [k for k, (s, e) in enumerate(estados.ventanas) if s <= posicion < e]
+        assert len(cubren) in (1, 2)
+        assert ventana == sum(cubren) / len(cubren)
+
+
+def test_ventanas_en_los_bordes():
+    assert sliding_windows(1, VENTANA, SOLAPAMIENTO) == [(0, 1)]
+    assert sliding_windows(VENTANA, VENTANA, SOLAPAMIENTO) == [(0, 8)]
+    assert sliding_windows(VENTANA + 1, VENTANA, SOLAPAMIENTO) == [(0, 8), (5, 9)]
+    assert sliding_windows(13, VENTANA, SOLAPAMIENTO) == [(0, 8), (5, 13)]
+    assert sliding_windows(14, VENTANA, SOLAPAMIENTO) == [(0, 8), (5, 13), (10, 14)]
+    # El solapamiento se acota a menos de media ventana
+    assert sliding_windows(12, VENTANA, 6) == sliding_windows(12, VENTANA, 3)